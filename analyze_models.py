@@ -1,7 +1,112 @@
 import argparse
-from src.model_analyzer import ModelAnalyzer
-from src.yml_processor import process_yaml_sources
-from src.manifest_loader import load_manifest
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+from src.model_analyzer import MATCH_STRATEGIES, ModelAnalyzer
+from src.column_lineage import DEFAULT_RENAME_FANOUT
+from src.manifest_loader import ManifestLoadStats, load_manifest, load_manifest_streaming
+from src.lineage_budget import LineageBudget
+from src.lineage_cache import DEFAULT_CACHE_DIR, LineageCache
+from src.batch import iter_report_results, select_report_models, write_jsonl
+from src.profiling import profiler
+from src.query_planner import load_report_subgraph
+from src.startup import load_startup_inputs
+
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected 0 or more, got {value}")
+    return number
+
+
+def print_truncation_warning(budget: Optional[LineageBudget]) -> None:
+    if budget is not None and budget.truncated:
+        stats = budget.stats()
+        print(
+            f"Warning: lineage truncated ({', '.join(stats['reasons'])}) after "
+            f"{stats['pairs_expanded']} pairs, {stats['pairs_cut']} not followed"
+        )
+
+
+def print_text_report(model_analyzer: ModelAnalyzer, report_models: List[str], budget: Optional[LineageBudget] = None):
+    # Analyze the report models' lineage
+    for report_model_name in report_models:
+        print(f"Source columns for report model '{report_model_name}':")
+        query_budget = budget.renew() if budget is not None else None
+        report_source_columns = model_analyzer.lineage_tracer.get_base_level_lineage(
+            report_model_name, query_budget
+        )
+        print(report_source_columns)
+        print_truncation_warning(query_budget)
+
+    # Analyze and display materialized models
+    print("\nMaterialized models and their source columns:")
+    query_budget = budget.renew() if budget is not None else None
+    materialized_lineage = model_analyzer.get_materialized_model_lineage(query_budget)
+    for model_name, lineage in materialized_lineage.items():
+        print(f"Materialized Model: {model_name}")
+        print(lineage)
+    print_truncation_warning(query_budget)
+
+    # Compare report models with materialized models
+    for report_model_name in report_models:
+        print("\nModel comparison results:")
+        query_budget = budget.renew() if budget is not None else None
+        matches = model_analyzer.analyze_model_matches(report_model_name, query_budget)
+        for match in matches:
+            print(match)
+        print_truncation_warning(query_budget)
+
+
+def write_impact(model_analyzer: ModelAnalyzer, queries: List[List[str]]) -> None:
+    """
+    Writes one JSON line per --impact query with the columns and materialized models downstream of it.
+    """
+    for node_name, column_name in queries:
+        try:
+            impact = model_analyzer.analyze_impact(node_name, column_name)
+        except KeyError as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            continue
+        print(json.dumps(impact))
+
+
+def run_incremental(args, analyzer_options: Dict, manifest_data: Dict, source_data: Dict, report_models) -> ModelAnalyzer:
+    """
+    Diffs the manifest against --diff-base or --diff-state, retraces only the affected nodes
+    and writes the lineage and match deltas as JSON to --diff-output or stderr.
+    """
+    from src.manifest_diff import incremental_report, load_lineage_state
+
+    if args.diff_state:
+        old_analyzer = load_lineage_state(args.diff_state, source_data, **analyzer_options)
+    else:
+        base_manifest = load_manifest_streaming(args.diff_base)
+        base_cache = None if args.no_cache else LineageCache(args.cache_dir)
+        old_analyzer = ModelAnalyzer(
+            base_manifest.get("nodes", {}), source_data, base_manifest, cache=base_cache, **analyzer_options
+        )
+
+    cache = None if args.no_cache else LineageCache(args.cache_dir)
+    model_analyzer, delta = incremental_report(
+        old_analyzer,
+        manifest_data.get("nodes", {}),
+        source_data,
+        manifest_data,
+        report_models=report_models or None,
+        cache=cache,
+        **analyzer_options,
+    )
+    if args.diff_output:
+        with open(args.diff_output, "w") as f:
+            json.dump(delta, f, indent=2)
+    else:
+        print(json.dumps(delta, indent=2), file=sys.stderr)
+    if cache is not None:
+        cache.save(model_analyzer.lineage_tracer)
+    return model_analyzer
 
 
 def main():
@@ -10,52 +115,398 @@ def main():
         description="Analyze DBT models and report column lineage."
     )
     parser.add_argument(
-        "--manifest", required=True, help="Path to the DBT manifest.json file."
+        "--manifest", help="Path to the DBT manifest.json file, required unless --load-store is given."
     )
     parser.add_argument(
-        "--report_model", required=True, help="Report model to analyze."
+        "--report_model",
+        nargs="+",
+        default=[],
+        help="Report model(s) to analyze.",
+    )
+    parser.add_argument(
+        "--report_glob",
+        nargs="+",
+        default=[],
+        help="Glob pattern(s) selecting report models by node name, e.g. 'model.reports.*'.",
+    )
+    parser.add_argument(
+        "--select",
+        nargs="+",
+        default=[],
+        help="Selector(s) choosing report models by tag, e.g. 'tag:finance'.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "jsonl"],
+        default="text",
+        help="Print readable text, or stream one JSON object per report model.",
+    )
+    parser.add_argument(
+        "--output",
+        help="File to write JSONL results to instead of stdout.",
     )
     parser.add_argument(
         "--yaml",
         required=True,
         help="Path to the directory containing YAML source files.",
     )
+    parser.add_argument(
+        "--precompute",
+        action="store_true",
+        help="Resolve the lineage of every node up front in one bottom-up pass.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse YAML files and render and parse model SQL up front.",
+    )
+    parser.add_argument(
+        "--rename-fanout",
+        type=non_negative_int,
+        default=DEFAULT_RENAME_FANOUT,
+        help="Most rename candidates followed into a parent missing a column, 0 for no limit.",
+    )
+    parser.add_argument(
+        "--match-strategy",
+        choices=MATCH_STRATEGIES,
+        default="index",
+        help="Find overlapping materialized columns through an inverted index or batched lineage bitsets.",
+    )
+    parser.add_argument(
+        "--ignore-compiled-code",
+        action="store_true",
+        help="Render raw_code through Jinja even for nodes whose manifest entry has compiled_code.",
+    )
+    parser.add_argument(
+        "--jinja-cache-dir",
+        help="Directory for Jinja's compiled template bytecode cache, reused between runs.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory of the persistent lineage cache reused between runs.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the persistent lineage cache.",
+    )
+    parser.add_argument(
+        "--full-manifest",
+        action="store_true",
+        help="Load the whole manifest with json.load instead of streaming the fields the analyzer needs.",
+    )
+    parser.add_argument(
+        "--full-graph",
+        action="store_true",
+        help="Analyze every node even when only --report_model is given, instead of just the reports' subgraph.",
+    )
+    parser.add_argument(
+        "--serial-startup",
+        action="store_true",
+        help="Load the manifest and YAML sources one after the other instead of concurrently.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Measure peak memory while streaming the manifest (slows loading down).",
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="Keep the project loaded and answer lineage queries over HTTP on this port instead of reporting.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address the lineage server binds to.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Seconds between checks of the manifest for changes while serving.",
+    )
+    parser.add_argument(
+        "--diff-base",
+        metavar="MANIFEST",
+        help="Previous manifest to diff against: only changed nodes and their downstream models are retraced, and lineage and match deltas are written as JSON to --diff-output or stderr.",
+    )
+    parser.add_argument(
+        "--diff-state",
+        metavar="PATH",
+        help="Lineage state saved with --save-state to diff against instead of a previous manifest.",
+    )
+    parser.add_argument(
+        "--diff-output",
+        metavar="PATH",
+        help="File to write the lineage and match deltas of --diff-base or --diff-state to, instead of stderr.",
+    )
+    parser.add_argument(
+        "--save-state",
+        metavar="PATH",
+        help="Save the fully resolved lineage to this file for later --diff-state runs.",
+    )
+    parser.add_argument(
+        "--impact",
+        nargs=2,
+        action="append",
+        metavar=("NODE", "COLUMN"),
+        help="Write the model columns and materialized models derived from this source column as JSON (repeatable).",
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="PATH",
+        help="Pickled analysis snapshot: loaded instead of the manifest when it was built from the same manifest file, written otherwise.",
+    )
+    parser.add_argument(
+        "--export-store",
+        metavar="PATH",
+        help="Write the full column lineage graph and match scores to a SQLite database.",
+    )
+    parser.add_argument(
+        "--load-store",
+        metavar="PATH",
+        help="Warm-start from a SQLite database written by --export-store instead of tracing the manifest again.",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        help="Stop following lineage more than this many (node, column) hops from a report column; results are flagged as truncated.",
+    )
+    parser.add_argument(
+        "--max-pairs",
+        type=int,
+        help="Stop tracing a report model, and the materialized models it is matched against, after expanding this many (node, column) pairs; results are flagged as truncated.",
+    )
+    parser.add_argument(
+        "--query-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Stop tracing a report model, and the materialized models it is matched against, after this many seconds; results are flagged as truncated.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        help="Record per-stage timings and counters and write them as JSON to the given file, or to stderr.",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="Number of slowest nodes listed in the profile.",
+    )
 
     # Parse command-line arguments
     args = parser.parse_args()
+    if not args.manifest and (not args.load_store or args.serve is not None):
+        parser.error("--manifest is required unless --load-store is given")
+    # Modules only some modes need are imported by those modes, which keeps startup fast
+    if args.serve is not None:
+        from src.lineage_server import LineageService, serve
+
+        service = LineageService(
+            args.manifest,
+            args.yaml,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            jobs=args.jobs,
+            jinja_cache_dir=args.jinja_cache_dir,
+            rename_fanout=args.rename_fanout,
+            match_strategy=args.match_strategy,
+            use_compiled_code=not args.ignore_compiled_code,
+        )
+        serve(service, args.host, args.serve, args.poll_interval)
+        return
+    diff_mode = bool(args.diff_base or args.diff_state)
+    if args.diff_base and args.diff_state:
+        parser.error("--diff-base and --diff-state are mutually exclusive")
+    if not (args.report_model or args.report_glob or args.select or diff_mode or args.impact):
+        parser.error("one of --report_model, --report_glob, --select or --impact is required")
+    if args.profile:
+        profiler.enable(trace_memory=args.trace_memory)
+
+    # A snapshot built from this exact manifest answers the run without reading the manifest
+    snapshot = None
+    use_snapshot = bool(args.snapshot) and not (diff_mode or args.load_store)
+    if use_snapshot:
+        from src.snapshot import read_snapshot
 
-    # Load the manifest.json file
-    manifest_path = args.manifest
-    manifest_data = load_manifest(manifest_path)
+        with profiler.stage("snapshot_load"):
+            snapshot = read_snapshot(args.snapshot, manifest_path=args.manifest)
+        print(f"Snapshot {args.snapshot} {'loaded' if snapshot else 'missing or stale, rebuilding'}", file=sys.stderr)
 
-    # Process the YAML source files to extract sources
-    yaml_path = args.yaml
-    source_data = process_yaml_sources(yaml_path)
+    # Explicitly named reports only need their own subgraph; other modes read the whole project
+    plan_subgraph = bool(args.report_model) and not (
+        args.full_manifest or args.full_graph or args.report_glob or args.select or args.impact
+        or diff_mode or args.save_state or args.export_store or args.load_store or use_snapshot
+    )
+
+    def load_manifest_data() -> Dict:
+        if snapshot is not None:
+            return snapshot["manifest"]
+        if args.load_store:
+            # The store carries the reduced nodes, so the manifest is never read
+            from src.lineage_store import LineageStore
+
+            store = LineageStore(args.load_store)
+            try:
+                nodes = store.nodes()
+            finally:
+                store.close()
+            print(f"Loaded {len(nodes)} nodes from store {args.load_store}", file=sys.stderr)
+            return {"nodes": nodes, "sources": {}}
+        manifest_path = args.manifest
+        if args.full_manifest:
+            return load_manifest(manifest_path)
+        load_stats = ManifestLoadStats()
+        if plan_subgraph:
+            manifest_data, plan = load_report_subgraph(
+                manifest_path, args.report_model, load_stats, trace_memory=args.trace_memory
+            )
+            print(
+                f"Planned {len(plan.nodes)} of {plan.total_nodes} nodes "
+                f"({len(plan.materialized)} materialized models) for the report models",
+                file=sys.stderr,
+            )
+        else:
+            manifest_data = load_manifest_streaming(
+                manifest_path, load_stats, trace_memory=args.trace_memory
+            )
+        summary = (
+            f"Loaded {load_stats.nodes_kept} nodes ({load_stats.nodes_skipped} skipped) "
+            f"in {load_stats.elapsed:.2f}s"
+        )
+        if load_stats.peak_memory is not None:
+            summary += f", peak memory {load_stats.peak_memory / 2**20:.1f} MiB"
+        print(summary, file=sys.stderr)
+        return manifest_data
+
+    analyzer_options = {
+        "jinja_cache_dir": args.jinja_cache_dir,
+        "rename_fanout": args.rename_fanout,
+        "match_strategy": args.match_strategy,
+        "use_compiled_code": not args.ignore_compiled_code,
+    }
+
+    # Decode the manifest, process the YAML source files and build the manifest index concurrently
+    yaml_cache_path = None if args.no_cache else os.path.join(args.cache_dir, "yaml_sources.json")
+    manifest_data, source_data, index, startup = load_startup_inputs(
+        load_manifest_data,
+        args.yaml,
+        jobs=args.jobs,
+        yaml_cache_path=yaml_cache_path,
+        build_index=not (diff_mode or args.load_store or snapshot),
+        concurrent=False if args.serial_startup or snapshot else None,
+    )
+    print(
+        f"Startup {startup.wall:.2f}s: manifest {startup.manifest:.2f}s, YAML {startup.yaml:.2f}s, "
+        f"index {startup.index:.2f}s ({startup.saved:.2f}s saved by overlapping them)",
+        file=sys.stderr,
+    )
 
-    # Initialize ModelAnalyzer with manifest nodes and source data
     nodes = manifest_data.get("nodes", {})  # Assuming manifest has 'nodes'
-    model_analyzer = ModelAnalyzer(nodes, source_data, manifest_data)
+    try:
+        report_models = select_report_models(
+            nodes, args.report_model, args.report_glob, args.select
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    budget = None
+    if args.max_depth is not None or args.max_pairs is not None or args.query_timeout is not None:
+        budget = LineageBudget(args.max_depth, args.max_pairs, args.query_timeout)
+    if diff_mode:
+        with profiler.stage("incremental"):
+            model_analyzer = run_incremental(args, analyzer_options, manifest_data, source_data, report_models)
+        cache = None
+    else:
+        # Initialize ModelAnalyzer with manifest nodes and source data
+        # Stores and snapshots carry their own lineage, the per-node cache is only for manifest runs
+        cache = None if args.no_cache or args.load_store or snapshot is not None else LineageCache(args.cache_dir)
+        with profiler.stage("analyzer_setup"):
+            if args.load_store:
+                from src.lineage_store import load_lineage_store
+
+                model_analyzer = load_lineage_store(args.load_store, source_data, nodes, **analyzer_options)
+            elif snapshot is not None:
+                from src.snapshot import analyzer_from_snapshot
+
+                model_analyzer = analyzer_from_snapshot(snapshot, source_data, **analyzer_options)
+                if args.precompute:
+                    model_analyzer.lineage_tracer.precompute_lineage()
+            else:
+                model_analyzer = ModelAnalyzer(
+                    nodes,
+                    source_data,
+                    manifest_data,
+                    precompute=args.precompute,
+                    cache=cache,
+                    jobs=args.jobs,
+                    index=index,
+                    **analyzer_options,
+                )
 
-    # Analyze the report model's lineage
-    report_model_name = args.report_model
-    print(f"Source columns for report model '{report_model_name}':")
-    report_source_columns = model_analyzer.lineage_tracer.get_base_level_lineage(
-        report_model_name
+        if args.impact:
+            with profiler.stage("impact"):
+                write_impact(model_analyzer, args.impact)
+        if report_models:
+            with profiler.stage("report"):
+                if args.format == "jsonl":
+                    results = iter_report_results(model_analyzer, report_models, budget)
+                    if args.output:
+                        with open(args.output, "w") as f:
+                            write_jsonl(results, f)
+                    else:
+                        write_jsonl(results, sys.stdout)
+                else:
+                    print_text_report(model_analyzer, report_models, budget)
+
+    analysis_stats = model_analyzer.lineage_tracer.analysis_cache.stats()
+    print(
+        f"Analyzed {analysis_stats['misses']} models ({analysis_stats['compiled']} from compiled_code, "
+        f"{analysis_stats['rendered']} rendered, {analysis_stats['failures']} failed to parse): "
+        f"rendering {analysis_stats['render_time']:.2f}s, parsing {analysis_stats['parse_time']:.2f}s",
+        file=sys.stderr,
     )
-    print(report_source_columns)
 
-    # Analyze and display materialized models
-    print("\nMaterialized models and their source columns:")
-    materialized_lineage = model_analyzer.get_materialized_model_lineage()
-    for model_name, lineage in materialized_lineage.items():
-        print(f"Materialized Model: {model_name}")
-        print(lineage)
+    # Persist parse results and lineage so the next run only retraces what changed
+    if cache is not None:
+        with profiler.stage("cache_save"):
+            cache.save(model_analyzer.lineage_tracer)
+    if args.save_state:
+        from src.manifest_diff import save_lineage_state
+
+        with profiler.stage("save_state"):
+            save_lineage_state(model_analyzer, args.save_state)
+    if use_snapshot and (snapshot is None or len(model_analyzer.lineage_tracer._lineage_memo) > len(snapshot["lineage"])):
+        from src.snapshot import save_snapshot
+
+        with profiler.stage("snapshot_save"):
+            pairs = save_snapshot(model_analyzer, args.snapshot, manifest_path=args.manifest)
+        print(f"Saved {pairs} lineage pairs to snapshot {args.snapshot}", file=sys.stderr)
+    if args.export_store:
+        from src.lineage_store import export_lineage_store
+
+        with profiler.stage("export_store"):
+            counts = export_lineage_store(model_analyzer, args.export_store)
+        print(
+            f"Exported {counts['base_sources']} base lineage rows, {counts['edges']} column edges and "
+            f"{counts['matches']} matches to {args.export_store}",
+            file=sys.stderr,
+        )
 
-    # Compare report model with materialized models
-    print("\nModel comparison results:")
-    matches = model_analyzer.analyze_model_matches(report_model_name)
-    for match in matches:
-        print(match)
+    if args.profile:
+        report = profiler.report(top_nodes=args.profile_top)
+        report["analysis_cache"] = analysis_stats
+        report["startup"] = startup.as_dict()
+        if args.profile == "-":
+            print(json.dumps(report, indent=2), file=sys.stderr)
+        else:
+            with open(args.profile, "w") as f:
+                json.dump(report, f, indent=2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""
+Offline scaling benchmarks for the analyzer on synthetic dbt projects.
+
+    python -m benchmarks.run_benchmarks --models 1000 10000 --output benchmark_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_project import ProjectSpec, write_project  # noqa: E402
+from src.manifest_loader import ManifestLoadStats, load_manifest, load_manifest_streaming  # noqa: E402
+from src.manifest_diff import load_lineage_state, save_lineage_state  # noqa: E402
+from src.model_analyzer import ModelAnalyzer  # noqa: E402
+from src.query_planner import load_report_subgraph  # noqa: E402
+from src.snapshot import load_snapshot, save_snapshot  # noqa: E402
+from src.yml_processor import process_yaml_sources  # noqa: E402
+
+
+def _timed(scenario: str, func: Callable, repeat: int = 1) -> Dict:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        # SQL that fails to render is reported on stderr, keep it out of the benchmark output
+        with contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+    return {"scenario": scenario, "seconds": min(timings), "runs": timings, "result": result}
+
+
+# Modules the CLI should only import once a node actually has to be rendered or parsed
+HEAVY_MODULES = ("sqlglot", "jinja2", "numpy")
+_IMPORT_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import analyze_models\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(elapsed, ' '.join(name for name in sys.argv[1:] if name in sys.modules))\n"
+)
+
+
+def cli_import_time() -> Dict:
+    """
+    Imports the CLI in a fresh interpreter and reports how long it took and which heavy
+    modules it pulled in.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE, *HEAVY_MODULES], cwd=root, capture_output=True, text=True, check=True
+    ).stdout.split()
+    seconds = float(output[0])
+    return {"scenario": "cli_import", "seconds": seconds, "runs": [seconds], "result": output[1:]}
+
+
+def run_project(spec: ProjectSpec, work_dir: str, repeat: int = 1) -> Dict:
+    """
+    Generates one synthetic project and times every analyzer stage against it.
+    """
+    manifest_path, yaml_dir = write_project(spec, work_dir)
+    scenarios: List[Dict] = []
+
+    scenarios.append(_timed("manifest_load_full", lambda: len(load_manifest(manifest_path)["nodes"]), repeat))
+    stats = ManifestLoadStats()
+    scenarios.append(_timed("manifest_load_streaming", lambda: len(load_manifest_streaming(manifest_path, stats)["nodes"]), repeat))
+    manifest = load_manifest_streaming(manifest_path)
+    nodes = manifest["nodes"]
+
+    scenarios.append(_timed("yaml_discovery", lambda: len(process_yaml_sources(yaml_dir)), repeat))
+    source_data = process_yaml_sources(yaml_dir)
+
+    report_models = [name for name, node in nodes.items() if "report" in node.get("tags", [])]
+    report_model = report_models[0]
+
+    def base_level_lineage():
+        analyzer = ModelAnalyzer(nodes, source_data, manifest)
+        return len(analyzer.lineage_tracer.get_base_level_lineage(report_model))
+
+    def materialized_lineage():
+        analyzer = ModelAnalyzer(nodes, source_data, manifest)
+        return len(analyzer.get_materialized_model_lineage())
+
+    def single_report(manifest_loader):
+        # End to end for one report: load, trace the report and score its matches
+        report_manifest = manifest_loader()
+        report_analyzer = ModelAnalyzer(report_manifest["nodes"], source_data, report_manifest)
+        report_analyzer.lineage_tracer.get_base_level_lineage(report_model)
+        return len(report_analyzer.analyze_model_matches(report_model))
+
+    scenarios.append(_timed("single_report_full", lambda: single_report(lambda: load_manifest_streaming(manifest_path)), repeat))
+    scenarios.append(_timed(
+        "single_report_planned",
+        lambda: single_report(lambda: load_report_subgraph(manifest_path, [report_model])[0]),
+        repeat,
+    ))
+
+    analyzer = ModelAnalyzer(nodes, source_data, manifest)
+    with contextlib.redirect_stderr(io.StringIO()):
+        analyzer.get_materialized_model_lineage()
+
+    scenarios.append(_timed("get_base_level_lineage", base_level_lineage, repeat))
+    scenarios.append(_timed("get_materialized_model_lineage", materialized_lineage, repeat))
+    # Matching is timed on a warm analyzer so it measures the matcher rather than tracing
+    scenarios.append(_timed(
+        "analyze_model_matches",
+        lambda: sum(len(analyzer.analyze_model_matches(name)) for name in report_models[:20]),
+        repeat,
+    ))
+    bitset_analyzer = ModelAnalyzer(nodes, source_data, manifest, match_strategy="bitset")
+    with contextlib.redirect_stderr(io.StringIO()):
+        bitset_analyzer.get_materialized_model_lineage()
+    scenarios.append(_timed(
+        "analyze_model_matches_bitset",
+        lambda: sum(len(bitset_analyzer.analyze_model_matches(name)) for name in report_models[:20]),
+        repeat,
+    ))
+
+    # Warm starts of a fully traced project, from the JSON lineage state and from a snapshot
+    state_path = os.path.join(work_dir, "lineage_state.json")
+    snapshot_path = os.path.join(work_dir, "analysis.snapshot")
+    save_lineage_state(analyzer, state_path)
+    save_snapshot(analyzer, snapshot_path)
+
+    def warm_start(load):
+        warm_analyzer = load()
+        return len(warm_analyzer.lineage_tracer.get_base_level_lineage(report_model))
+
+    scenarios.append(_timed("warm_start_state", lambda: warm_start(lambda: load_lineage_state(state_path, source_data)), repeat))
+    scenarios.append(_timed("warm_start_snapshot", lambda: warm_start(lambda: load_snapshot(snapshot_path, source_data)), repeat))
+    scenarios.append(cli_import_time())
+
+    return {
+        "spec": spec.as_dict(),
+        "manifest_bytes": os.path.getsize(manifest_path),
+        "nodes": len(nodes),
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scaling benchmarks on synthetic dbt projects.")
+    parser.add_argument("--models", type=int, nargs="+", default=[1000], help="Project sizes to benchmark.")
+    parser.add_argument("--depth", type=int, default=8, help="Number of model layers in the DAG.")
+    parser.add_argument("--fan-in", type=int, default=2, help="Parents per model.")
+    parser.add_argument("--columns", type=int, default=12, help="Columns per source and model.")
+    parser.add_argument("--jinja-ratio", type=float, default=0.5, help="Share of models using Jinja.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario, the fastest is reported.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the generator.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "projects": [],
+    }
+    for models in args.models:
+        spec = ProjectSpec(
+            models=models,
+            depth=args.depth,
+            fan_in=args.fan_in,
+            columns=args.columns,
+            jinja_ratio=args.jinja_ratio,
+            seed=args.seed,
+        )
+        with tempfile.TemporaryDirectory() as work_dir:
+            project = run_project(spec, work_dir, args.repeat)
+        results["projects"].append(project)
+        for scenario in project["scenarios"]:
+            print(f"{models:>7} models  {scenario['scenario']:<32} {scenario['seconds']:.3f}s", file=sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
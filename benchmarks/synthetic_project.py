@@ -0,0 +1,178 @@
+import json
+import os
+import random
+from typing import Dict, List, Tuple
+
+import yaml
+
+COLUMN_WORDS = [
+    "customer", "order", "product", "store", "region", "amount", "price", "quantity",
+    "status", "date", "created", "updated", "email", "name", "code", "total",
+]
+FUNCTIONS = ["UPPER", "LOWER", "TRIM", "COALESCE"]
+
+
+class ProjectSpec:
+    """
+    Shape of a synthetic dbt project: how many models, how deep and wide the DAG is,
+    and how much Jinja the model SQL uses.
+    """
+
+    def __init__(
+        self,
+        models: int = 1000,
+        depth: int = 8,
+        fan_in: int = 2,
+        columns: int = 12,
+        sources: int = 20,
+        jinja_ratio: float = 0.5,
+        materialized_ratio: float = 0.2,
+        yaml_files: int = 10,
+        seed: int = 0,
+    ):
+        self.models = models
+        self.depth = depth
+        self.fan_in = fan_in
+        self.columns = columns
+        self.sources = sources
+        self.jinja_ratio = jinja_ratio
+        self.materialized_ratio = materialized_ratio
+        self.yaml_files = yaml_files
+        self.seed = seed
+
+    def as_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+def _column_names(rng: random.Random, count: int) -> List[str]:
+    # Numbered words keep name parts mostly distinct, so fuzzy rename matches stay occasional as in real projects
+    names = []
+    while len(names) < count:
+        name = "_".join(f"{word}{rng.randrange(50)}" for word in rng.sample(COLUMN_WORDS, 2))
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _model_sql(
+    rng: random.Random,
+    spec: ProjectSpec,
+    parents: List[Tuple[str, str, List[str]]],
+    columns: List[str],
+) -> str:
+    """
+    Builds a SELECT over the parents producing the given columns. Each output column is a
+    parent column passed through, renamed or wrapped in a function, and parents are joined
+    on their first column.
+    """
+    use_jinja = rng.random() < spec.jinja_ratio
+    aliases = [f"p{i}" for i in range(len(parents))]
+    select = []
+    for column in columns:
+        alias, (_, _, parent_columns) = rng.choice(list(zip(aliases, parents)))
+        parent_column = column if column in parent_columns else rng.choice(parent_columns)
+        shape = rng.random()
+        if shape < 0.5 and parent_column == column:
+            select.append(f"{alias}.{column}")
+        elif shape < 0.8:
+            select.append(f"{alias}.{parent_column} AS {column}")
+        else:
+            select.append(f"{rng.choice(FUNCTIONS)}({alias}.{parent_column}) AS {column}")
+
+    def relation(kind: str, name: str) -> str:
+        if not use_jinja:
+            return name.replace(".", "_")
+        if kind == "source":
+            _, source_name, table_name = name.split(".")
+            return f"{{{{ source('{source_name}', '{table_name}') }}}}"
+        return f"{{{{ ref('{name.split('.', 1)[1]}') }}}}"
+
+    kind, name, parent_columns = parents[0]
+    sql = f"SELECT {', '.join(select)}\nFROM {relation(kind, name)} {aliases[0]}"
+    for alias, (kind, name, parent_columns) in zip(aliases[1:], parents[1:]):
+        sql += f"\nJOIN {relation(kind, name)} {alias} ON {aliases[0]}.{parents[0][2][0]} = {alias}.{parent_columns[0]}"
+
+    if use_jinja:
+        sql = (
+            "{{ config(materialized='table', tags=['synthetic']) }}\n"
+            "{% set lookback_days = var('lookback_days', 30) %}\n"
+            f"{sql}\nWHERE {aliases[0]}.{parents[0][2][0]} IS NOT NULL"
+        )
+    return sql
+
+
+def generate_project(spec: ProjectSpec) -> Tuple[Dict, Dict]:
+    """
+    Generates a manifest and the matching source YAML documents for a synthetic project.
+    Models are arranged in `depth` layers, each model selecting from `fan_in` parents in
+    earlier layers, with layer zero reading from the sources.
+    """
+    rng = random.Random(spec.seed)
+    nodes: Dict[str, Dict] = {}
+    source_tables: List[Tuple[str, str, List[str]]] = []
+
+    for i in range(spec.sources):
+        name = f"source.raw_{i % 5}.table_{i}"
+        columns = _column_names(rng, spec.columns)
+        nodes[name] = {
+            "resource_type": "source",
+            "columns": {column: {"name": column} for column in columns},
+        }
+        source_tables.append(("source", name, columns))
+
+    layers: List[List[Tuple[str, str, List[str]]]] = [source_tables]
+    per_layer = max(1, spec.models // spec.depth)
+    for layer in range(spec.depth):
+        count = per_layer if layer < spec.depth - 1 else spec.models - per_layer * (spec.depth - 1)
+        current = []
+        for i in range(count):
+            name = f"model.synthetic.layer_{layer}_model_{i}"
+            # Mostly read from the previous layer, sometimes skip further up the DAG
+            candidates = layers[-1] if rng.random() < 0.8 or len(layers) < 3 else rng.choice(layers[:-1])
+            parents = rng.sample(candidates, min(spec.fan_in, len(candidates)))
+            inherited = [column for _, _, parent_columns in parents for column in parent_columns]
+            columns = list(dict.fromkeys(rng.sample(inherited, min(spec.columns, len(inherited)))))
+            columns += [c for c in _column_names(rng, 2) if c not in columns]
+
+            materialized = "table" if rng.random() < spec.materialized_ratio else "view"
+            nodes[name] = {
+                "resource_type": "model",
+                "raw_code": _model_sql(rng, spec, parents, columns),
+                "columns": {column: {"name": column} for column in columns},
+                "depends_on": {"nodes": [parent_name for _, parent_name, _ in parents]},
+                "config": {"materialized": materialized},
+                "checksum": {"name": "sha256", "checksum": f"{spec.seed}-{name}"},
+                "tags": ["report"] if layer == spec.depth - 1 else [],
+            }
+            current.append(("model", name, columns))
+        layers.append(current)
+
+    yaml_documents: Dict[str, Dict] = {}
+    for i, (_, name, columns) in enumerate(source_tables):
+        _, source_name, table_name = name.split(".")
+        document = yaml_documents.setdefault(f"sources_{i % spec.yaml_files}.yml", {"version": 2, "sources": []})
+        document["sources"].append({
+            "name": source_name,
+            "tables": [{"name": table_name, "columns": [{"name": column} for column in columns]}],
+        })
+
+    manifest = {"metadata": {"generator": "synthetic_project", "spec": spec.as_dict()}, "nodes": nodes, "sources": {}}
+    return manifest, yaml_documents
+
+
+def write_project(spec: ProjectSpec, output_dir: str) -> Tuple[str, str]:
+    """
+    Writes manifest.json and the source YAML of a synthetic project under output_dir.
+    Returns the manifest path and the YAML directory.
+    """
+    manifest, yaml_documents = generate_project(spec)
+    yaml_dir = os.path.join(output_dir, "models")
+    os.makedirs(yaml_dir, exist_ok=True)
+
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    for file_name, document in yaml_documents.items():
+        with open(os.path.join(yaml_dir, file_name), "w") as f:
+            yaml.safe_dump(document, f, sort_keys=False)
+    return manifest_path, yaml_dir
@@ -0,0 +1,84 @@
+import fnmatch
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from src.lineage_budget import LineageBudget
+from src.model_analyzer import ModelAnalyzer
+
+
+def _node_tags(node: Dict) -> List[str]:
+    return list(node.get("tags", [])) + list(node.get("config", {}).get("tags", []))
+
+
+def select_report_models(
+    nodes: Dict,
+    names: Iterable[str] = (),
+    patterns: Iterable[str] = (),
+    selectors: Iterable[str] = (),
+) -> List[str]:
+    """
+    Resolves the report models of a batch from explicit node names, glob patterns matched
+    against node names (e.g. model.reports.*) and tag selectors (e.g. tag:finance).
+    Models are returned once each, explicit names first, then in manifest order.
+    """
+    selected = [name for name in names]
+    patterns = list(patterns)
+    tags = set()
+    for selector in selectors:
+        if not selector.startswith("tag:"):
+            raise ValueError(f"Unsupported selector '{selector}', expected tag:<name>")
+        tags.add(selector[len("tag:"):])
+
+    for node_name, node in nodes.items():
+        if node.get("resource_type") != "model":
+            continue
+        if any(fnmatch.fnmatchcase(node_name, pattern) for pattern in patterns):
+            selected.append(node_name)
+        elif tags and tags.intersection(_node_tags(node)):
+            selected.append(node_name)
+
+    return list(dict.fromkeys(selected))
+
+
+def report_result(analyzer: ModelAnalyzer, report_model: str, budget: Optional[LineageBudget] = None) -> Dict:
+    """
+    Analyzes one report model and returns its lineage and matches as a JSON-serializable dict.
+    With a budget, the result says whether it was truncated and where the budget went.
+    """
+    lineage = analyzer.lineage_tracer.get_base_level_lineage(report_model, budget)
+    matches = analyzer.analyze_model_matches(report_model, budget)
+    result = {
+        "report_model": report_model,
+        "lineage": {column: sorted(sources) for column, sources in lineage.items()},
+        "matches": matches,
+    }
+    if budget is not None:
+        result["truncated"] = budget.truncated
+        result["budget"] = budget.stats()
+    return result
+
+
+def iter_report_results(
+    analyzer: ModelAnalyzer, report_models: Iterable[str], budget: Optional[LineageBudget] = None
+) -> Iterator[Dict]:
+    """
+    Yields one result per report model. All reports share the analyzer's parsed SQL and
+    resolved lineage, so models traced for one report are free for the next. A budget
+    applies to each report separately.
+    """
+    for report_model in report_models:
+        if report_model not in analyzer.index:
+            yield {"report_model": report_model, "error": "Model not found in manifest"}
+            continue
+        yield report_result(analyzer, report_model, budget.renew() if budget is not None else None)
+
+
+def write_jsonl(results: Iterable[Dict], stream: TextIO) -> int:
+    """
+    Writes each result as one JSON line as soon as it is produced. Returns the number written.
+    """
+    written = 0
+    for result in results:
+        stream.write(json.dumps(result) + "\n")
+        stream.flush()
+        written += 1
+    return written
@@ -1,108 +1,276 @@
-from typing import Dict, Set, Tuple
-from src.sql_parser import SqlParser
-from src.sql_preprocessor import preprocess_sql
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+from src.node_analysis import NodeAnalysisCache
+from src.dag import topological_order
+from src.lineage_budget import LineageBudget
+from src.lineage_cache import LineageCache
+from src.manifest_index import ManifestIndex
+from src.profiling import profiler
+
+# A (node ID, column ID) pair as interned by ManifestIndex
+LineagePair = Tuple[int, int]
+# Most rename candidates followed into one parent when a column is missing from it
+DEFAULT_RENAME_FANOUT = 32
+
 
 class ColumnLineageTracer:
-    def __init__(self, nodes: Dict, source_data: Dict, manifest: Dict):
+    def __init__(
+        self,
+        nodes: Dict,
+        source_data: Dict,
+        manifest: Dict,
+        cache: LineageCache = None,
+        index: ManifestIndex = None,
+        jinja_cache_dir: str = None,
+        rename_fanout: Optional[int] = DEFAULT_RENAME_FANOUT,
+        use_compiled_code: bool = True,
+    ):
         self.nodes = nodes
         self.source_data = source_data
-        self.sql_parser = SqlParser()  # Ensure SqlParser is initialized
         self.manifest = manifest
+        self.index = index if index is not None else ManifestIndex(nodes)
+        if rename_fanout is not None and rename_fanout < 0:
+            raise ValueError(f"rename_fanout must be 0 or more, got {rename_fanout}")
+        # 0 means no limit, like None
+        self.rename_fanout = rename_fanout or None
+        self.analysis_cache = NodeAnalysisCache(
+            manifest, bytecode_cache_dir=jinja_cache_dir, use_compiled_code=use_compiled_code
+        )
+        # Lineage is held as IDs into index.base_columns and only turned back into names on output
+        self._lineage_memo: Dict[LineagePair, FrozenSet[int]] = {}
+        self.lineage_table: Dict[int, Dict[int, FrozenSet[int]]] = {}
+        self.cache = cache
+        if cache is not None:
+            cache.load(self)
+
+    @property
+    def sql_parser(self):
+        return self.analysis_cache.sql_parser
+
+    def lineage_options(self) -> Dict:
+        """
+        Returns the settings that affect resolved lineage, used to key persisted results.
+        """
+        return {"rename_fanout": self.rename_fanout, "use_compiled_code": self.analysis_cache.use_compiled_code}
+
+    def analyze_nodes(self, jobs: int, node_names: Iterable[str] = None) -> int:
+        """
+        Renders and parses the SQL of the given nodes (all nodes by default) across a pool of
+        `jobs` worker processes ahead of tracing, so lineage resolution only reads cached results.
+        """
+        records = (
+            self.index.records if node_names is None
+            else [self.index.record(node_name) for node_name in node_names if node_name in self.index]
+        )
+        items = [
+            (record.name, record.raw_code, record.compiled_code)
+            for record in records if record.raw_code or record.compiled_code
+        ]
+        return self.analysis_cache.analyze_many(items, jobs)
 
     def trace_column_lineage(
         self, node_name: str, column_name: str, visited: Set[str] = None
     ) -> Set[Tuple[str, str]]:
-        if visited is None:
-            visited = set()
+        """
+        Returns the base source columns a column is derived from. Each (node, column) pair
+        is resolved once and memoized, so repeated and overlapping traces are lookups.
+        visited is accepted for compatibility and ignored, cycles are handled internally.
+        """
+        node_id = self.index.node_id(node_name)
 
-        if node_name in visited:
+        # If the node is not in the manifest, check if it's a source table from the YAML files
+        if node_id is None:
+            source_info = self.source_data.get(node_name)
+            if source_info and column_name in source_info["columns"]:
+                return {(source_info["group"], column_name)}
             return set()
 
-        visited.add(node_name)
+        lineage = self._resolve((node_id, self.index.column_id(column_name)))
+        return self.index.base_column_names(lineage)
 
-        # Check if the node exists in the manifest data
-        node = self.nodes.get(node_name)
+    def _expand(self, pair: LineagePair) -> Tuple[Set[int], List[LineagePair]]:
+        """
+        Returns the base lineage contributed by a pair itself and the pairs it derives from.
+        """
+        index = self.index
+        node_id, column_id = pair
+        record = index.records[node_id]
 
-        # If the node is not in the manifest, check if it's a source table from the YAML files
-        if node is None and node_name in self.source_data:
-            source_info = self.source_data[node_name]
-            if column_name in source_info["columns"]:
-                return {(source_info["group"], column_name)}
+        if record.resource_type == "source":
+            return {index.base_column_id(record.name, index.column_name(column_id))}, []
 
-        if node and node["resource_type"] == "source":
-            return {(node_name, column_name)}
-
-        lineage = set()
-        if node:
-            raw_sql = node.get("raw_code")
-            if raw_sql:
-
-                raw_sql = preprocess_sql(raw_sql, self.manifest)
-                sql_lineage = self.sql_parser.analyze_column_lineage(raw_sql)
-                transformations = self.sql_parser.extract_transformations(raw_sql)
-
-                if column_name in sql_lineage:
-                    for source in sql_lineage[column_name]["sources"]:
-                        lineage.update(
-                            self.trace_column_lineage(node_name, source, visited.copy())
-                        )
-
-                if column_name in transformations:
-                    for transform in transformations[column_name]:
-                        if transform["type"] == "rename":
-                            lineage.update(
-                                self.trace_column_lineage(
-                                    node_name, transform["original"], visited.copy()
-                                )
-                            )
-
-            # Handle dependencies
-            for dep_name in node.get("depends_on", {}).get("nodes", []):
-                dep_node = self.nodes.get(dep_name)
-                if dep_node is None:
-                    continue
-
-                if column_name in dep_node.get("columns", {}):
-                    lineage.update(
-                        self.trace_column_lineage(dep_name, column_name, visited.copy())
-                    )
-                else:
-                    for dep_column in dep_node.get("columns", {}):
-                        if self._is_potential_rename(column_name, dep_column):
-                            lineage.update(
-                                self.trace_column_lineage(
-                                    dep_name, dep_column, visited.copy()
-                                )
-                            )
-
-        return lineage
-
-    def _is_potential_rename(self, col1: str, col2: str) -> bool:
-        col1_parts = col1.lower().split("_")
-        col2_parts = col2.lower().split("_")
-        return any(part in col2_parts for part in col1_parts) or any(
-            part in col1_parts for part in col2_parts
-        )
+        successors = []
+        if record.raw_code or record.compiled_code:
+            # The node is parsed as before, but lineage only follows dependencies: the original
+            # tracer re-entered the same node for SQL sources and renames, which its visited
+            # check always cut, so those never contributed to the result
+            self.analysis_cache.get(record.name, record.raw_code, record.compiled_code)
+
+        # Handle dependencies
+        for parent_id in record.parents:
+            parent = index.records[parent_id]
+            if column_id in parent.column_set:
+                successors.append((parent_id, column_id))
+            else:
+                for parent_column in self._rename_candidates(parent_id, column_id):
+                    successors.append((parent_id, parent_column))
 
-    def get_base_level_lineage(self, node_name: str) -> Dict[str, Set[Tuple[str, str]]]:
+        return set(), successors
+
+    def _rename_candidates(self, node_id: int, column_id: int) -> List[int]:
+        """
+        Returns the columns of a node that may be a rename of the given column, i.e. share a
+        name part with it, found through the node's token index. Candidates are ranked by the
+        number of shared parts, then declaration order, and capped at rename_fanout.
+        """
+        index = self.index
+        token_index = index.token_index(node_id)
+        shared: Dict[int, int] = {}
+        for token in index.column_tokens(column_id):
+            for position in token_index.get(token, ()):
+                shared[position] = shared.get(position, 0) + 1
+        if not shared:
+            return []
+
+        columns = index.records[node_id].columns
+        if self.rename_fanout is None or len(shared) <= self.rename_fanout:
+            return [columns[position] for position in sorted(shared)]
+        profiler.count("rename_candidates_capped")
+        ranked = sorted(shared, key=lambda position: (-shared[position], position))
+        return [columns[position] for position in ranked[:self.rename_fanout]]
+
+    def _resolve(self, root: LineagePair, budget: Optional[LineageBudget] = None) -> FrozenSet[int]:
+        """
+        Resolves a pair iteratively with Tarjan's strongly connected components algorithm.
+        Every pair on a cycle reaches every other pair on it, so the whole component shares
+        one lineage result, which keeps memoized results independent of the entry point.
+        With a budget, pairs past its limits are not expanded; components that lost any
+        successor that way are partial and kept on the budget instead of the memo.
+        """
+        memo = self._lineage_memo
+        if root in memo:
+            return memo[root]
+        if budget is not None:
+            budget.start()
+            if root in budget.partial:
+                return budget.partial[root]
+            if not budget.allows(depth=0):
+                return frozenset()
+
+        order: Dict[LineagePair, int] = {}
+        low: Dict[LineagePair, int] = {}
+        partial: Dict[LineagePair, Set[int]] = {}
+        component: List[LineagePair] = []
+        on_component: Set[LineagePair] = set()
+        incomplete: Set[LineagePair] = set()
+        work: List[Tuple[LineagePair, Iterator[LineagePair]]] = []
+
+        def visit(pair: LineagePair) -> None:
+            profiler.count("lineage_pairs_expanded")
+            if budget is not None:
+                budget.spend(self.index.records[pair[0]].name, depth=len(work))
+            base, successors = self._expand(pair)
+            order[pair] = low[pair] = len(order)
+            partial[pair] = base
+            component.append(pair)
+            on_component.add(pair)
+            work.append((pair, iter(successors)))
+
+        visit(root)
+        while work:
+            pair, successors = work[-1]
+            for successor in successors:
+                if successor in memo:
+                    partial[pair].update(memo[successor])
+                elif budget is not None and successor in budget.partial:
+                    partial[pair].update(budget.partial[successor])
+                    incomplete.add(pair)
+                elif successor not in order:
+                    if budget is not None and not budget.allows(depth=len(work)):
+                        incomplete.add(pair)
+                        continue
+                    visit(successor)
+                    break
+                elif successor in on_component:
+                    low[pair] = min(low[pair], order[successor])
+            else:
+                work.pop()
+                parent = work[-1][0] if work else None
+                if parent is not None:
+                    low[parent] = min(low[parent], low[pair])
+
+                if low[pair] == order[pair]:
+                    # pair is the root of a component: all its members share one result
+                    members = []
+                    lineage: Set[int] = set()
+                    truncated = False
+                    while True:
+                        member = component.pop()
+                        on_component.discard(member)
+                        lineage.update(partial.pop(member))
+                        truncated = truncated or member in incomplete
+                        members.append(member)
+                        if member == pair:
+                            break
+                    result = frozenset(lineage)
+                    results = budget.partial if truncated else memo
+                    for member in members:
+                        results[member] = result
+                    if parent is not None:
+                        partial[parent].update(result)
+                        if truncated:
+                            incomplete.add(parent)
+
+        return memo[root] if root in memo else budget.partial[root]
+
+    def get_column_lineage_ids(self, node_id: int, budget: Optional[LineageBudget] = None) -> Dict[int, FrozenSet[int]]:
+        """
+        Returns the base lineage of every declared column of a node that has any, keyed by column ID.
+        With a budget the result may be partial; check budget.truncated.
+        """
+        if node_id in self.lineage_table:
+            return self.lineage_table[node_id]
+
+        base_lineage = {}
+        with profiler.stage("lineage"):
+            for column_id in self.index.records[node_id].columns:
+                lineage = self._resolve((node_id, column_id), budget)
+                if lineage:
+                    base_lineage[column_id] = lineage
+        return base_lineage
+
+    def get_base_level_lineage(
+        self, node_name: str, budget: Optional[LineageBudget] = None
+    ) -> Dict[str, Set[Tuple[str, str]]]:
         """
         Returns the base lineage for a given node. If the node is a source table from YAML,
-        it will extract the source table and column data from the YAML file.
+        it will extract the source table and column data from the YAML file. With a budget,
+        tracing stops at its limits and the lineage may be partial (budget.truncated).
         """
-        node = self.nodes.get(node_name)
+        node_id = self.index.node_id(node_name)
         base_lineage = {}
 
         # If node is not found in the manifest, check if it's a source table from YAML
-        if not node and node_name in self.source_data:
+        if node_id is None and node_name in self.source_data:
             source_info = self.source_data[node_name]
             for column in source_info["columns"]:
                 base_lineage[column] = {(source_info["group"], column)}
             return base_lineage
 
         # If the node exists in the manifest, trace its lineage
-        for column in node.get("columns", {}):
-            lineage = self.trace_column_lineage(node_name, column)
-            if lineage:
-                base_lineage[column] = lineage
+        for column_id, lineage in self.get_column_lineage_ids(node_id, budget).items():
+            base_lineage[self.index.column_name(column_id)] = self.index.base_column_names(lineage)
 
         return base_lineage
+
+    def precompute_lineage(self) -> Dict[int, Dict[int, FrozenSet[int]]]:
+        """
+        Resolves the lineage of every node in one bottom-up pass over the dependency graph.
+        Nodes are visited in topological order, so each node's columns resolve against the
+        already memoized lineage of its parents. Later lineage lookups read from the
+        resulting table, keyed by node and column ID, instead of tracing.
+        """
+        with profiler.stage("precompute"):
+            for node_name in topological_order(self.nodes):
+                node_id = self.index.node_id(node_name)
+                self.lineage_table[node_id] = self.get_column_lineage_ids(node_id)
+        return self.lineage_table
@@ -0,0 +1,51 @@
+from collections import deque
+from typing import Dict, List
+
+
+def build_parent_map(nodes: Dict) -> Dict[str, List[str]]:
+    """
+    Maps each node to the dependencies listed in its depends_on.nodes that exist in the manifest.
+    """
+    return {
+        node_name: [
+            dep_name for dep_name in node.get("depends_on", {}).get("nodes", [])
+            if dep_name in nodes
+        ]
+        for node_name, node in nodes.items()
+    }
+
+
+def build_child_map(nodes: Dict) -> Dict[str, List[str]]:
+    """
+    Maps each node to the nodes that list it in their depends_on.nodes.
+    """
+    children = {node_name: [] for node_name in nodes}
+    for node_name, parents in build_parent_map(nodes).items():
+        for parent in parents:
+            children[parent].append(node_name)
+    return children
+
+
+def topological_order(nodes: Dict) -> List[str]:
+    """
+    Returns the node names ordered so that every node comes after its dependencies.
+    Nodes caught in a dependency cycle cannot be ordered and are appended at the end.
+    """
+    parents = build_parent_map(nodes)
+    children = build_child_map(nodes)
+    remaining = {node_name: len(deps) for node_name, deps in parents.items()}
+
+    ready = deque(node_name for node_name, count in remaining.items() if count == 0)
+    order = []
+    while ready:
+        node_name = ready.popleft()
+        order.append(node_name)
+        for child in children[node_name]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                ready.append(child)
+
+    if len(order) < len(nodes):
+        ordered = set(order)
+        order.extend(node_name for node_name in nodes if node_name not in ordered)
+    return order
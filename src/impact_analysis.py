@@ -0,0 +1,82 @@
+from collections import defaultdict
+from typing import Dict, List, Set
+from src.column_lineage import ColumnLineageTracer, LineagePair
+from src.manifest_index import ManifestIndex
+
+
+class ImpactIndex:
+    """
+    Reverse lineage: maps each base source column to the (node, column) pairs derived from it.
+    Lineage only flows along depends_on.nodes, so answering a query only traces the nodes
+    downstream of the source, found through the child adjacency of the manifest index. Every
+    node traced is folded into the reverse index once and serves all later queries.
+    """
+
+    def __init__(self, tracer: ColumnLineageTracer, index: ManifestIndex = None):
+        self.tracer = tracer
+        self.index = index if index is not None else tracer.index
+        self._derived: Dict[int, Set[LineagePair]] = defaultdict(set)
+        self._indexed: Set[int] = set()
+
+    def downstream_node_ids(self, node_id: int) -> List[int]:
+        """
+        Returns the node and every node that depends on it directly or transitively.
+        """
+        records = self.index.records
+        seen = {node_id}
+        pending = [node_id]
+        while pending:
+            for child_id in records[pending.pop()].children:
+                if child_id not in seen:
+                    seen.add(child_id)
+                    pending.append(child_id)
+        return sorted(seen)
+
+    def _index_node(self, node_id: int) -> None:
+        if node_id in self._indexed:
+            return
+        for column_id, lineage in self.tracer.get_column_lineage_ids(node_id).items():
+            for base_id in lineage:
+                self._derived[base_id].add((node_id, column_id))
+        self._indexed.add(node_id)
+
+    def build(self) -> None:
+        """
+        Indexes every node up front, for long-lived callers answering many queries.
+        """
+        for node_id in range(len(self.index)):
+            self._index_node(node_id)
+
+    def impact(self, source_node: str, column_name: str) -> Dict:
+        """
+        Returns every downstream (model, column) pair whose base lineage includes the given
+        source column, and the materialized='table' models among them.
+        """
+        index = self.index
+        node_id = index.node_id(source_node)
+        if node_id is None:
+            raise KeyError(f"Node '{source_node}' not found in manifest")
+
+        for downstream_id in self.downstream_node_ids(node_id):
+            self._index_node(downstream_id)
+        # Looked up rather than interned, so queries for unknown columns do not grow the index
+        base_id = index.find_base_column_id(source_node, column_name)
+        derived = sorted(
+            self._derived.get(base_id, ()) if base_id is not None else (),
+            key=lambda pair: (index.node_name(pair[0]), index.column_name(pair[1])),
+        )
+
+        columns = []
+        materialized = []
+        for derived_id, column_id in derived:
+            if derived_id == node_id:
+                continue
+            record = index.records[derived_id]
+            columns.append((record.name, index.column_name(column_id)))
+            if record.resource_type == "model" and record.materialized == "table" and record.name not in materialized:
+                materialized.append(record.name)
+        return {
+            "source": (source_node, column_name),
+            "columns": columns,
+            "materialized_models": materialized,
+        }
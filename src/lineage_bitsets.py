@@ -0,0 +1,84 @@
+from typing import Iterable, List, Optional, Sequence
+
+_UNLOADED = object()
+# Optional, the Python int path gives the same results. Imported on first use, so runs that
+# never build bitsets do not pay for loading NumPy.
+numpy = _UNLOADED
+
+
+def _load_numpy():
+    global numpy
+    if numpy is _UNLOADED:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        numpy = module
+    return numpy
+
+# Upper bound on the bytes of the intermediate AND array built per batch of query rows
+_BATCH_BYTES = 1 << 25
+
+
+def _encode(base_ids: Iterable[int], width: int) -> bytearray:
+    """
+    Packs base column IDs below `width` into a little-endian bitset of width bits.
+    """
+    bits = bytearray((width + 7) // 8)
+    for base_id in base_ids:
+        if base_id < width:
+            bits[base_id >> 3] |= 1 << (base_id & 7)
+    return bits
+
+
+class LineageBitsets:
+    """
+    Stores the base lineage of a list of columns as bitsets over the base column IDs known
+    when it is built. overlapping() then finds, for many query lineages at once, which stored
+    columns share at least one base column, using batched AND operations on a packed NumPy
+    matrix when NumPy is installed and on Python ints otherwise.
+    """
+
+    def __init__(self, lineages: Sequence[Iterable[int]], width: int, use_numpy: Optional[bool] = None):
+        self.width = max(width, 1)
+        _load_numpy()
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        if self.use_numpy and numpy is None:
+            raise ImportError("numpy is required for use_numpy=True")
+
+        encoded = [_encode(lineage, self.width) for lineage in lineages]
+        self.size = len(encoded)
+        if self.use_numpy:
+            row_bytes = (self.width + 7) // 8
+            self._matrix = numpy.frombuffer(b"".join(encoded), dtype=numpy.uint8).reshape(self.size, row_bytes)
+        else:
+            self._ints = [int.from_bytes(bits, "little") for bits in encoded]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def overlapping(self, lineages: Sequence[Iterable[int]]) -> List[List[int]]:
+        """
+        Returns, for each query lineage, the ascending positions of the stored columns whose
+        lineage intersects it.
+        """
+        encoded = [_encode(lineage, self.width) for lineage in lineages]
+        if not encoded or not self.size:
+            return [[] for _ in encoded]
+
+        if not self.use_numpy:
+            stored = self._ints
+            results = []
+            for bits in encoded:
+                query = int.from_bytes(bits, "little")
+                results.append([position for position, column in enumerate(stored) if query & column] if query else [])
+            return results
+
+        row_bytes = self._matrix.shape[1]
+        queries = numpy.frombuffer(b"".join(encoded), dtype=numpy.uint8).reshape(len(encoded), row_bytes)
+        batch = max(1, _BATCH_BYTES // max(1, self.size * row_bytes))
+        results = []
+        for start in range(0, len(encoded), batch):
+            hits = (queries[start:start + batch, None, :] & self._matrix[None, :, :]).any(axis=2)
+            results.extend(numpy.flatnonzero(row).tolist() for row in hits)
+        return results
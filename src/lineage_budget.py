@@ -0,0 +1,84 @@
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+
+class LineageBudget:
+    """
+    Limits for one lineage query, and a record of how the query spent them. A query stops
+    following a branch deeper than max_depth, and stops expanding new (node, column) pairs
+    once max_pairs were expanded or deadline seconds have passed since it started. Lineage
+    resolved past a cut is partial: it is kept on the budget for the rest of the query,
+    never memoized on the tracer, and the query is reported as truncated.
+    """
+
+    def __init__(self, max_depth: Optional[int] = None, max_pairs: Optional[int] = None, deadline: Optional[float] = None):
+        self.max_depth = max_depth
+        self.max_pairs = max_pairs
+        self.deadline = deadline
+        self.pairs = 0
+        self.deepest = 0
+        self.cut_pairs = 0
+        self.reasons: Set[str] = set()
+        self.expanded_by_node: Dict[str, int] = defaultdict(int)
+        # Partial results of this query, keyed by (node ID, column ID)
+        self.partial: Dict[Tuple[int, int], FrozenSet[int]] = {}
+        self._started: Optional[float] = None
+        self._ends: Optional[float] = None
+        self._exhausted = False
+
+    def renew(self) -> "LineageBudget":
+        """
+        Returns an unused budget with the same limits, for the next query.
+        """
+        return LineageBudget(self.max_depth, self.max_pairs, self.deadline)
+
+    def start(self) -> None:
+        if self._started is None:
+            self._started = time.perf_counter()
+            if self.deadline is not None:
+                self._ends = self._started + self.deadline
+
+    def allows(self, depth: int) -> bool:
+        """
+        Decides whether a pair reached at the given depth may still be expanded, recording
+        the cut when it may not.
+        """
+        if not self._exhausted:
+            if self.max_pairs is not None and self.pairs >= self.max_pairs:
+                self._exhaust("pairs")
+            elif self._ends is not None and time.perf_counter() > self._ends:
+                self._exhaust("deadline")
+        if self._exhausted:
+            self.cut_pairs += 1
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            self.reasons.add("depth")
+            self.cut_pairs += 1
+            return False
+        return True
+
+    def _exhaust(self, reason: str) -> None:
+        self._exhausted = True
+        self.reasons.add(reason)
+
+    def spend(self, node_name: str, depth: int) -> None:
+        self.pairs += 1
+        self.deepest = max(self.deepest, depth)
+        self.expanded_by_node[node_name] += 1
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.reasons)
+
+    def stats(self, top_nodes: int = 5) -> Dict:
+        busiest = sorted(self.expanded_by_node.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "truncated": self.truncated,
+            "reasons": sorted(self.reasons),
+            "pairs_expanded": self.pairs,
+            "max_depth_reached": self.deepest,
+            "pairs_cut": self.cut_pairs,
+            "elapsed": 0.0 if self._started is None else time.perf_counter() - self._started,
+            "busiest_nodes": [{"node": node_name, "pairs": pairs} for node_name, pairs in busiest[:top_nodes]],
+        }
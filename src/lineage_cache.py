@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Optional
+from src.dag import build_parent_map, topological_order
+from src.node_analysis import NodeAnalysis
+
+# Bump whenever the parse or lineage rules change so stale entries are never reused
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = ".dbt_lineage_cache"
+
+
+def node_fingerprint(node: Dict) -> str:
+    """
+    Fingerprints the parts of a node that affect its own lineage: the dbt checksum of its
+    SQL (or the SQL itself when the manifest carries no checksum), its compiled SQL when
+    present, and its declared columns.
+    """
+    checksum = node.get("checksum", {}).get("checksum") or hashlib.sha256(
+        (node.get("raw_code") or "").encode("utf-8")
+    ).hexdigest()
+    fields = [node.get("resource_type"), checksum, list(node.get("columns", {}))]
+    if node.get("compiled_code"):
+        fields.append(hashlib.sha256(node["compiled_code"].encode("utf-8")).hexdigest())
+    payload = json.dumps(fields)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compute_cache_keys(nodes: Dict, options: Dict = None) -> Dict[str, str]:
+    """
+    Computes a cache key for every node from its own fingerprint and the keys of its parents,
+    so a change anywhere upstream invalidates every node below it. Tracing options that change
+    the resolved lineage are folded into every key.
+    """
+    parents = build_parent_map(nodes)
+    keys: Dict[str, str] = {}
+    for node_name in topological_order(nodes):
+        # Parents that are part of a dependency cycle have no key yet, fall back to their fingerprint
+        parent_keys = sorted(
+            keys.get(parent) or node_fingerprint(nodes[parent])
+            for parent in parents[node_name]
+        )
+        payload = json.dumps(
+            [CACHE_VERSION, options or {}, node_name, node_fingerprint(nodes[node_name]), parent_keys],
+            sort_keys=True,
+        )
+        keys[node_name] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return keys
+
+
+def restore_entry(tracer, node_name: str, entry: Dict) -> None:
+    """
+    Seeds a tracer's analysis cache and lineage memo with one node's persisted entry.
+    """
+    index = tracer.index
+    analysis = entry.get("analysis")
+    if analysis is not None:
+        tracer.analysis_cache.put(
+            node_name,
+            NodeAnalysis(
+                analysis["rendered_sql"],
+                analysis["column_lineage"],
+                analysis["transformations"],
+            ),
+        )
+    node_id = index.node_id(node_name)
+    for column, sources in entry.get("lineage", {}).items():
+        tracer._lineage_memo[(node_id, index.column_id(column))] = frozenset(
+            index.base_column_id(owner, source_column) for owner, source_column in sources
+        )
+
+
+def dump_analysis(tracer, node_name: str) -> Optional[Dict]:
+    analysis = tracer.analysis_cache.peek(node_name)
+    if analysis is None:
+        return None
+    return {
+        "rendered_sql": analysis.rendered_sql,
+        "column_lineage": analysis.column_lineage,
+        "transformations": analysis.transformations,
+    }
+
+
+class LineageCache:
+    """
+    Persists per-node parse results and resolved column lineage between runs. Entries are
+    stored one file per node, named after the node's cache key, so a warm run only
+    re-parses and re-traces nodes whose SQL, columns or ancestry changed.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._keys: Dict[str, str] = {}
+        self._loaded_pairs: Dict[str, int] = {}
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "nodes", key[:2], f"{key}.json")
+
+    def _read_entry(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._entry_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, tracer) -> None:
+        """
+        Seeds a tracer's analysis cache and lineage memo with every entry still valid for its nodes.
+        """
+        self._keys = compute_cache_keys(tracer.nodes, tracer.lineage_options())
+        for node_name, key in self._keys.items():
+            entry = self._read_entry(key)
+            if entry is None:
+                self.misses += 1
+                continue
+
+            self.hits += 1
+            restore_entry(tracer, node_name, entry)
+            self._loaded_pairs[node_name] = len(entry.get("lineage", {}))
+
+    def save(self, tracer) -> int:
+        """
+        Writes entries for nodes that were parsed or traced beyond what the cache already held.
+        Returns the number of entries written.
+        """
+        if not self._keys:
+            self._keys = compute_cache_keys(tracer.nodes, tracer.lineage_options())
+
+        index = tracer.index
+        lineage_by_node = defaultdict(dict)
+        for (node_id, column_id), sources in tracer._lineage_memo.items():
+            lineage_by_node[index.node_name(node_id)][index.column_name(column_id)] = sorted(
+                index.base_column_names(sources)
+            )
+
+        written = 0
+        for node_name, key in self._keys.items():
+            lineage = lineage_by_node.get(node_name, {})
+            if len(lineage) <= self._loaded_pairs.get(node_name, -1):
+                continue
+            if not lineage and node_name not in tracer.analysis_cache:
+                continue
+
+            entry = {"node": node_name, "lineage": lineage}
+            analysis = dump_analysis(tracer, node_name)
+            if analysis is not None:
+                entry["analysis"] = analysis
+
+            path = self._entry_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+            self._loaded_pairs[node_name] = len(lineage)
+            written += 1
+        return written
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
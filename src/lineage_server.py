@@ -0,0 +1,229 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from src.lineage_cache import LineageCache
+from src.manifest_loader import load_manifest_streaming, manifest_signature
+from src.model_analyzer import ModelAnalyzer
+from src.yml_processor import process_yaml_sources
+
+
+class LineageState:
+    """
+    One loaded version of the project: the analyzer with every node's lineage resolved, and
+    the signature of the manifest it was built from. Queries against one state are serialized
+    by its lock, since the analyzer fills its caches lazily.
+    """
+
+    def __init__(self, analyzer: ModelAnalyzer, signature: Tuple[int, int], load_time: float):
+        self.analyzer = analyzer
+        self.signature = signature
+        self.load_time = load_time
+        self.loaded_at = time.time()
+        self.lock = threading.Lock()
+
+
+class LineageService:
+    """
+    Keeps a project loaded and its lineage warm between queries. When the manifest changes
+    on disk, reload_if_changed builds a complete new state next to the current one and then
+    swaps it in, so requests already running finish against the state they started with.
+    """
+
+    def __init__(
+        self,
+        manifest_path: str,
+        yaml_path: str,
+        cache_dir: str = None,
+        jobs: int = 1,
+        **analyzer_options,
+    ):
+        self.manifest_path = manifest_path
+        self.yaml_path = yaml_path
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.analyzer_options = analyzer_options
+        self.reloads = 0
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        state = self._load()
+        if state is None:
+            raise ValueError(f"Could not load manifest {manifest_path}")
+        self.state = state
+
+    def _load(self) -> Optional[LineageState]:
+        start = time.perf_counter()
+        # Taken before reading, so a write that lands during the load triggers another reload
+        signature = manifest_signature(self.manifest_path)
+        manifest_data = load_manifest_streaming(self.manifest_path)
+        if not manifest_data:
+            return None
+
+        yaml_cache_path = os.path.join(self.cache_dir, "yaml_sources.json") if self.cache_dir else None
+        source_data = process_yaml_sources(self.yaml_path, jobs=self.jobs, cache_path=yaml_cache_path)
+        cache = LineageCache(self.cache_dir) if self.cache_dir else None
+        analyzer = ModelAnalyzer(
+            manifest_data.get("nodes", {}),
+            source_data,
+            manifest_data,
+            precompute=True,
+            cache=cache,
+            jobs=self.jobs,
+            **self.analyzer_options,
+        )
+        if cache is not None:
+            cache.save(analyzer.lineage_tracer)
+        return LineageState(analyzer, signature, time.perf_counter() - start)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Rebuilds and swaps in the state when the manifest's mtime or size changed. A manifest
+        that fails to load (e.g. one still being written) leaves the current state in place.
+        """
+        with self._reload_lock:
+            try:
+                if manifest_signature(self.manifest_path) == self.state.signature:
+                    return False
+            except OSError:
+                return False
+            state = self._load()
+            if state is None:
+                return False
+            self.state = state
+            self.reloads += 1
+            return True
+
+    def watch(self, poll_interval: float) -> threading.Thread:
+        """
+        Starts a daemon thread polling the manifest for changes every poll_interval seconds.
+        """
+        def poll():
+            while not self._stop.wait(poll_interval):
+                try:
+                    if self.reload_if_changed():
+                        print(f"Reloaded {self.manifest_path} in {self.state.load_time:.2f}s", file=sys.stderr)
+                except Exception as e:
+                    print(f"Error reloading manifest: {e}", file=sys.stderr)
+
+        thread = threading.Thread(target=poll, name="manifest-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def lineage(self, model_name: str) -> Optional[Dict]:
+        state = self.state
+        with state.lock:
+            if model_name not in state.analyzer.index and model_name not in state.analyzer.source_data:
+                return None
+            lineage = state.analyzer.lineage_tracer.get_base_level_lineage(model_name)
+        return {"model": model_name, "lineage": {column: sorted(sources) for column, sources in lineage.items()}}
+
+    def matches(self, model_name: str) -> Optional[Dict]:
+        state = self.state
+        with state.lock:
+            if model_name not in state.analyzer.index:
+                return None
+            matches = state.analyzer.analyze_model_matches(model_name)
+        return {"report_model": model_name, "matches": matches}
+
+    def impact(self, node_name: str, column_name: str) -> Optional[Dict]:
+        state = self.state
+        with state.lock:
+            if node_name not in state.analyzer.index:
+                return None
+            impact = state.analyzer.analyze_impact(node_name, column_name)
+        return {
+            "source": list(impact["source"]),
+            "columns": [list(pair) for pair in impact["columns"]],
+            "materialized_models": impact["materialized_models"],
+        }
+
+    def materialized(self) -> Dict:
+        state = self.state
+        with state.lock:
+            lineage = state.analyzer.get_materialized_model_lineage()
+        return {
+            model_name: {column: sorted(sources) for column, sources in columns.items()}
+            for model_name, columns in sorted(lineage.items())
+        }
+
+    def health(self) -> Dict:
+        state = self.state
+        return {
+            "manifest": self.manifest_path,
+            "nodes": len(state.analyzer.index),
+            "loaded_at": state.loaded_at,
+            "load_time": state.load_time,
+            "reloads": self.reloads,
+        }
+
+
+class LineageRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves JSON over GET: /lineage?model=, /matches?model=, /impact?node=&column=, /materialized
+    and /health.
+    """
+
+    def do_GET(self):
+        service: LineageService = self.server.service
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        model_name = query.get("model", [None])[0]
+
+        if url.path == "/health":
+            return self._send_json(200, service.health())
+        if url.path == "/materialized":
+            return self._send_json(200, service.materialized())
+        if url.path == "/impact":
+            node_name = query.get("node", [None])[0]
+            column_name = query.get("column", [None])[0]
+            if not node_name or not column_name:
+                return self._send_json(400, {"error": "Missing node or column parameter"})
+            result = service.impact(node_name, column_name)
+            if result is None:
+                return self._send_json(404, {"error": f"Node '{node_name}' not found in manifest"})
+            return self._send_json(200, result)
+        if url.path in ("/lineage", "/matches"):
+            if not model_name:
+                return self._send_json(400, {"error": "Missing model parameter"})
+            result = service.lineage(model_name) if url.path == "/lineage" else service.matches(model_name)
+            if result is None:
+                return self._send_json(404, {"error": f"Model '{model_name}' not found in manifest"})
+            return self._send_json(200, result)
+        return self._send_json(404, {"error": f"Unknown endpoint '{url.path}'"})
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(service: LineageService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), LineageRequestHandler)
+    server.service = service
+    return server
+
+
+def serve(service: LineageService, host: str = "127.0.0.1", port: int = 8765, poll_interval: float = 2.0) -> None:
+    """
+    Serves lineage queries until interrupted, reloading the project whenever the manifest changes.
+    """
+    server = make_server(service, host, port)
+    service.watch(poll_interval)
+    print(f"Serving lineage on http://{host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
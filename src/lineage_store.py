@@ -0,0 +1,262 @@
+import json
+import os
+import sqlite3
+from typing import Dict, List, Set, Tuple
+from src.lineage_cache import dump_analysis, restore_entry
+from src.manifest_loader import project_node
+from src.model_analyzer import ModelAnalyzer
+
+# Bump whenever the schema of exported stores changes
+STORE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE nodes (
+    name TEXT PRIMARY KEY,
+    resource_type TEXT,
+    materialized TEXT,
+    node TEXT NOT NULL
+);
+CREATE TABLE columns (
+    node TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (node, column_name)
+);
+CREATE TABLE edges (
+    node TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    parent_node TEXT NOT NULL,
+    parent_column TEXT NOT NULL
+);
+CREATE TABLE base_sources (
+    node TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    source_node TEXT NOT NULL,
+    source_column TEXT NOT NULL
+);
+CREATE TABLE matches (
+    report_model TEXT NOT NULL,
+    materialized_model TEXT NOT NULL,
+    matched_columns INTEGER NOT NULL,
+    total_columns INTEGER NOT NULL,
+    matching_columns TEXT NOT NULL
+);
+CREATE TABLE analyses (
+    node TEXT PRIMARY KEY,
+    rendered_sql TEXT NOT NULL,
+    column_lineage TEXT NOT NULL,
+    transformations TEXT NOT NULL
+);
+CREATE INDEX edges_by_target ON edges (node, column_name);
+CREATE INDEX edges_by_source ON edges (parent_node, parent_column);
+CREATE INDEX base_sources_by_target ON base_sources (node, column_name);
+CREATE INDEX base_sources_by_source ON base_sources (source_node, source_column);
+CREATE INDEX matches_by_report ON matches (report_model);
+CREATE INDEX matches_by_materialized ON matches (materialized_model);
+"""
+
+
+def _column_edges(analyzer: ModelAnalyzer, node_id: int) -> List[Tuple[str, str, str, str]]:
+    # The direct derivation edges of a node's declared columns, as the tracer expands them
+    index = analyzer.index
+    node_name = index.node_name(node_id)
+    edges = []
+    for column_id in index.records[node_id].columns:
+        _, successors = analyzer.lineage_tracer._expand((node_id, column_id))
+        for parent_id, parent_column in dict.fromkeys(successors):
+            edges.append((node_name, index.column_name(column_id), index.node_name(parent_id), index.column_name(parent_column)))
+    return edges
+
+
+def export_lineage_store(analyzer: ModelAnalyzer, path: str) -> Dict[str, int]:
+    """
+    Writes the column-level lineage graph of an analyzer to a SQLite database: nodes and
+    their columns, direct column edges, base source columns, the matches of every model that
+    is not materialized, and the parse results load_lineage_store needs for a warm start.
+    Returns the number of rows written per table.
+    """
+    tracer = analyzer.lineage_tracer
+    index = analyzer.index
+    tracer.precompute_lineage()
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    counts = {}
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", str(STORE_VERSION)), ("options", json.dumps(tracer.lineage_options(), sort_keys=True))],
+        )
+
+        rows: Dict[str, List[Tuple]] = {"nodes": [], "columns": [], "edges": [], "base_sources": [], "matches": [], "analyses": []}
+        for node_name, node in analyzer.nodes.items():
+            rows["nodes"].append((
+                node_name,
+                node.get("resource_type"),
+                node.get("config", {}).get("materialized"),
+                json.dumps(project_node(node)),
+            ))
+            node_id = index.node_id(node_name)
+            for position, column_id in enumerate(index.records[node_id].columns):
+                rows["columns"].append((node_name, index.column_name(column_id), position))
+            rows["edges"].extend(_column_edges(analyzer, node_id))
+            for column, sources in tracer.get_base_level_lineage(node_name).items():
+                rows["base_sources"].extend((node_name, column, owner, source_column) for owner, source_column in sorted(sources))
+            analysis = dump_analysis(tracer, node_name)
+            if analysis is not None:
+                rows["analyses"].append((
+                    node_name,
+                    analysis["rendered_sql"],
+                    json.dumps(analysis["column_lineage"]),
+                    json.dumps(analysis["transformations"]),
+                ))
+            if node.get("resource_type") == "model" and node_name not in analyzer.materialized_models:
+                total_columns = len(index.records[node_id].columns)
+                for match in analyzer.analyze_model_matches(node_name):
+                    rows["matches"].append((
+                        node_name,
+                        match["materialized_model"],
+                        len(match["matching_columns"]),
+                        total_columns,
+                        json.dumps(match["matching_columns"]),
+                    ))
+
+        for table, table_rows in rows.items():
+            if table_rows:
+                placeholders = ", ".join("?" * len(table_rows[0]))
+                connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})", table_rows)
+            counts[table] = len(table_rows)
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+    return counts
+
+
+class LineageStore:
+    """
+    Read access to an exported lineage store. Every lookup is an indexed query, so answering
+    one question does not require loading the manifest or tracing anything.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Lineage store not found: {path}")
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        version = self.meta("version")
+        if version != str(STORE_VERSION):
+            self.connection.close()
+            raise ValueError(f"Unsupported lineage store version {version} in {path}")
+
+    def meta(self, key: str):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def options(self) -> Dict:
+        return json.loads(self.meta("options"))
+
+    def nodes(self) -> Dict[str, Dict]:
+        """
+        Returns the reduced manifest nodes the store was exported from, in manifest order.
+        """
+        return {name: json.loads(node) for name, node in self.connection.execute("SELECT name, node FROM nodes ORDER BY rowid")}
+
+    def base_lineage(self, node_name: str) -> Dict[str, Set[Tuple[str, str]]]:
+        """
+        Returns the same mapping as ColumnLineageTracer.get_base_level_lineage.
+        """
+        lineage: Dict[str, Set[Tuple[str, str]]] = {}
+        for column, source_node, source_column in self.connection.execute(
+            "SELECT column_name, source_node, source_column FROM base_sources WHERE node = ?", (node_name,)
+        ):
+            lineage.setdefault(column, set()).add((source_node, source_column))
+        return lineage
+
+    def materialized_lineage(self) -> Dict[str, Dict[str, Set[Tuple[str, str]]]]:
+        names = [
+            name for name, in self.connection.execute(
+                "SELECT name FROM nodes WHERE resource_type = 'model' AND materialized = 'table' ORDER BY rowid"
+            )
+        ]
+        return {name: self.base_lineage(name) for name in names}
+
+    def derived_columns(self, source_node: str, source_column: str) -> List[Tuple[str, str]]:
+        """
+        Returns every (node, column) whose base lineage includes the given source column.
+        """
+        return self.connection.execute(
+            "SELECT node, column_name FROM base_sources WHERE source_node = ? AND source_column = ? ORDER BY node, column_name",
+            (source_node, source_column),
+        ).fetchall()
+
+    def parents(self, node_name: str, column_name: str) -> List[Tuple[str, str]]:
+        return self.connection.execute(
+            "SELECT parent_node, parent_column FROM edges WHERE node = ? AND column_name = ?", (node_name, column_name)
+        ).fetchall()
+
+    def children(self, node_name: str, column_name: str) -> List[Tuple[str, str]]:
+        return self.connection.execute(
+            "SELECT node, column_name FROM edges WHERE parent_node = ? AND parent_column = ?", (node_name, column_name)
+        ).fetchall()
+
+    def matches(self, report_model: str) -> List[Dict]:
+        """
+        Returns the same matches as ModelAnalyzer.analyze_model_matches, best first.
+        """
+        rows = self.connection.execute(
+            "SELECT materialized_model, matched_columns, total_columns, matching_columns FROM matches "
+            "WHERE report_model = ? ORDER BY rowid",
+            (report_model,),
+        )
+        return [
+            {
+                "report_model": report_model,
+                "materialized_model": materialized_model,
+                "match_score": f"{matched} out of {total}",
+                "matching_columns": [tuple(pair) for pair in json.loads(matching_columns)],
+            }
+            for materialized_model, matched, total, matching_columns in rows
+        ]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def load_lineage_store(path: str, source_data: Dict = None, nodes: Dict = None, **analyzer_options) -> ModelAnalyzer:
+    """
+    Rebuilds an analyzer from an exported store, with parse results and resolved lineage
+    already in place. Lineage exported with different tracing options is not restored.
+    nodes, when already read with LineageStore.nodes, saves reading them again.
+    """
+    store = LineageStore(path)
+    try:
+        connection = store.connection
+        if nodes is None:
+            nodes = store.nodes()
+        analyzer = ModelAnalyzer(nodes, source_data, {"nodes": nodes, "sources": {}}, **analyzer_options)
+        tracer = analyzer.lineage_tracer
+        same_options = store.options() == json.loads(json.dumps(tracer.lineage_options(), sort_keys=True))
+
+        entries: Dict[str, Dict] = {name: {} for name in nodes}
+        for name, rendered_sql, column_lineage, transformations in connection.execute("SELECT * FROM analyses"):
+            entries[name]["analysis"] = {
+                "rendered_sql": rendered_sql,
+                "column_lineage": json.loads(column_lineage),
+                "transformations": json.loads(transformations),
+            }
+        if same_options:
+            # Columns without base lineage were resolved too, so they are restored as empty
+            for name, column in connection.execute("SELECT node, column_name FROM columns"):
+                entries[name].setdefault("lineage", {})[column] = []
+            for name, column, source_node, source_column in connection.execute("SELECT * FROM base_sources"):
+                entries[name]["lineage"][column].append((source_node, source_column))
+        for name, entry in entries.items():
+            restore_entry(tracer, name, entry)
+    finally:
+        store.close()
+    return analyzer
@@ -0,0 +1,287 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.dag import build_child_map
+from src.lineage_cache import dump_analysis, node_fingerprint, restore_entry
+from src.manifest_loader import project_node
+from src.model_analyzer import ModelAnalyzer
+
+# Bump whenever the layout of saved lineage states changes
+STATE_VERSION = 1
+
+
+def node_signature(node: Dict) -> Tuple:
+    """
+    The parts of a node whose change can change its lineage or matches: its SQL checksum
+    and columns (via node_fingerprint), its dependencies and its materialization.
+    """
+    return (
+        node_fingerprint(node),
+        tuple(node.get("depends_on", {}).get("nodes", [])),
+        node.get("config", {}).get("materialized"),
+    )
+
+
+class ManifestDiff:
+    """
+    Nodes added, removed and modified between two manifests.
+    """
+
+    def __init__(self, added: List[str], removed: List[str], modified: List[str]):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {"added": self.added, "removed": self.removed, "modified": self.modified}
+
+
+def diff_manifests(old_nodes: Dict, new_nodes: Dict) -> ManifestDiff:
+    added = [node_name for node_name in new_nodes if node_name not in old_nodes]
+    removed = [node_name for node_name in old_nodes if node_name not in new_nodes]
+    modified = [
+        node_name for node_name, node in new_nodes.items()
+        if node_name in old_nodes and node_signature(node) != node_signature(old_nodes[node_name])
+    ]
+    return ManifestDiff(added, removed, modified)
+
+
+def affected_nodes(diff: ManifestDiff, old_nodes: Dict, new_nodes: Dict) -> Set[str]:
+    """
+    Returns the new nodes whose lineage may differ: added and modified nodes, nodes that
+    depended on a removed node, and everything downstream of those in the new manifest.
+    """
+    removed = set(diff.removed)
+    pending = list(diff.added) + list(diff.modified)
+    pending += [
+        node_name for node_name, node in new_nodes.items()
+        if removed.intersection(node.get("depends_on", {}).get("nodes", []))
+    ]
+    children = build_child_map(new_nodes)
+    affected: Set[str] = set()
+    while pending:
+        node_name = pending.pop()
+        if node_name in affected:
+            continue
+        affected.add(node_name)
+        pending.extend(children[node_name])
+    return affected
+
+
+def save_lineage_state(analyzer: ModelAnalyzer, path: str) -> None:
+    """
+    Writes the reduced nodes, parse results and fully resolved lineage of an analyzer to one
+    JSON file, which load_lineage_state turns back into a warm analyzer.
+    """
+    tracer = analyzer.lineage_tracer
+    tracer.precompute_lineage()
+    state = {
+        "version": STATE_VERSION,
+        "options": tracer.lineage_options(),
+        "nodes": {node_name: project_node(node) for node_name, node in analyzer.nodes.items()},
+        "entries": {},
+    }
+    for node_name in analyzer.nodes:
+        lineage = tracer.get_base_level_lineage(node_name)
+        entry = {"lineage": {column: sorted(sources) for column, sources in lineage.items()}}
+        analysis = dump_analysis(tracer, node_name)
+        if analysis is not None:
+            entry["analysis"] = analysis
+        state["entries"][node_name] = entry
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+
+def load_lineage_state(path: str, source_data: Dict = None, **analyzer_options) -> ModelAnalyzer:
+    """
+    Rebuilds an analyzer from a saved lineage state, with its parse results and lineage
+    already in place. Lineage saved with different tracing options is not restored.
+    """
+    with open(path, "r") as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION:
+        raise ValueError(f"Unsupported lineage state version {state.get('version')} in {path}")
+
+    nodes = state["nodes"]
+    analyzer = ModelAnalyzer(nodes, source_data, {"nodes": nodes, "sources": {}}, **analyzer_options)
+    tracer = analyzer.lineage_tracer
+    same_options = state.get("options") == tracer.lineage_options()
+    for node_name, entry in state["entries"].items():
+        restore_entry(tracer, node_name, entry if same_options else {"analysis": entry.get("analysis")})
+    return analyzer
+
+
+def incremental_analyzer(
+    old: ModelAnalyzer,
+    new_nodes: Dict,
+    source_data: Dict = None,
+    manifest: Dict = None,
+    warm_materialized: bool = False,
+    **analyzer_options,
+) -> Tuple[ModelAnalyzer, ManifestDiff, Set[str]]:
+    """
+    Builds an analyzer for a new manifest that reuses the old analyzer's work: parse results
+    of every node whose SQL is unchanged and the lineage of every node outside the affected
+    downstream closure. The old lineage of the affected nodes (and, with warm_materialized,
+    of the materialized models) is resolved first, so the ancestors it pulls in are carried
+    over too. Only affected nodes are traced again, and only when queried.
+    """
+    diff = diff_manifests(old.nodes, new_nodes)
+    affected = affected_nodes(diff, old.nodes, new_nodes)
+    if manifest is None:
+        manifest = {"nodes": new_nodes, "sources": {}}
+    new = ModelAnalyzer(new_nodes, source_data if source_data is not None else old.source_data, manifest, **analyzer_options)
+
+    old_tracer = old.lineage_tracer
+    new_tracer = new.lineage_tracer
+    for node_name in affected:
+        node_id = old.index.node_id(node_name)
+        if node_id is not None:
+            old_tracer.get_column_lineage_ids(node_id)
+    if warm_materialized:
+        for node_id in old.materialized_model_ids:
+            old_tracer.get_column_lineage_ids(node_id)
+
+    changed_sql = set(diff.added) | set(diff.modified)
+    reuse_lineage = old_tracer.lineage_options() == new_tracer.lineage_options()
+    for node_name in new_nodes:
+        if node_name not in old.nodes:
+            continue
+        entry = {}
+        if reuse_lineage and node_name not in affected:
+            entry["lineage"] = _memoized_lineage(old, node_name)
+        restore_entry(new_tracer, node_name, entry)
+        if node_name not in changed_sql:
+            analysis = old_tracer.analysis_cache.peek(node_name)
+            if analysis is not None:
+                new_tracer.analysis_cache.put(node_name, analysis)
+    return new, diff, affected
+
+
+def _memoized_lineage(analyzer: ModelAnalyzer, node_name: str) -> Dict[str, Set[Tuple[str, str]]]:
+    # Only pairs already resolved are carried over, so reuse never triggers tracing
+    index = analyzer.index
+    node_id = index.node_id(node_name)
+    lineage = {}
+    for column_id in index.records[node_id].columns:
+        resolved = analyzer.lineage_tracer._lineage_memo.get((node_id, column_id))
+        if resolved is not None:
+            lineage[index.column_name(column_id)] = index.base_column_names(resolved)
+    return lineage
+
+
+def _lineage_of(analyzer: ModelAnalyzer, node_name: str) -> Optional[Dict[str, Set[Tuple[str, str]]]]:
+    if node_name not in analyzer.index:
+        return None
+    return analyzer.lineage_tracer.get_base_level_lineage(node_name)
+
+
+def lineage_delta(old: ModelAnalyzer, new: ModelAnalyzer, node_names: Iterable[str]) -> List[Dict]:
+    """
+    Compares the base lineage of the given nodes before and after, listing per changed column
+    the base columns it gained and lost. Nodes whose lineage is unchanged are left out.
+    """
+    deltas = []
+    for node_name in sorted(node_names):
+        before = _lineage_of(old, node_name)
+        after = _lineage_of(new, node_name)
+        if before == after:
+            continue
+        status = "added" if before is None else "removed" if after is None else "modified"
+        before, after = before or {}, after or {}
+        columns = {}
+        for column in list(before) + [column for column in after if column not in before]:
+            gained = after.get(column, set()) - before.get(column, set())
+            lost = before.get(column, set()) - after.get(column, set())
+            if gained or lost:
+                columns[column] = {"added": sorted(gained), "removed": sorted(lost)}
+        deltas.append({"node": node_name, "status": status, "columns": columns})
+    return deltas
+
+
+def match_delta(old: ModelAnalyzer, new: ModelAnalyzer, report_models: Iterable[str]) -> List[Dict]:
+    """
+    Compares the materialized-model matches of each report model before and after, listing
+    matches that appeared, disappeared or changed score. Unchanged reports are left out.
+    """
+    deltas = []
+    for report_model in report_models:
+        before = {match["materialized_model"]: match for match in old.analyze_model_matches(report_model)}
+        after = {match["materialized_model"]: match for match in new.analyze_model_matches(report_model)}
+        changed = [
+            {
+                "materialized_model": model_name,
+                "old_score": before[model_name]["match_score"],
+                "new_score": after[model_name]["match_score"],
+            }
+            for model_name in after
+            if model_name in before and before[model_name] != after[model_name]
+        ]
+        added = [after[model_name] for model_name in after if model_name not in before]
+        removed = [before[model_name] for model_name in before if model_name not in after]
+        if added or removed or changed:
+            deltas.append({"report_model": report_model, "added": added, "removed": removed, "changed": changed})
+    return deltas
+
+
+def changed_reports(old: ModelAnalyzer, new: ModelAnalyzer, changed: Set[str]) -> List[str]:
+    """
+    Returns the report models whose matches may differ between the two analyzers: the changed
+    ones, and, when a materialized model was changed, added, removed or (un)materialized, every
+    report sharing a base column with its old or new lineage. Those reports are outside the
+    changed closure, but the materialized columns they match against are not. They are found
+    through the reverse lineage of those base columns, so only nodes downstream of the
+    materialized models' sources are traced.
+    """
+    def is_report(node_name: str) -> bool:
+        node = new.nodes.get(node_name)
+        return node is not None and node.get("resource_type") == "model" and node_name not in new.materialized_models
+
+    reports = {node_name for node_name in changed if is_report(node_name)}
+    touched = changed & (old.materialized_models | new.materialized_models)
+    base_columns = set()
+    for node_name in touched:
+        for analyzer in (old, new):
+            for lineage in (_lineage_of(analyzer, node_name) or {}).values():
+                base_columns.update(lineage)
+    for owner, column_name in base_columns:
+        if owner not in new.index:
+            # A source removed from the manifest: its dependents already count as changed
+            continue
+        impact = new.analyze_impact(owner, column_name)
+        reports.update(node_name for node_name, _ in impact["columns"] if is_report(node_name))
+    return sorted(reports)
+
+
+def incremental_report(
+    old: ModelAnalyzer,
+    new_nodes: Dict,
+    source_data: Dict = None,
+    manifest: Dict = None,
+    report_models: Iterable[str] = None,
+    **analyzer_options,
+) -> Tuple[ModelAnalyzer, Dict]:
+    """
+    Diffs a new manifest against an analyzed old one and returns the new analyzer with the
+    lineage and match deltas. Without explicit report models, matches are compared for every
+    model that is not materialized and whose matches may have changed (see changed_reports).
+    """
+    new, diff, affected = incremental_analyzer(
+        old, new_nodes, source_data, manifest, warm_materialized=True, **analyzer_options
+    )
+    if report_models is None:
+        report_models = changed_reports(old, new, affected | set(diff.removed))
+    report_models = [node_name for node_name in report_models if node_name in old.index and node_name in new.index]
+    report = {
+        "diff": diff.as_dict(),
+        "affected": sorted(affected),
+        "lineage": lineage_delta(old, new, affected | set(diff.removed)),
+        "matches": match_delta(old, new, report_models),
+    }
+    return new, report
@@ -0,0 +1,176 @@
+import sys
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+class NodeRecord:
+    """
+    Compact view of a manifest node. Columns and neighbours are stored as integer IDs.
+    """
+
+    __slots__ = (
+        "node_id",
+        "name",
+        "resource_type",
+        "materialized",
+        "raw_code",
+        "compiled_code",
+        "columns",
+        "column_set",
+        "parents",
+        "children",
+        "token_index",
+    )
+
+    def __init__(
+        self,
+        node_id: int,
+        name: str,
+        resource_type: str,
+        materialized: Optional[str],
+        raw_code: Optional[str],
+        compiled_code: Optional[str] = None,
+    ):
+        self.node_id = node_id
+        self.name = name
+        self.resource_type = resource_type
+        self.materialized = materialized
+        self.raw_code = raw_code
+        self.compiled_code = compiled_code
+        self.columns: Tuple[int, ...] = ()
+        self.column_set: FrozenSet[int] = frozenset()
+        self.parents: Tuple[int, ...] = ()
+        self.children: Tuple[int, ...] = ()
+        # Built on first use by ManifestIndex.token_index
+        self.token_index: Optional[Dict[str, Tuple[int, ...]]] = None
+
+
+class ManifestIndex:
+    """
+    Integer-keyed index over the manifest nodes. Node names, column names and base source
+    columns are interned once and referred to by ID everywhere else, and the parent/child
+    adjacency of depends_on.nodes is precomputed.
+    """
+
+    def __init__(self, nodes: Dict):
+        self.nodes = nodes
+        self.records: List[NodeRecord] = []
+        self._node_ids: Dict[str, int] = {}
+        self.column_names: List[str] = []
+        self._column_ids: Dict[str, int] = {}
+        self._column_tokens: Dict[int, FrozenSet[str]] = {}
+        self.base_columns: List[Tuple[str, str]] = []
+        self._base_column_ids: Dict[Tuple[str, str], int] = {}
+
+        for node_name, node in nodes.items():
+            node_name = sys.intern(node_name)
+            record = NodeRecord(
+                len(self.records),
+                node_name,
+                node.get("resource_type"),
+                node.get("config", {}).get("materialized"),
+                node.get("raw_code"),
+                node.get("compiled_code"),
+            )
+            record.columns = tuple(self.column_id(column) for column in node.get("columns", {}))
+            record.column_set = frozenset(record.columns)
+            self._node_ids[node_name] = record.node_id
+            self.records.append(record)
+
+        children: List[List[int]] = [[] for _ in self.records]
+        for record in self.records:
+            parents = []
+            for dep_name in nodes[record.name].get("depends_on", {}).get("nodes", []):
+                parent_id = self._node_ids.get(dep_name)
+                if parent_id is not None and parent_id not in parents:
+                    parents.append(parent_id)
+                    children[parent_id].append(record.node_id)
+            record.parents = tuple(parents)
+        for record, node_children in zip(self.records, children):
+            record.children = tuple(node_children)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, node_name: str) -> bool:
+        return node_name in self._node_ids
+
+    def node_id(self, node_name: str) -> Optional[int]:
+        return self._node_ids.get(node_name)
+
+    def record(self, node_name: str) -> Optional[NodeRecord]:
+        node_id = self._node_ids.get(node_name)
+        return None if node_id is None else self.records[node_id]
+
+    def node_name(self, node_id: int) -> str:
+        return self.records[node_id].name
+
+    def column_id(self, column_name: str) -> int:
+        """
+        Returns the ID of a column name, interning it on first sight.
+        """
+        column_id = self._column_ids.get(column_name)
+        if column_id is None:
+            column_id = len(self.column_names)
+            column_name = sys.intern(column_name)
+            self._column_ids[column_name] = column_id
+            self.column_names.append(column_name)
+        return column_id
+
+    def find_column_id(self, column_name: str) -> Optional[int]:
+        return self._column_ids.get(column_name)
+
+    def column_name(self, column_id: int) -> str:
+        return self.column_names[column_id]
+
+    def column_tokens(self, column_id: int) -> FrozenSet[str]:
+        """
+        Returns the lowercase underscore-separated parts of a column name, split once per column.
+        """
+        tokens = self._column_tokens.get(column_id)
+        if tokens is None:
+            tokens = frozenset(self.column_names[column_id].lower().split("_"))
+            self._column_tokens[column_id] = tokens
+        return tokens
+
+    def token_index(self, node_id: int) -> Dict[str, Tuple[int, ...]]:
+        """
+        Maps each name part of a node's columns to the positions of the columns containing it,
+        in declaration order. Built once per node on first use.
+        """
+        record = self.records[node_id]
+        if record.token_index is None:
+            positions: Dict[str, List[int]] = {}
+            for position, column_id in enumerate(record.columns):
+                for token in self.column_tokens(column_id):
+                    positions.setdefault(token, []).append(position)
+            record.token_index = {token: tuple(found) for token, found in positions.items()}
+        return record.token_index
+
+    def base_column_id(self, owner: str, column_name: str) -> int:
+        """
+        Returns the ID of a base source column, identified by its source node or YAML group and name.
+        """
+        key = (owner, column_name)
+        base_id = self._base_column_ids.get(key)
+        if base_id is None:
+            base_id = len(self.base_columns)
+            key = (sys.intern(owner), sys.intern(column_name))
+            self._base_column_ids[key] = base_id
+            self.base_columns.append(key)
+        return base_id
+
+    def find_base_column_id(self, owner: str, column_name: str) -> Optional[int]:
+        return self._base_column_ids.get((owner, column_name))
+
+    def base_column(self, base_id: int) -> Tuple[str, str]:
+        return self.base_columns[base_id]
+
+    def base_column_names(self, base_ids: Iterable[int]) -> Set[Tuple[str, str]]:
+        base_columns = self.base_columns
+        return {base_columns[base_id] for base_id in base_ids}
+
+    def materialized_model_ids(self) -> List[int]:
+        return [
+            record.node_id for record in self.records
+            if record.resource_type == "model" and record.materialized == "table"
+        ]
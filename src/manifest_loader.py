@@ -1,13 +1,220 @@
 import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Collection, Dict, Iterator, Optional, TextIO, Tuple
+from src.profiling import profiler
+
+# Resource types the analyzer traces through, everything else (tests, analyses, ...) is dropped
+NODE_RESOURCE_TYPES = {"model", "source", "seed", "snapshot"}
+NODE_FIELDS = ("resource_type", "raw_code", "compiled_code", "checksum", "compiled_name", "tags")
+SOURCE_FIELDS = ("resource_type", "compiled_name")
+# Fields of the dependency skeleton read by a first planning pass over the manifest
+SKELETON_FIELDS = ("resource_type",)
 
 def load_manifest(manifest_path: str) -> dict:
     """
     Load the DBT manifest.json file and return its contents.
     """
     try:
-        with open(manifest_path, 'r') as f:
+        with profiler.stage("manifest_load"), open(manifest_path, 'r') as f:
             manifest_data = json.load(f)
+            profiler.count("manifest_nodes", len(manifest_data.get("nodes", {})))
             return manifest_data
     except Exception as e:
-        print(f"Error loading manifest file: {e}")
-        return {}
\ No newline at end of file
+        print(f"Error loading manifest file: {e}", file=sys.stderr)
+        return {}
+
+
+class ManifestLoadStats:
+    """
+    Timing and memory figures collected while streaming a manifest.
+    """
+
+    __slots__ = ("elapsed", "peak_memory", "nodes_kept", "nodes_skipped")
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self.peak_memory: Optional[int] = None
+        self.nodes_kept = 0
+        self.nodes_skipped = 0
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _JsonStream:
+    """
+    Reads a JSON document incrementally, decoding one value at a time from a sliding buffer.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        # Drop the consumed prefix, then grow geometrically so large values decode in amortised linear time
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer)))
+        if not chunk:
+            self._eof = True
+        self._buffer += chunk
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos:self._pos + 1]
+            self._fill()
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' in manifest but found '{found}'")
+        self._pos += 1
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A value ending exactly at the buffer boundary may be a truncated number
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        Yields the keys of the object at the current position. The caller must consume each
+        value (with decode or skip) before asking for the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def skip(self) -> None:
+        # Objects are skipped entry by entry so only one entry is ever held in memory
+        if self.peek() == "{":
+            for _ in self.iter_object():
+                self.skip()
+        else:
+            self.decode()
+
+
+def manifest_signature(manifest_path: str) -> Tuple[int, int]:
+    """
+    Identifies a version of a manifest file by its modification time and size.
+    """
+    stat = os.stat(manifest_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def project_node(node: Dict, fields: Tuple[str, ...] = NODE_FIELDS) -> Dict:
+    """
+    Reduces a manifest node to the given fields plus the column names, dependencies and
+    materialization the analyzer reads.
+    """
+    projected = {field: node[field] for field in fields if field in node}
+    projected["columns"] = {column: {} for column in node.get("columns", {})}
+    if "depends_on" in node:
+        projected["depends_on"] = {"nodes": node["depends_on"].get("nodes", [])}
+    materialized = node.get("config", {}).get("materialized")
+    if materialized is not None:
+        projected["config"] = {"materialized": materialized}
+    return projected
+
+
+def stream_manifest(
+    f: TextIO,
+    stats: ManifestLoadStats = None,
+    chunk_size: int = 1 << 20,
+    fields: Tuple[str, ...] = NODE_FIELDS,
+    keep: Optional[Collection[str]] = None,
+) -> Dict[str, Dict]:
+    """
+    Incrementally parses a manifest from an open file, keeping only the nodes and fields
+    the analyzer reads. Top-level sections other than nodes and sources are skipped. With
+    keep, nodes and sources not named in it are dropped as soon as they are read.
+    """
+    stats = stats if stats is not None else ManifestLoadStats()
+    stream = _JsonStream(f, chunk_size)
+    manifest = {"nodes": {}, "sources": {}}
+
+    for section in stream.iter_object():
+        if section == "nodes":
+            for node_name in stream.iter_object():
+                node = stream.decode()
+                if keep is not None and node_name not in keep:
+                    stats.nodes_skipped += 1
+                    continue
+                if node.get("resource_type") in NODE_RESOURCE_TYPES:
+                    manifest["nodes"][node_name] = project_node(node, fields)
+                    stats.nodes_kept += 1
+                else:
+                    stats.nodes_skipped += 1
+        elif section == "sources":
+            for source_name in stream.iter_object():
+                source = stream.decode()
+                if keep is None or source_name in keep:
+                    manifest["sources"][source_name] = project_node(source, SOURCE_FIELDS)
+        else:
+            stream.skip()
+
+    return manifest
+
+
+def load_manifest_streaming(
+    manifest_path: str,
+    stats: ManifestLoadStats = None,
+    trace_memory: bool = False,
+    fields: Tuple[str, ...] = NODE_FIELDS,
+    keep: Optional[Collection[str]] = None,
+) -> dict:
+    """
+    Streams the DBT manifest.json file, returning the same shape as load_manifest but reduced
+    to the nodes and fields used by the analyzer (or to the given fields and kept nodes).
+    Load time and, when trace_memory is set, the peak Python memory allocated while loading
+    are recorded on stats.
+    """
+    stats = stats if stats is not None else ManifestLoadStats()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    try:
+        with profiler.stage("manifest_load"), open(manifest_path, 'r') as f:
+            manifest = stream_manifest(f, stats, fields=fields, keep=keep)
+            profiler.count("manifest_nodes", stats.nodes_kept)
+            profiler.count("manifest_nodes_skipped", stats.nodes_skipped)
+            return manifest
+    except Exception as e:
+        print(f"Error loading manifest file: {e}", file=sys.stderr)
+        return {}
+    finally:
+        stats.elapsed = time.perf_counter() - start
+        if trace_memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
@@ -1,62 +1,217 @@
-from typing import Dict, List
-from src.column_lineage import ColumnLineageTracer
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from src.column_lineage import DEFAULT_RENAME_FANOUT, ColumnLineageTracer
+from src.impact_analysis import ImpactIndex
+from src.lineage_bitsets import LineageBitsets
+from src.lineage_budget import LineageBudget
+from src.lineage_cache import LineageCache
+from src.manifest_index import ManifestIndex
+from src.profiling import profiler
+
+# How analyze_model_matches finds materialized columns sharing lineage with a report column
+MATCH_STRATEGIES = ("index", "bitset")
 
 class ModelAnalyzer:
-    def __init__(self, nodes: Dict, source_data: Dict = None, manifest: Dict = None):
+    def __init__(
+        self,
+        nodes: Dict,
+        source_data: Dict = None,
+        manifest: Dict = None,
+        precompute: bool = False,
+        cache: LineageCache = None,
+        jobs: int = 1,
+        jinja_cache_dir: str = None,
+        rename_fanout: Optional[int] = DEFAULT_RENAME_FANOUT,
+        match_strategy: str = "index",
+        use_compiled_code: bool = True,
+        index: ManifestIndex = None,
+    ):
+        if match_strategy not in MATCH_STRATEGIES:
+            raise ValueError(f"Unknown match strategy '{match_strategy}', expected one of {', '.join(MATCH_STRATEGIES)}")
         self.nodes = nodes
         self.source_data = source_data if source_data else {}
-        self.lineage_tracer = ColumnLineageTracer(nodes, self.source_data, manifest)
-        self.materialized_models = set(
-            node_name for node_name, node in nodes.items()
-            if node.get('resource_type') == 'model' and node.get('config', {}).get('materialized') == 'table'
+        self.index = index if index is not None else ManifestIndex(nodes)
+        self.lineage_tracer = ColumnLineageTracer(
+            nodes,
+            self.source_data,
+            manifest,
+            cache=cache,
+            index=self.index,
+            jinja_cache_dir=jinja_cache_dir,
+            rename_fanout=rename_fanout,
+            use_compiled_code=use_compiled_code,
         )
+        self.materialized_model_ids = self.index.materialized_model_ids()
+        self.materialized_models = set(self.index.node_name(node_id) for node_id in self.materialized_model_ids)
+        self.match_strategy = match_strategy
+        self._materialized_index: Optional[Dict[int, List[Tuple[int, int, int]]]] = None
+        self._materialized_columns: List[Tuple[int, int, int]] = []
+        self._materialized_bitsets: Optional[LineageBitsets] = None
+        self._impact_index: Optional[ImpactIndex] = None
+        if jobs > 1:
+            self.lineage_tracer.analyze_nodes(jobs)
+        if precompute:
+            self.lineage_tracer.precompute_lineage()
 
-    def get_materialized_model_lineage(self) -> Dict[str, Dict]:
+    def get_materialized_model_lineage(self, budget: Optional[LineageBudget] = None) -> Dict[str, Dict]:
         """
-        Returns a mapping of materialized models and their column source lineages.
+        Returns a mapping of materialized models and their column source lineages. One budget
+        covers all of them; once it runs out the remaining lineages are partial or empty.
         """
         model_lineages = {}
         for model_name in self.materialized_models:
-            base_lineage = self.lineage_tracer.get_base_level_lineage(model_name)
+            base_lineage = self.lineage_tracer.get_base_level_lineage(model_name, budget)
             model_lineages[model_name] = base_lineage
         return model_lineages
 
-    def analyze_model_matches(self, report_model_name: str) -> List[Dict]:
+    def analyze_impact(self, source_node: str, column_name: str) -> Dict:
         """
-        Compares a report model's column lineages with materialized models and scores matches.
+        Returns the downstream (model, column) pairs derived from a source column and the
+        materialized models among them, from a reverse lineage index built on first use.
         """
-        report_node = self.nodes.get(report_model_name)
-        if not report_node:
-            return []  # Return empty list if report model doesn't exist
+        if self._impact_index is None:
+            self._impact_index = ImpactIndex(self.lineage_tracer, self.index)
+        return self._impact_index.impact(source_node, column_name)
 
-        report_columns = report_node.get('columns', {})
-        column_lineages = self.lineage_tracer.get_base_level_lineage(report_model_name)
+    def _materialized_lineage_ids(self, budget: Optional[LineageBudget] = None) -> Tuple[List[Tuple[int, Dict[int, FrozenSet[int]]]], Set[int]]:
+        """
+        Returns the column lineages of every materialized model, and the models whose lineage
+        the budget cut short: their trace was cut, or reused lineage that was itself partial.
+        """
+        lineages = []
+        truncated = set()
+        for materialized_id in self.materialized_model_ids:
+            cut_pairs = budget.cut_pairs if budget is not None else 0
+            lineages.append((materialized_id, self.lineage_tracer.get_column_lineage_ids(materialized_id, budget)))
+            if budget is not None and (
+                budget.cut_pairs > cut_pairs
+                or any((materialized_id, column_id) in budget.partial for column_id in self.index.records[materialized_id].columns)
+            ):
+                truncated.add(materialized_id)
+        return lineages, truncated
 
-        matches = []
-        for materialized_model in self.materialized_models:
-            if materialized_model == report_model_name:
-                continue
+    def _build_materialized_index(
+        self, budget: Optional[LineageBudget] = None
+    ) -> Tuple[Dict[int, List[Tuple[int, int, int]]], Set[int]]:
+        """
+        Inverts the lineage of every materialized model: each base source column ID maps to the
+        (materialized model, column position, column ID) entries derived from it. The position
+        is the column's rank within its model and decides which match wins on ties. Also
+        returns the materialized models whose lineage the budget truncated.
+        """
+        inverted = defaultdict(list)
+        with profiler.stage("materialized_index"):
+            lineages, truncated = self._materialized_lineage_ids(budget)
+            for materialized_id, materialized_lineages in lineages:
+                for position, (mat_column, mat_lineage) in enumerate(materialized_lineages.items()):
+                    for base_id in mat_lineage:
+                        inverted[base_id].append((materialized_id, position, mat_column))
+        return inverted, truncated
 
-            match_count = 0
-            total_columns = len(report_columns)
-            matching_columns = []
+    def _build_materialized_bitsets(
+        self, budget: Optional[LineageBudget] = None
+    ) -> Tuple[LineageBitsets, List[Tuple[int, int, int]], Set[int]]:
+        """
+        Encodes the lineage of every materialized column as a bitset over the base column IDs.
+        Columns are stored in materialized model order, then column position, so overlapping
+        positions come back in the order the index strategy ranks them. Also returns those
+        columns and the materialized models whose lineage the budget truncated.
+        """
+        columns = []
+        bitset_lineages = []
+        with profiler.stage("materialized_index"):
+            lineages, truncated = self._materialized_lineage_ids(budget)
+            for materialized_id, materialized_lineages in lineages:
+                for position, (mat_column, mat_lineage) in enumerate(materialized_lineages.items()):
+                    columns.append((materialized_id, position, mat_column))
+                    bitset_lineages.append(mat_lineage)
+            bitsets = LineageBitsets(bitset_lineages, len(self.index.base_columns))
+        return bitsets, columns, truncated
 
-            materialized_lineages = self.lineage_tracer.get_base_level_lineage(materialized_model)
+    def _candidate_columns(
+        self, lineages: List[Iterable[int]], budget: Optional[LineageBudget] = None
+    ) -> Tuple[List[Iterable[Tuple[int, int, int]]], Set[int]]:
+        """
+        Returns, for each report column lineage, the (materialized model, position, column ID)
+        entries of the materialized columns sharing at least one base column with it, and the
+        materialized models whose lineage the budget truncated. Materialized lineage is traced
+        under the budget; an index built on truncated lineage serves only this query, so the
+        next one traces those models again under its own budget.
+        """
+        truncated: Set[int] = set()
+        if self.match_strategy == "bitset":
+            bitsets, columns = self._materialized_bitsets, self._materialized_columns
+            if bitsets is None:
+                bitsets, columns, truncated = self._build_materialized_bitsets(budget)
+                if not truncated:
+                    self._materialized_bitsets, self._materialized_columns = bitsets, columns
+            return [
+                [columns[position] for position in overlapping]
+                for overlapping in bitsets.overlapping(lineages)
+            ], truncated
+
+        inverted = self._materialized_index
+        if inverted is None:
+            inverted, truncated = self._build_materialized_index(budget)
+            if not truncated:
+                self._materialized_index = inverted
+        return [chain.from_iterable(inverted.get(base_id, ()) for base_id in lineage) for lineage in lineages], truncated
+
+    def analyze_model_matches(self, report_model_name: str, budget: Optional[LineageBudget] = None) -> List[Dict]:
+        """
+        Compares a report model's column lineages with materialized models and scores matches.
+        Candidates come from an inverted index over base source columns, or from batched
+        bitset overlaps with the "bitset" strategy, so only materialized models sharing
+        lineage with the report are ever scored. The comparison runs on column and base
+        lineage IDs, names are only resolved for the output. A budget limits tracing of the
+        report model and of materialized models not traced yet; matches against a materialized
+        model whose lineage was truncated are flagged, and any match may be incomplete once the
+        budget reports truncation.
+        """
+        report_id = self.index.node_id(report_model_name)
+        if report_id is None:
+            return []  # Return empty list if report model doesn't exist
+
+        column_name = self.index.column_name
+        total_columns = len(self.index.records[report_id].columns)
+        column_lineages = self.lineage_tracer.get_column_lineage_ids(report_id, budget)
+        candidate_columns, truncated = self._candidate_columns(list(column_lineages.values()), budget)
 
-            for column, lineage in column_lineages.items():
-                for mat_column, mat_lineage in materialized_lineages.items():
-                    if lineage.intersection(mat_lineage) and self._is_column_match(column, mat_column):
-                        match_count += 1
-                        matching_columns.append((column, mat_column))
-                        break
+        with profiler.stage("match"):
+            matching_columns_by_model = defaultdict(list)
+            for column, candidates in zip(column_lineages, candidate_columns):
+                # For each materialized model keep the first of its columns that shares lineage and matches by name
+                best = {}
+                name_matches = {}
+                seen = 0
+                for materialized_id, position, mat_column in candidates:
+                    seen += 1
+                    current = best.get(materialized_id)
+                    if materialized_id == report_id or (current is not None and current[0] <= position):
+                        continue
+                    if mat_column not in name_matches:
+                        name_matches[mat_column] = self._is_column_match(column_name(column), column_name(mat_column))
+                    if name_matches[mat_column]:
+                        best[materialized_id] = (position, mat_column)
+                profiler.count("match_candidates", seen)
 
-            if match_count > 0:
-                matches.append({
+                for materialized_id, (_, mat_column) in best.items():
+                    matching_columns_by_model[materialized_id].append((column_name(column), column_name(mat_column)))
+
+        matches = []
+        for materialized_id in self.materialized_model_ids:
+            matching_columns = matching_columns_by_model.get(materialized_id)
+            if matching_columns:
+                match = {
                     'report_model': report_model_name,
-                    'materialized_model': materialized_model,
-                    'match_score': f"{match_count} out of {total_columns}",
+                    'materialized_model': self.index.node_name(materialized_id),
+                    'match_score': f"{len(matching_columns)} out of {total_columns}",
                     'matching_columns': matching_columns
-                })
+                }
+                if materialized_id in truncated:
+                    match['truncated'] = True
+                matches.append(match)
 
         return sorted(matches, key=lambda x: int(x['match_score'].split()[0]), reverse=True)
 
@@ -0,0 +1,260 @@
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from src.profiling import profiler
+
+if TYPE_CHECKING:
+    # sqlglot and Jinja2 are only imported once a node actually has to be rendered or parsed
+    from src.sql_parser import SqlParser
+    from src.sql_preprocessor import SqlRenderer
+
+
+class NodeAnalysis:
+    """
+    The rendered SQL of a node together with everything the lineage tracer extracts from it.
+    """
+
+    __slots__ = ("rendered_sql", "column_lineage", "transformations")
+
+    def __init__(
+        self,
+        rendered_sql: str,
+        column_lineage: Dict[str, Dict[str, List[str]]],
+        transformations: Dict[str, List[Dict[str, str]]],
+    ):
+        self.rendered_sql = rendered_sql
+        self.column_lineage = column_lineage
+        self.transformations = transformations
+
+
+# Renderer used inside pool workers, built once per worker by the pool initializer
+_worker_renderer: Optional["SqlRenderer"] = None
+
+
+def _rendering_manifest(manifest: Optional[Dict]) -> Optional[Dict]:
+    """
+    Reduces a manifest to the compiled names ref() and source() resolve to, which is all
+    rendering needs, so workers do not receive the whole manifest.
+    """
+    if manifest is None:
+        return None
+    reduced = {}
+    for section in ("nodes", "sources"):
+        if section in manifest:
+            reduced[section] = {
+                name: {"compiled_name": entry["compiled_name"]}
+                for name, entry in manifest[section].items()
+                if "compiled_name" in entry
+            }
+    return reduced
+
+
+def node_sql(renderer: "SqlRenderer", raw_sql: str, compiled_sql: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Returns the SQL to parse for a node and the path that produced it: dbt's compiled_code
+    when the manifest carries it, otherwise raw_code rendered through the placeholder Jinja
+    environment.
+    """
+    if compiled_sql:
+        return compiled_sql, "compiled"
+    return renderer.render(raw_sql), "rendered"
+
+
+def _init_worker(manifest: Optional[Dict], bytecode_cache_dir: Optional[str]) -> None:
+    from src.sql_preprocessor import SqlRenderer
+    global _worker_renderer
+    _worker_renderer = SqlRenderer(manifest, bytecode_cache_dir=bytecode_cache_dir)
+
+
+def analyze_rendered_sql(rendered_sql: str, sql_parser: "SqlParser" = None) -> NodeAnalysis:
+    """
+    Parses rendered SQL once and keeps the parts of the fused analysis lineage tracing reads.
+    """
+    if sql_parser is None:
+        from src.sql_parser import SqlParser
+        sql_parser = SqlParser()
+    analysis = sql_parser.analyze(rendered_sql)
+    return NodeAnalysis(
+        rendered_sql,
+        # Plain dicts pickle smaller than the parser's nested defaultdicts
+        {column: dict(entry) for column, entry in analysis.column_lineage.items()},
+        analysis.transformations,
+    )
+
+
+def _analyze_in_worker(item: Tuple[str, str, Optional[str]]) -> Tuple[str, tuple, Optional[str], str, float, float]:
+    node_name, raw_sql, compiled_sql = item
+    start = time.perf_counter()
+    rendered_sql, path = node_sql(_worker_renderer, raw_sql, compiled_sql)
+    rendered = time.perf_counter()
+    error = None
+    try:
+        analysis = analyze_rendered_sql(rendered_sql)
+        result = (analysis.rendered_sql, analysis.column_lineage, analysis.transformations)
+    except Exception as e:
+        # Reported and recorded by the parent, like a failure on the serial path
+        error = str(e)
+        result = (rendered_sql, {}, {})
+    parsed = time.perf_counter()
+    return node_name, result, error, path, rendered - start, parsed - rendered
+
+
+class NodeAnalysisCache:
+    """
+    Renders and parses the SQL of each node once per run. The parsed tree is shared by
+    both extraction passes and the result is reused by every column traced through the node.
+    With use_compiled_code, nodes carrying dbt's compiled_code skip Jinja rendering.
+    SQL that fails to parse is reported once and analyzed as empty, so its columns are
+    traced by name through the node's parents and the run goes on.
+    """
+
+    def __init__(
+        self,
+        manifest: Dict,
+        sql_parser: "SqlParser" = None,
+        bytecode_cache_dir: str = None,
+        use_compiled_code: bool = True,
+    ):
+        self.manifest = manifest
+        self.use_compiled_code = use_compiled_code
+        self.bytecode_cache_dir = bytecode_cache_dir
+        # Built on the first cache miss, so runs answered from cached results never load them
+        self._sql_parser = sql_parser
+        self._renderer: Optional["SqlRenderer"] = None
+        self._entries: Dict[str, NodeAnalysis] = {}
+        # Empty analyses of nodes whose SQL failed to parse, never persisted so the next run reports them again
+        self._failed: Dict[str, NodeAnalysis] = {}
+        self.hits = 0
+        self.misses = 0
+        # Nodes whose SQL came from compiled_code and from rendering raw_code
+        self.compiled = 0
+        self.rendered = 0
+        # Wall time spent rendering and parsing, including time spent inside pool workers
+        self.render_time = 0.0
+        self.parse_time = 0.0
+
+    @property
+    def sql_parser(self) -> "SqlParser":
+        if self._sql_parser is None:
+            from src.sql_parser import SqlParser
+            self._sql_parser = SqlParser()
+        return self._sql_parser
+
+    @property
+    def renderer(self) -> "SqlRenderer":
+        if self._renderer is None:
+            from src.sql_preprocessor import SqlRenderer
+            self._renderer = SqlRenderer(self.manifest, bytecode_cache_dir=self.bytecode_cache_dir)
+        return self._renderer
+
+    def _compiled_sql(self, raw_sql: Optional[str], compiled_sql: Optional[str]) -> Optional[str]:
+        # Without raw_code there is nothing to render, so compiled_code is used regardless
+        return compiled_sql if self.use_compiled_code or not raw_sql else None
+
+    def _count_path(self, path: str) -> None:
+        if path == "compiled":
+            self.compiled += 1
+            profiler.count("nodes_compiled_code")
+        else:
+            self.rendered += 1
+            profiler.count("nodes_rendered")
+
+    def _record_failure(self, node_name: str, rendered_sql: str, error: str) -> NodeAnalysis:
+        profiler.count("parse_failures")
+        print(f"Error parsing SQL of {node_name}: {error}", file=sys.stderr)
+        analysis = NodeAnalysis(rendered_sql, {}, {})
+        self._failed[node_name] = analysis
+        return analysis
+
+    def get(self, node_name: str, raw_sql: str, compiled_sql: Optional[str] = None) -> NodeAnalysis:
+        analysis = self._entries.get(node_name) or self._failed.get(node_name)
+        if analysis is not None:
+            self.hits += 1
+            profiler.count("analysis_cache_hits")
+            return analysis
+
+        self.misses += 1
+        start = time.perf_counter()
+        rendered_sql, path = node_sql(self.renderer, raw_sql, self._compiled_sql(raw_sql, compiled_sql))
+        self._count_path(path)
+        rendered = time.perf_counter()
+        self.render_time += rendered - start
+        profiler.record_stage("render", rendered - start)
+        try:
+            analysis = analyze_rendered_sql(rendered_sql, self.sql_parser)
+        except Exception as e:
+            return self._record_failure(node_name, rendered_sql, str(e))
+        finally:
+            finished = time.perf_counter()
+            self.parse_time += finished - rendered
+            profiler.record_stage("parse", finished - rendered)
+            profiler.record_node(node_name, finished - start)
+        profiler.count("nodes_parsed")
+        self._entries[node_name] = analysis
+        return analysis
+
+    def analyze_many(self, items: Iterable[Tuple[str, str, Optional[str]]], jobs: int) -> int:
+        """
+        Renders and parses (node name, raw SQL, compiled SQL) items across a pool of worker
+        processes and stores the results, skipping nodes already cached. Returns the number
+        of nodes analyzed.
+        """
+        pending = [
+            (node_name, raw_sql, self._compiled_sql(raw_sql, compiled_sql))
+            for node_name, raw_sql, compiled_sql in items
+            if node_name not in self._entries and node_name not in self._failed
+        ]
+        if not pending:
+            return 0
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        analyzed = 0
+        chunksize = max(1, len(pending) // (jobs * 4))
+        with profiler.stage("parallel_analysis"), ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(_rendering_manifest(self.manifest), self.bytecode_cache_dir),
+        ) as executor:
+            for node_name, result, error, path, render_time, parse_time in executor.map(
+                _analyze_in_worker, pending, chunksize=chunksize
+            ):
+                self._count_path(path)
+                self.render_time += render_time
+                self.parse_time += parse_time
+                # Worker time is summed across processes, so it is kept apart from wall-clock stages
+                profiler.record_stage("worker_render", render_time)
+                profiler.record_stage("worker_parse", parse_time)
+                profiler.record_node(node_name, render_time + parse_time)
+                self.misses += 1
+                analyzed += 1
+                if error is None:
+                    self._entries[node_name] = NodeAnalysis(*result)
+                    profiler.count("nodes_parsed")
+                else:
+                    self._record_failure(node_name, result[0], error)
+        return analyzed
+
+    def peek(self, node_name: str) -> Optional[NodeAnalysis]:
+        """
+        Returns the cached analysis of a node without rendering it or counting a lookup.
+        """
+        return self._entries.get(node_name)
+
+    def put(self, node_name: str, analysis: NodeAnalysis) -> None:
+        self._entries[node_name] = analysis
+
+    def __contains__(self, node_name: str) -> bool:
+        return node_name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        stats = {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+        stats["compiled"] = self.compiled
+        stats["rendered"] = self.rendered
+        stats["render_time"] = self.render_time
+        stats["parse_time"] = self.parse_time
+        stats["failures"] = len(self._failed)
+        return stats
@@ -0,0 +1,127 @@
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class _NullStage:
+    """
+    Context manager handed out while profiling is disabled, so instrumented code pays
+    for one method call and nothing else.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Collects wall time per stage, counters and per-node timings across the analyzer.
+    Disabled by default; stage() and count() are then effectively free.
+    Stage times are inclusive, so a stage that calls another also contains its time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.stage_time: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.node_time: Dict[str, float] = defaultdict(float)
+        self.started = time.perf_counter()
+
+    def enable(self, trace_memory: bool = False) -> None:
+        self.reset()
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            self.stage_calls[name] += 1
+            self.stage_time[name] += seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += amount
+
+    def record_node(self, node_name: str, seconds: float) -> None:
+        if self.enabled:
+            self.node_time[node_name] += seconds
+
+    def peak_memory(self) -> Dict[str, int]:
+        memory = {}
+        if self.trace_memory and tracemalloc.is_tracing():
+            memory["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux reports kilobytes, macOS bytes
+            memory["peak_rss_bytes"] = max_rss if sys.platform == "darwin" else max_rss * 1024
+        return memory
+
+    def report(self, top_nodes: int = 0) -> Dict:
+        stages = {
+            name: {"calls": self.stage_calls[name], "seconds": self.stage_time[name]}
+            for name in sorted(self.stage_time, key=self.stage_time.get, reverse=True)
+        }
+        report = {
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": stages,
+            "counters": dict(sorted(self.counters.items())),
+            "memory": self.peak_memory(),
+        }
+        if top_nodes:
+            slowest: List = sorted(self.node_time.items(), key=lambda item: item[1], reverse=True)
+            report["slowest_nodes"] = [
+                {"node": node_name, "seconds": seconds} for node_name, seconds in slowest[:top_nodes]
+            ]
+        return report
+
+
+# Shared by every module so one flag turns instrumentation on for the whole run
+profiler = Profiler()
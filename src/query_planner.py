@@ -0,0 +1,104 @@
+from typing import Dict, Iterable, List, Set, Tuple
+from src.dag import build_child_map, build_parent_map
+from src.manifest_loader import SKELETON_FIELDS, ManifestLoadStats, load_manifest_streaming
+from src.profiling import profiler
+
+
+def upstream_closure(nodes: Dict, roots: Iterable[str]) -> Set[str]:
+    """
+    Returns the given nodes and every node they depend on directly or transitively.
+    """
+    parents = build_parent_map(nodes)
+    closure: Set[str] = set()
+    pending = [root for root in roots if root in nodes]
+    while pending:
+        node_name = pending.pop()
+        if node_name not in closure:
+            closure.add(node_name)
+            pending.extend(parents[node_name])
+    return closure
+
+
+class QueryPlan:
+    """
+    The subgraph a set of report models needs: their upstream closure, the materialized
+    models sharing ancestry with it, and those models' own upstream closures.
+    """
+
+    def __init__(
+        self,
+        report_models: List[str],
+        upstream: Set[str],
+        materialized: List[str],
+        nodes: Set[str],
+        sources: Set[str],
+        total_nodes: int,
+    ):
+        self.report_models = report_models
+        self.upstream = upstream
+        self.materialized = materialized
+        self.nodes = nodes
+        # Entries of the manifest's sources section the planned nodes depend on, needed for rendering
+        self.sources = sources
+        self.total_nodes = total_nodes
+
+    def as_dict(self) -> Dict:
+        return {
+            "report_models": self.report_models,
+            "upstream_nodes": len(self.upstream),
+            "materialized_models": self.materialized,
+            "planned_nodes": len(self.nodes),
+            "total_nodes": self.total_nodes,
+        }
+
+
+def plan_report_subgraph(nodes: Dict, report_models: Iterable[str]) -> QueryPlan:
+    """
+    Plans the nodes to load for the given report models from a dependency skeleton. A
+    materialized model's closure intersects the reports' upstream closure exactly when it
+    is downstream of some node in it, so those models are found by walking children. Any
+    materialized model sharing base lineage with a report shares a source with it, so the
+    plan keeps every match while leaving out unrelated parts of the project.
+    """
+    report_models = [node_name for node_name in report_models if node_name in nodes]
+    upstream = upstream_closure(nodes, report_models)
+
+    children = build_child_map(nodes)
+    downstream = set(upstream)
+    pending = list(upstream)
+    while pending:
+        for child in children[pending.pop()]:
+            if child not in downstream:
+                downstream.add(child)
+                pending.append(child)
+    materialized = [
+        node_name for node_name, node in nodes.items()
+        if node_name in downstream
+        and node.get("resource_type") == "model"
+        and node.get("config", {}).get("materialized") == "table"
+    ]
+    planned = upstream | upstream_closure(nodes, materialized)
+    sources = {
+        dep_name for node_name in planned
+        for dep_name in nodes[node_name].get("depends_on", {}).get("nodes", [])
+        if dep_name not in nodes
+    }
+    return QueryPlan(report_models, upstream, materialized, planned, sources, len(nodes))
+
+
+def load_report_subgraph(
+    manifest_path: str, report_models: Iterable[str], stats: ManifestLoadStats = None, trace_memory: bool = False
+) -> Tuple[Dict, QueryPlan]:
+    """
+    Loads only the part of a manifest the given report models need, in two streaming passes:
+    the first reads the dependency skeleton of every node and plans the subgraph, the second
+    projects the planned nodes and drops every other node as soon as it is read.
+    """
+    with profiler.stage("plan"):
+        skeleton = load_manifest_streaming(manifest_path, fields=SKELETON_FIELDS)
+        plan = plan_report_subgraph(skeleton.get("nodes", {}), report_models)
+        del skeleton
+    manifest = load_manifest_streaming(manifest_path, stats, trace_memory, keep=plan.nodes | plan.sources)
+    profiler.count("planned_nodes", len(plan.nodes))
+    return manifest, plan
+
@@ -0,0 +1,88 @@
+import os
+import pickle
+from typing import Dict, Optional
+from src.manifest_loader import manifest_signature
+from src.model_analyzer import ModelAnalyzer
+
+# Bump whenever the layout of snapshots or of the pickled index changes
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(analyzer: ModelAnalyzer, path: str, manifest_path: str = None) -> int:
+    """
+    Pickles the indexed state of an analyzer: its reduced manifest, the interned manifest
+    index, every resolved (node, column) lineage and every parse result. Unlike the JSON
+    lineage state nothing is rebuilt on load, so a snapshot loads in milliseconds. With a
+    manifest_path, the snapshot records which version of that file it was built from.
+    Returns the number of lineage pairs saved.
+    """
+    tracer = analyzer.lineage_tracer
+    analyses = {}
+    for node_name in analyzer.nodes:
+        analysis = tracer.analysis_cache.peek(node_name)
+        if analysis is not None:
+            analyses[node_name] = analysis
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "manifest_signature": manifest_signature(manifest_path) if manifest_path else None,
+        "options": tracer.lineage_options(),
+        "manifest": tracer.manifest,
+        "nodes": analyzer.nodes,
+        "index": analyzer.index,
+        "lineage": tracer._lineage_memo,
+        "analyses": analyses,
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return len(tracer._lineage_memo)
+
+
+def read_snapshot(path: str, manifest_path: str = None) -> Optional[Dict]:
+    """
+    Reads a snapshot, or returns None when there is no usable one: it is missing, unreadable,
+    from another version, or (with a manifest_path) built from a different version of the manifest.
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if manifest_path is not None:
+        try:
+            if snapshot["manifest_signature"] != manifest_signature(manifest_path):
+                return None
+        except OSError:
+            return None
+    return snapshot
+
+
+def analyzer_from_snapshot(snapshot: Dict, source_data: Dict = None, **analyzer_options) -> ModelAnalyzer:
+    """
+    Rebuilds an analyzer from a snapshot with its index, lineage and parse results in place.
+    Lineage resolved with different tracing options is not restored.
+    """
+    analyzer = ModelAnalyzer(
+        snapshot["nodes"], source_data, snapshot["manifest"], index=snapshot["index"], **analyzer_options
+    )
+    tracer = analyzer.lineage_tracer
+    for node_name, analysis in snapshot["analyses"].items():
+        tracer.analysis_cache.put(node_name, analysis)
+    if snapshot["options"] == tracer.lineage_options():
+        tracer._lineage_memo.update(snapshot["lineage"])
+    return analyzer
+
+
+def load_snapshot(
+    path: str, source_data: Dict = None, manifest_path: str = None, **analyzer_options
+) -> Optional[ModelAnalyzer]:
+    """
+    Rebuilds an analyzer from a snapshot file, or returns None when there is no usable one.
+    """
+    snapshot = read_snapshot(path, manifest_path)
+    if snapshot is None:
+        return None
+    return analyzer_from_snapshot(snapshot, source_data, **analyzer_options)
@@ -1,42 +1,105 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 from collections import defaultdict
 import sqlglot
 from sqlglot import exp
+from src.profiling import profiler
+
+class SqlAnalysis:
+    """
+    Everything SqlParser extracts from one statement, collected from a single parse.
+    """
+
+    __slots__ = ("tables", "joins", "transformations", "column_lineage", "diagnostics")
+
+    def __init__(
+        self,
+        tables: List[str],
+        joins: List[tuple],
+        transformations: Dict[str, List[Dict[str, str]]],
+        column_lineage: Dict[str, Dict[str, List[str]]],
+        diagnostics: Optional[List[Dict[str, str]]] = None,
+    ):
+        self.tables = tables
+        self.joins = joins
+        self.transformations = transformations
+        self.column_lineage = column_lineage
+        self.diagnostics = diagnostics if diagnostics is not None else []
+
 
 class SqlParser:
     @staticmethod
-    def extract_table_references(sql: str) -> List[str]:
-        parsed = sqlglot.parse_one(sql)
-        tables = [str(table) for table in parsed.find_all(exp.Table)]
-        return tables
+    def parse(sql: str) -> exp.Expression:
+        profiler.count("sql_parses")
+        return sqlglot.parse_one(sql)
 
     @staticmethod
-    def parse_joins(sql: str) -> List[tuple]:
-        parsed = sqlglot.parse_one(sql)
-        joins = []
-        for join in parsed.find_all(exp.Join):
-            join_type = join.args.get('side', 'INNER').upper()
-            joined_table = str(join.args['this'])
-            join_condition = str(join.args.get('on', None))
-            joins.append((f"{join_type} JOIN", joined_table, join_condition))
-        return joins
+    def _ensure_parsed(sql: Union[str, exp.Expression]) -> exp.Expression:
+        # Callers holding an already parsed tree can pass it in to avoid a re-parse
+        if isinstance(sql, exp.Expression):
+            return sql
+        profiler.count("sql_parses")
+        return sqlglot.parse_one(sql)
 
     @staticmethod
-    def extract_transformations(sql: str) -> Dict[str, List[Dict[str, str]]]:
-        parsed = sqlglot.parse_one(sql)
-        transformations = defaultdict(list)
+    def analyze(sql: Union[str, exp.Expression], diagnostics: bool = False) -> SqlAnalysis:
+        """
+        Parses a statement once and collects its tables, joins and equality lineage in one
+        walk over the tree, and its transformations from the select list. With diagnostics,
+        function arguments that are neither columns nor functions are recorded on the result.
+        """
+        parsed = SqlParser._ensure_parsed(sql)
+        tables = []
+        joins = []
+        lineage = defaultdict(lambda: defaultdict(list))
+
+        # Breadth-first, matching the order find_all reported them in
+        for node in parsed.walk(bfs=True):
+            if isinstance(node, exp.Table):
+                tables.append(str(node))
+            elif isinstance(node, exp.Join):
+                join_type = node.args.get('side', 'INNER').upper()
+                joined_table = str(node.args['this'])
+                join_condition = str(node.args.get('on', None))
+                joins.append((f"{join_type} JOIN", joined_table, join_condition))
+            elif isinstance(node, exp.EQ):
+                left = str(node.args['this'])
+                right = str(node.args['expression'])
+                if '.' in right:
+                    lineage[left]['sources'].append(right)
+                elif '.' in left:
+                    lineage[right]['derived'].append(left)
+                else:
+                    lineage[left]['sources'].append(right)
+                    lineage[right]['derived'].append(left)
 
-        # Traverse the parsed SQL expression tree
+        transformations = defaultdict(list)
+        found = [] if diagnostics else None
         for expr in parsed.expressions:
-            SqlParser._process_expression(expr, transformations)
+            SqlParser._process_expression(expr, transformations, found)
 
-        return dict(transformations)
+        return SqlAnalysis(tables, joins, dict(transformations), dict(lineage), found)
 
     @staticmethod
-    def _process_expression(expr, transformations):
+    def extract_table_references(sql: Union[str, exp.Expression]) -> List[str]:
+        return SqlParser.analyze(sql).tables
+
+    @staticmethod
+    def parse_joins(sql: Union[str, exp.Expression]) -> List[tuple]:
+        return SqlParser.analyze(sql).joins
+
+    @staticmethod
+    def extract_transformations(sql: Union[str, exp.Expression]) -> Dict[str, List[Dict[str, str]]]:
+        return SqlParser.analyze(sql).transformations
+
+    @staticmethod
+    def analyze_column_lineage(sql: Union[str, exp.Expression]) -> Dict[str, Dict[str, List[str]]]:
+        return SqlParser.analyze(sql).column_lineage
+
+    @staticmethod
+    def _process_expression(expr, transformations, diagnostics=None):
         if isinstance(expr, exp.Func):
             # Directly process SQL functions like CONCAT, UPPER, etc.
-            SqlParser._process_function(expr, transformations)
+            SqlParser._process_function(expr, transformations, diagnostics)
         elif isinstance(expr, exp.Binary):
             # Handle binary operations like age + 1
             SqlParser._process_operation(expr, transformations)
@@ -49,7 +112,7 @@ class SqlParser:
                 'original': original,
                 'alias': alias
             })
-            SqlParser._process_expression(expr.args['this'], transformations)
+            SqlParser._process_expression(expr.args['this'], transformations, diagnostics)
         elif isinstance(expr, exp.Column):
             # Handle columns directly
             column = str(expr)
@@ -60,7 +123,7 @@ class SqlParser:
                 })
 
     @staticmethod
-    def _process_function(func, transformations):
+    def _process_function(func, transformations, diagnostics=None):
         function_name = func.key.upper()
         alias = str(func.parent.args['alias']) if isinstance(func.parent, exp.Alias) else None
 
@@ -69,9 +132,9 @@ class SqlParser:
             if isinstance(arg, list):
                 # If the argument is a list (like in CONCAT), process each element
                 for sub_arg in arg:
-                    SqlParser._process_function_argument(sub_arg, function_name, alias, transformations)
+                    SqlParser._process_function_argument(sub_arg, function_name, alias, transformations, diagnostics)
             else:
-                SqlParser._process_function_argument(arg, function_name, alias, transformations)
+                SqlParser._process_function_argument(arg, function_name, alias, transformations, diagnostics)
 
         # Handle the alias of the function, if it exists
         if alias:
@@ -83,7 +146,7 @@ class SqlParser:
             })
 
     @staticmethod
-    def _process_function_argument(arg, function_name, alias, transformations):
+    def _process_function_argument(arg, function_name, alias, transformations, diagnostics=None):
         # Handle column arguments within a function
         if isinstance(arg, exp.Column):
             column = str(arg)
@@ -95,12 +158,16 @@ class SqlParser:
             })
         elif isinstance(arg, exp.Func):
             # If the argument itself is a function, recursively process the function
-            SqlParser._process_function(arg, transformations)
+            SqlParser._process_function(arg, transformations, diagnostics)
         else:
-            # Process non-column arguments (e.g., constants or literals)
-            print(f"Found non-column argument: {arg}")  # Diagnostic for non-column arguments
-
-
+            # Non-column arguments (e.g. constants or literals) are only recorded when asked for
+            profiler.count("non_column_arguments")
+            if diagnostics is not None:
+                diagnostics.append({
+                    'type': 'non_column_argument',
+                    'function': function_name,
+                    'argument': str(arg)
+                })
 
     @staticmethod
     def _process_operation(op, transformations):
@@ -113,21 +180,3 @@ class SqlParser:
             'right_operand': right,
             'alias': str(op.parent.args['alias']) if isinstance(op.parent, exp.Alias) else left
         })
-
-
-    @staticmethod
-    def analyze_column_lineage(sql: str) -> Dict[str, Dict[str, List[str]]]:
-        parsed = sqlglot.parse_one(sql)
-        lineage = defaultdict(lambda: defaultdict(list))
-        for expr in parsed.find_all(exp.Expression):
-            if isinstance(expr, exp.EQ):
-                left = str(expr.args['this'])
-                right = str(expr.args['expression'])
-                if '.' in right:
-                    lineage[left]['sources'].append(right)
-                elif '.' in left:
-                    lineage[right]['derived'].append(left)
-                else:
-                    lineage[left]['sources'].append(right)
-                    lineage[right]['derived'].append(left)
-        return dict(lineage)
@@ -1,6 +1,12 @@
-from jinja2 import Environment, Undefined, nodes
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache, Undefined, nodes
 from jinja2.visitor import NodeTransformer
+from typing import Dict, Optional
+import hashlib
+import os
 import re
+import sys
+import time
+from src.profiling import profiler
 
 class IgnoreUndefined(Undefined):
     def __str__(self):
@@ -29,26 +35,108 @@ class CustomEnvironment(Environment):
         transformer = ConfigMacroAndSetRemover()
         return transformer.visit(parsed)
 
+class SqlTemplateLoader(BaseLoader):
+    """
+    Serves model SQL to the environment under the hash of its text, so Jinja's own template
+    LRU and bytecode cache key compiled templates by content.
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, str] = {}
+        self.loads = 0
+
+    def get_source(self, environment, template):
+        self.loads += 1
+        profiler.count("template_compiles")
+        return self.pending[template], None, lambda: True
+
+
+class SqlRenderer:
+    """
+    Long-lived rendering environment for one manifest. The environment, its globals and the
+    ref/source lookup tables are built once, and compiled templates are kept in an LRU keyed
+    by a hash of the raw SQL, optionally backed by an on-disk Jinja bytecode cache.
+    """
+
+    def __init__(self, manifest: Optional[Dict], template_cache_size: int = 400, bytecode_cache_dir: str = None):
+        self.manifest = manifest
+        manifest = manifest if manifest else {}
+
+        # dbt node keys look like model.<name> and source.<source>.<table>
+        self.ref_lookup = {
+            node_name[len('model.'):]: node['compiled_name']
+            for node_name, node in manifest.get('nodes', {}).items()
+            if node_name.startswith('model.') and 'compiled_name' in node
+        }
+        self.source_lookup = {}
+        for source_key, source_node in manifest.get('sources', {}).items():
+            parts = source_key.split('.', 2)
+            if len(parts) == 3 and 'compiled_name' in source_node:
+                self.source_lookup[(parts[1], parts[2])] = source_node['compiled_name']
+
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+        self.loader = SqlTemplateLoader()
+        self.env = CustomEnvironment(
+            loader=self.loader,
+            undefined=IgnoreUndefined,
+            cache_size=template_cache_size,
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache_dir else None,
+        )
+        self.env.globals['ref'] = self.ref
+        self.env.globals['source'] = self.source
+        self.env.globals['config'] = lambda *args, **kwargs: ''
+        self.env.globals['var'] = lambda *args, **kwargs: '"PLACEHOLDER_var"'
+        self.env.globals['macro'] = lambda *args, **kwargs: ''
+
+        self.renders = 0
+        self.render_time = 0.0
+
+    def ref(self, model_name):
+        return self.ref_lookup.get(model_name, model_name)
+
+    def source(self, source_name, table_name):
+        return self.source_lookup.get((source_name, table_name), f'{source_name}.{table_name}')
+
+    def render(self, sql: str) -> str:
+        start = time.perf_counter()
+        self.renders += 1
+        key = hashlib.sha1(sql.encode('utf-8')).hexdigest()
+        self.loader.pending[key] = sql
+        try:
+            return self.env.get_template(key).render()
+        except Exception as e:
+            profiler.count("render_errors")
+            print(f"Error processing SQL: {e}", file=sys.stderr)
+            return sql
+        finally:
+            del self.loader.pending[key]
+            self.render_time += time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        return {
+            "renders": self.renders,
+            "render_time": self.render_time,
+            "template_cache_hits": self.renders - self.loader.loads,
+            "template_cache_misses": self.loader.loads,
+        }
+
+
+_renderer: Optional[SqlRenderer] = None
+
+
+def get_renderer(manifest: Optional[Dict]) -> SqlRenderer:
+    """
+    Returns the shared renderer of a manifest, building a new one when the manifest changes.
+    """
+    global _renderer
+    if _renderer is None or _renderer.manifest is not manifest:
+        _renderer = SqlRenderer(manifest)
+    return _renderer
+
+
 def resolve_references(sql: str, manifest: dict):
-    def ref(model_name):
-        return manifest['nodes'].get(f'model.{model_name}', {}).get('compiled_name', model_name)
-
-    def source(source_name, table_name):
-        return manifest['sources'].get(f'source.{source_name}.{table_name}', {}).get('compiled_name', f'{source_name}.{table_name}')
-
-    env = CustomEnvironment(undefined=IgnoreUndefined)
-    env.globals['ref'] = ref
-    env.globals['source'] = source
-    env.globals['config'] = lambda *args, **kwargs: ''
-    env.globals['var'] = lambda *args, **kwargs: '"PLACEHOLDER_var"'
-    env.globals['macro'] = lambda *args, **kwargs: ''
-
-    try:
-        rendered_sql = env.from_string(sql).render()
-        return rendered_sql
-    except Exception as e:
-        print(f"Error processing SQL: {e}")
-        return sql
+    return get_renderer(manifest).render(sql)
 
 def preprocess_sql(raw_sql: str, manifest: dict) -> str:
-    return resolve_references(raw_sql, manifest)
\ No newline at end of file
+    return resolve_references(raw_sql, manifest)
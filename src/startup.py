@@ -0,0 +1,141 @@
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+from src.manifest_index import ManifestIndex
+from src.profiling import profiler
+from src.yml_processor import process_yaml_sources
+
+
+class StartupTimings:
+    """
+    Wall-clock seconds of each startup step and of the whole startup. Run back to back the
+    steps take their sum; when they overlap, the difference is what concurrency saved.
+    Steps sharing the CPU run slower than alone, so the saving is an upper bound.
+    """
+
+    __slots__ = ("manifest", "yaml", "index", "wall")
+
+    def __init__(self):
+        self.manifest = 0.0
+        self.yaml = 0.0
+        self.index = 0.0
+        self.wall = 0.0
+
+    @property
+    def sequential(self) -> float:
+        return self.manifest + self.yaml + self.index
+
+    @property
+    def saved(self) -> float:
+        return max(0.0, self.sequential - self.wall)
+
+    def as_dict(self) -> Dict[str, float]:
+        timings = {name: getattr(self, name) for name in self.__slots__}
+        timings["sequential"] = self.sequential
+        timings["saved"] = self.saved
+        return timings
+
+
+def _yaml_sources_in_worker(
+    yaml_path: str, jobs: int, cache_path: Optional[str], profile: bool
+) -> Tuple[Dict, Dict[str, int], float]:
+    # Runs in its own process so YAML parsing does not compete with manifest decoding for the GIL
+    if profile:
+        profiler.enable()
+    sources, elapsed = _timed(process_yaml_sources, yaml_path, jobs, cache_path)
+    return sources, dict(profiler.counters), elapsed
+
+
+def _timed(func: Callable, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+async def _load_concurrently(
+    load_manifest: Callable[[], Dict],
+    yaml_path: str,
+    jobs: int,
+    yaml_cache_path: Optional[str],
+    build_index: bool,
+) -> Tuple[Dict, Dict, Optional[ManifestIndex], StartupTimings]:
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    timings = StartupTimings()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1) as threads, ProcessPoolExecutor(max_workers=1) as processes:
+        # Timed inside the worker, so process startup counts towards the wall time only
+        yaml_future = loop.run_in_executor(
+            processes, _yaml_sources_in_worker, yaml_path, jobs, yaml_cache_path, profiler.enabled
+        )
+
+        async def manifest_then_index():
+            # The index only needs the manifest, so it is built while YAML is still being parsed
+            manifest, timings.manifest = await loop.run_in_executor(threads, _timed, load_manifest)
+            index = None
+            if build_index:
+                index, timings.index = await loop.run_in_executor(
+                    threads, _timed, ManifestIndex, manifest.get("nodes", {})
+                )
+            return manifest, index
+
+        (manifest, index), (source_data, counters, timings.yaml) = await asyncio.gather(
+            manifest_then_index(), yaml_future
+        )
+    timings.wall = time.perf_counter() - start
+
+    for name, amount in counters.items():
+        profiler.count(name, amount)
+    profiler.record_stage("startup_manifest", timings.manifest)
+    profiler.record_stage("yaml_discovery", timings.yaml)
+    profiler.record_stage("startup_index", timings.index)
+    profiler.record_stage("startup", timings.wall)
+    return manifest, source_data, index, timings
+
+
+def _load_serially(
+    load_manifest: Callable[[], Dict],
+    yaml_path: str,
+    jobs: int,
+    yaml_cache_path: Optional[str],
+    build_index: bool,
+) -> Tuple[Dict, Dict, Optional[ManifestIndex], StartupTimings]:
+    timings = StartupTimings()
+    manifest, timings.manifest = _timed(load_manifest)
+    source_data, timings.yaml = _timed(process_yaml_sources, yaml_path, jobs, yaml_cache_path)
+    index = None
+    if build_index:
+        index, timings.index = _timed(ManifestIndex, manifest.get("nodes", {}))
+    timings.wall = timings.sequential
+    profiler.record_stage("startup_manifest", timings.manifest)
+    profiler.record_stage("yaml_discovery", timings.yaml)
+    profiler.record_stage("startup_index", timings.index)
+    profiler.record_stage("startup", timings.wall)
+    return manifest, source_data, index, timings
+
+
+def load_startup_inputs(
+    load_manifest: Callable[[], Dict],
+    yaml_path: str,
+    jobs: int = 1,
+    yaml_cache_path: Optional[str] = None,
+    build_index: bool = True,
+    concurrent: Optional[bool] = None,
+) -> Tuple[Dict, Dict, Optional[ManifestIndex], StartupTimings]:
+    """
+    Loads the manifest and the YAML sources concurrently: the manifest is decoded on a
+    thread while the YAML directory is walked and parsed in a separate process, and the
+    manifest index is built as soon as the manifest is ready. Returns the manifest, the
+    source data, the index (None unless build_index) and the timings of each step.
+    By default the steps only overlap when there is more than one CPU to run them on.
+    """
+    if concurrent is None:
+        concurrent = (os.cpu_count() or 1) > 1
+    if not concurrent:
+        return _load_serially(load_manifest, yaml_path, jobs, yaml_cache_path, build_index)
+    # asyncio and the executors are only imported when the steps actually overlap
+    import asyncio
+
+    return asyncio.run(_load_concurrently(load_manifest, yaml_path, jobs, yaml_cache_path, build_index))
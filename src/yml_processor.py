@@ -1,9 +1,16 @@
-import yaml
+import hashlib
+import json
 import os
-from typing import Dict
+import sys
+from typing import Dict, List, Optional, Tuple
+from src.profiling import profiler
+
+YAML_CACHE_VERSION = 1
 
 
 def process_yaml_files(project_dir: str) -> Dict[str, Dict]:
+    import yaml
+
     yaml_data = {}
     for root, dirs, files in os.walk(project_dir):
         for file in files:
@@ -23,41 +30,140 @@ def merge_yaml_with_manifest(yaml_data: Dict, manifest_data: Dict) -> Dict:
     return merged_data
 
 
-def process_yaml_sources(yaml_path: str) -> dict:
+def _extract_sources(yaml_data) -> List[Tuple[str, str, List[str]]]:
     """
-    Parse YAML files from the given path and extract source table and column definitions.
+    Returns the (table, group, columns) entries of a parsed source definition file.
     """
-    sources = {}
+    extracted = []
+    # Check if it’s a valid source definition file
+    if isinstance(yaml_data, dict) and "sources" in yaml_data:
+        for source in yaml_data["sources"]:
+            group_name = source["name"]
+            for table in source.get("tables", []):
+                table_name = table["name"]
+                columns = [col["name"] for col in table.get("columns", [])]
+                extracted.append((table_name, group_name, columns))
+    return extracted
 
-    # Traverse the directory for YAML files
+
+def _parse_source_file(full_path: str) -> Tuple[str, Optional[List], Optional[str]]:
+    """
+    Parses one YAML file, returning its source entries or the YAML error message.
+    """
+    # Imported here so runs answered entirely from the YAML cache never load PyYAML
+    import yaml
+
+    # Prefer the libyaml-backed loader, which parses several times faster than the pure Python one
+    YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        with open(full_path, "rb") as f:
+            yaml_data = yaml.load(f, Loader=YamlLoader)
+    except yaml.YAMLError as exc:
+        return full_path, None, str(exc)
+    return full_path, _extract_sources(yaml_data), None
+
+
+def _find_yaml_files(yaml_path: str) -> List[str]:
+    paths = []
     for root, _, files in os.walk(yaml_path):
         for file in files:
             if file.endswith(".yml") or file.endswith(".yaml"):
-                full_path = os.path.join(root, file)
-                try:
-                    with open(full_path, "r") as f:
-                        yaml_data = yaml.safe_load(f)
-
-                        # Check if it’s a valid source definition file
-                        if "sources" in yaml_data:
-                            for source in yaml_data["sources"]:
-                                group_name = source["name"]
-                                for table in source.get("tables", []):
-                                    table_name = table["name"]
-                                    columns = [
-                                        col["name"] for col in table.get("columns", [])
-                                    ]
-
-                                    # Store the source table information
-                                    sources[table_name] = {
-                                        "group": group_name,
-                                        "columns": columns,
-                                    }
-
-                except yaml.YAMLError as exc:
-                    print(f"Error parsing YAML file: {full_path}")
-                    print(f"YAML error details: {exc}")
-                    # Optionally, continue to the next file, or stop execution based on your needs
-                    continue
+                paths.append(os.path.join(root, file))
+    return paths
+
+
+def _file_digest(full_path: str) -> str:
+    with open(full_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _load_yaml_cache(cache_path: Optional[str]) -> Dict[str, Dict]:
+    if not cache_path:
+        return {}
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cached.get("version") != YAML_CACHE_VERSION:
+        return {}
+    return cached.get("files", {})
+
+
+def _save_yaml_cache(cache_path: str, files: Dict[str, Dict]) -> None:
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({"version": YAML_CACHE_VERSION, "files": files}, f)
+    os.replace(temp_path, cache_path)
+
+
+def process_yaml_sources(yaml_path: str, jobs: int = 1, cache_path: str = None) -> dict:
+    """
+    Parse YAML files from the given path and extract source table and column definitions.
+    Files are parsed with the libyaml C loader when available and across `jobs` worker
+    processes. With a cache_path, files whose mtime and size (or failing that, content hash)
+    are unchanged since the last run are read from the cache instead of being parsed.
+    """
+    sources = {}
+    cached_files = _load_yaml_cache(cache_path)
+    current_files: Dict[str, Dict] = {}
+    pending = []
+
+    # Traverse the directory for YAML files
+    paths = _find_yaml_files(yaml_path)
+    for full_path in paths:
+        stat = os.stat(full_path)
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        cached = cached_files.get(full_path)
+        if cached and cached["mtime_ns"] == entry["mtime_ns"] and cached["size"] == entry["size"]:
+            current_files[full_path] = cached
+            continue
+
+        if cache_path:
+            entry["sha256"] = _file_digest(full_path)
+            if cached and cached["sha256"] == entry["sha256"]:
+                entry["sources"] = cached["sources"]
+                current_files[full_path] = entry
+                continue
+        current_files[full_path] = entry
+        pending.append(full_path)
+
+    profiler.count("yaml_files", len(paths))
+    profiler.count("yaml_files_cached", len(paths) - len(pending))
+    if jobs > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed = list(executor.map(_parse_source_file, pending, chunksize=max(1, len(pending) // (jobs * 4))))
+    else:
+        parsed = [_parse_source_file(full_path) for full_path in pending]
+
+    for full_path, extracted, error in parsed:
+        if error is not None:
+            profiler.count("yaml_parse_errors")
+            print(f"Error parsing YAML file: {full_path}", file=sys.stderr)
+            print(f"YAML error details: {error}", file=sys.stderr)
+            # Not cached, so the file is parsed (and reported) again on the next run
+            del current_files[full_path]
+            continue
+        current_files[full_path]["sources"] = extracted
+
+    # Merge in walk order so later files override earlier ones, as a serial walk would
+    for full_path in paths:
+        entry = current_files.get(full_path)
+        if entry is None:
+            continue
+        for table_name, group_name, columns in entry["sources"]:
+            # Store the source table information
+            sources[table_name] = {
+                "group": group_name,
+                "columns": columns,
+            }
+
+    if cache_path:
+        _save_yaml_cache(cache_path, current_files)
 
     return sources
@@ -0,0 +1,96 @@
+import io
+import json
+import pytest
+from src.batch import iter_report_results, select_report_models, write_jsonl
+from src.lineage_budget import LineageBudget
+from src.model_analyzer import ModelAnalyzer
+
+@pytest.fixture
+def mock_nodes():
+    return {
+        "model.reports.report_1": {
+            "resource_type": "model",
+            "tags": ["finance"],
+            "columns": {"a": {}, "b": {}},
+            "depends_on": {"nodes": ["source_model_1"]}
+        },
+        "model.reports.report_2": {
+            "resource_type": "model",
+            "config": {"tags": ["marketing"]},
+            "columns": {"c": {}},
+            "depends_on": {"nodes": ["source_model_1"]}
+        },
+        "model.materialized_model_1": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"a": {}, "c": {}},
+            "depends_on": {"nodes": ["source_model_1"]}
+        },
+        "source_model_1": {
+            "resource_type": "source",
+            "columns": {"a": {}, "b": {}, "c": {}}
+        }
+    }
+
+def test_select_report_models(mock_nodes):
+    assert select_report_models(mock_nodes, patterns=["model.reports.*"]) == [
+        "model.reports.report_1", "model.reports.report_2"
+    ]
+    assert select_report_models(mock_nodes, selectors=["tag:marketing"]) == ["model.reports.report_2"]
+    assert select_report_models(
+        mock_nodes, names=["model.reports.report_2"], selectors=["tag:finance", "tag:marketing"]
+    ) == ["model.reports.report_2", "model.reports.report_1"]
+
+def test_select_report_models_rejects_unknown_selector(mock_nodes):
+    with pytest.raises(ValueError):
+        select_report_models(mock_nodes, selectors=["path:models/reports"])
+
+def test_batch_results_stream_as_jsonl(mock_nodes):
+    analyzer = ModelAnalyzer(mock_nodes, source_data={})
+    output = io.StringIO()
+    reports = ["model.reports.report_1", "model.reports.report_2", "model.missing"]
+
+    assert write_jsonl(iter_report_results(analyzer, reports), output) == 3
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert lines[0]["lineage"] == {"a": [["source_model_1", "a"]], "b": [["source_model_1", "b"]]}
+    assert lines[0]["matches"][0]["match_score"] == "1 out of 2"
+    assert lines[1]["matches"][0]["matching_columns"] == [["c", "c"]]
+    assert lines[2] == {"report_model": "model.missing", "error": "Model not found in manifest"}
+
+def test_batch_results_flag_truncated_lineage(mock_nodes):
+    analyzer = ModelAnalyzer(mock_nodes, source_data={})
+    reports = ["model.reports.report_1", "model.reports.report_2"]
+    results = list(iter_report_results(analyzer, reports, LineageBudget(max_depth=0)))
+    # Every column's source is one hop away, past the depth limit, so a is cut off as well as b
+    assert all(result["truncated"] and result["lineage"] == {} for result in results)
+    assert results[0]["budget"]["reasons"] == ["depth"]
+
+    # Tracing the materialized model memoizes source columns a and c, which then resolve without expanding
+    analyzer.get_materialized_model_lineage()
+    results = list(iter_report_results(analyzer, reports, LineageBudget(max_depth=0)))
+    assert results[0]["truncated"] and results[0]["lineage"] == {"a": [("source_model_1", "a")]}
+    assert not results[1]["truncated"] and results[1]["lineage"] == {"c": [("source_model_1", "c")]}
+
+    results = list(iter_report_results(analyzer, reports, LineageBudget(max_depth=1)))
+    assert not any(result["truncated"] for result in results)
+    assert results[0]["lineage"] == {"a": [("source_model_1", "a")], "b": [("source_model_1", "b")]}
+
+def test_cli_jsonl_stdout_stays_parseable(mock_nodes, tmpdir, monkeypatch, capsys):
+    import analyze_models
+
+    mock_nodes["model.reports.report_1"]["raw_code"] = "SELECT a, b FROM source_model_1 -- {{ ref('source_model_1' }}"
+    manifest_path = tmpdir.join("manifest.json")
+    manifest_path.write(json.dumps({"nodes": mock_nodes, "sources": {}}))
+    yaml_dir = tmpdir.mkdir("yaml")
+    yaml_dir.join("broken.yml").write("sources: [unclosed")
+    monkeypatch.setattr("sys.argv", [
+        "analyze_models.py", "--manifest", str(manifest_path), "--yaml", str(yaml_dir),
+        "--report_glob", "model.reports.*", "--format", "jsonl", "--no-cache", "--serial-startup",
+    ])
+    analyze_models.main()
+
+    captured = capsys.readouterr()
+    assert "Error processing SQL" in captured.err and "Error parsing YAML file" in captured.err
+    lines = [json.loads(line) for line in captured.out.splitlines()]
+    assert [line["report_model"] for line in lines] == ["model.reports.report_1", "model.reports.report_2"]
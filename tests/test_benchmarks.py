@@ -0,0 +1,37 @@
+import pytest
+from benchmarks.run_benchmarks import run_project
+from benchmarks.synthetic_project import ProjectSpec, generate_project
+from src.dag import topological_order
+
+@pytest.fixture
+def spec():
+    return ProjectSpec(models=24, depth=3, fan_in=2, columns=4, sources=3, yaml_files=2)
+
+def test_generate_project_shape(spec):
+    manifest, yaml_documents = generate_project(spec)
+    nodes = manifest['nodes']
+    models = [node for node in nodes.values() if node['resource_type'] == 'model']
+
+    assert len(models) == 24
+    assert len(yaml_documents) == 2
+    assert all(len(node['depends_on']['nodes']) == 2 for node in models)
+    assert len(topological_order(nodes)) == len(nodes)
+    assert generate_project(spec)[0] == manifest
+
+def test_run_project_times_every_scenario(spec, tmpdir):
+    project = run_project(spec, str(tmpdir))
+    scenarios = {scenario['scenario']: scenario for scenario in project['scenarios']}
+
+    assert set(scenarios) == {
+        'manifest_load_full', 'manifest_load_streaming', 'yaml_discovery',
+        'get_base_level_lineage', 'get_materialized_model_lineage', 'analyze_model_matches',
+        'analyze_model_matches_bitset', 'single_report_full', 'single_report_planned',
+        'warm_start_state', 'warm_start_snapshot', 'cli_import'
+    }
+    assert scenarios['analyze_model_matches_bitset']['result'] == scenarios['analyze_model_matches']['result']
+    assert scenarios['single_report_planned']['result'] == scenarios['single_report_full']['result']
+    assert scenarios['warm_start_snapshot']['result'] == scenarios['warm_start_state']['result']
+    # Parsing and rendering dependencies are only imported once a node needs them
+    assert scenarios['cli_import']['result'] == []
+    assert scenarios['manifest_load_streaming']['result'] == project['nodes']
+    assert scenarios['yaml_discovery']['result'] == 3
@@ -43,8 +43,100 @@ def test_get_base_level_lineage(tracer):
     }
     assert base_lineage == expected
 
-def test_is_potential_rename(tracer):
-    assert tracer._is_potential_rename('user_id', 'id')
-    assert tracer._is_potential_rename('full_name', 'name')
-    assert tracer._is_potential_rename('email_address', 'email')
-    assert not tracer._is_potential_rename('user_id', 'name')
\ No newline at end of file
+def test_rename_candidates(tracer):
+    index = tracer.index
+    parent_id = index.node_id('source.raw.users')
+
+    def candidates(column):
+        return [index.column_name(column_id) for column_id in tracer._rename_candidates(parent_id, index.column_id(column))]
+
+    assert candidates('user_id') == ['id']
+    assert candidates('full_name') == ['name']
+    assert candidates('email_address') == ['email']
+    assert candidates('user_ref') == []
+
+def _chain_nodes(length):
+    nodes = {'source.raw.events': {'resource_type': 'source', 'columns': {'event_id': {}}}}
+    previous = 'source.raw.events'
+    for i in range(length):
+        name = f'model.chain_{i}'
+        nodes[name] = {
+            'resource_type': 'model',
+            'columns': {'event_id': {}},
+            'depends_on': {'nodes': [previous]}
+        }
+        previous = name
+    return nodes
+
+def test_trace_deep_chain_does_not_recurse():
+    nodes = _chain_nodes(5000)
+    tracer = ColumnLineageTracer(nodes, source_data={}, manifest={})
+    lineage = tracer.trace_column_lineage('model.chain_4999', 'event_id')
+    assert lineage == {('source.raw.events', 'event_id')}
+
+def test_trace_diamonds_resolves_each_pair_once(monkeypatch):
+    # Every layer depends on both models of the previous layer, which used to double the work per layer
+    nodes = {'source.raw.events': {'resource_type': 'source', 'columns': {'event_id': {}}}}
+    previous = ['source.raw.events']
+    for layer in range(30):
+        current = [f'model.layer_{layer}_{side}' for side in ('a', 'b')]
+        for name in current:
+            nodes[name] = {'resource_type': 'model', 'columns': {'event_id': {}}, 'depends_on': {'nodes': previous}}
+        previous = current
+
+    tracer = ColumnLineageTracer(nodes, source_data={}, manifest={})
+    expanded = []
+    original_expand = tracer._expand
+    monkeypatch.setattr(tracer, '_expand', lambda pair: expanded.append(pair) or original_expand(pair))
+
+    lineage = tracer.trace_column_lineage('model.layer_29_a', 'event_id')
+    assert lineage == {('source.raw.events', 'event_id')}
+    assert len(expanded) == len(set(expanded))
+
+def test_trace_cycle_shares_lineage_across_members():
+    nodes = {
+        'source.raw.users': {'resource_type': 'source', 'columns': {'id': {}}},
+        'model.a': {'resource_type': 'model', 'columns': {'id': {}}, 'depends_on': {'nodes': ['model.b', 'source.raw.users']}},
+        'model.b': {'resource_type': 'model', 'columns': {'id': {}}, 'depends_on': {'nodes': ['model.a']}}
+    }
+    tracer = ColumnLineageTracer(nodes, source_data={}, manifest={})
+    assert tracer.trace_column_lineage('model.b', 'id') == {('source.raw.users', 'id')}
+    assert tracer.trace_column_lineage('model.a', 'id') == {('source.raw.users', 'id')}
+
+def test_rename_candidates_share_a_name_part(tracer):
+    index = tracer.index
+    parent_id = index.node_id('model.staging.stg_users')
+    for column in ('email', 'user_name', 'name_id', 'unrelated'):
+        parts = set(column.split('_'))
+        expected = [
+            parent_column for parent_column in index.records[parent_id].columns
+            if parts & set(index.column_name(parent_column).split('_'))
+        ]
+        assert tracer._rename_candidates(parent_id, index.column_id(column)) == expected
+
+def test_rename_fanout_keeps_best_ranked_candidates():
+    columns = {f'customer_attr_{i}': {} for i in range(50)}
+    columns['customer_key_attr'] = {}
+    nodes = {
+        'source.raw.customers': {'resource_type': 'source', 'columns': columns},
+        'model.customers': {
+            'resource_type': 'model',
+            'columns': {'customer_key': {}},
+            'depends_on': {'nodes': ['source.raw.customers']}
+        }
+    }
+    tracer = ColumnLineageTracer(nodes, source_data={}, manifest={}, rename_fanout=3)
+    index = tracer.index
+    candidates = tracer._rename_candidates(index.node_id('source.raw.customers'), index.column_id('customer_key'))
+    assert [index.column_name(column) for column in candidates] == ['customer_key_attr', 'customer_attr_0', 'customer_attr_1']
+    assert len(tracer.trace_column_lineage('model.customers', 'customer_key')) == 3
+
+    unlimited = ColumnLineageTracer(nodes, source_data={}, manifest={}, rename_fanout=None)
+    assert len(unlimited.trace_column_lineage('model.customers', 'customer_key')) == 51
+
+def test_rename_fanout_of_zero_means_no_limit():
+    tracer = ColumnLineageTracer({}, source_data={}, manifest={}, rename_fanout=0)
+    assert tracer.rename_fanout is None
+    assert tracer.lineage_options()['rename_fanout'] is None
+    with pytest.raises(ValueError):
+        ColumnLineageTracer({}, source_data={}, manifest={}, rename_fanout=-1)
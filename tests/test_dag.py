@@ -0,0 +1,37 @@
+import pytest
+from src.dag import build_child_map, build_parent_map, topological_order
+
+@pytest.fixture
+def nodes():
+    return {
+        'model.report': {'depends_on': {'nodes': ['model.stg_orders', 'model.stg_users']}},
+        'model.stg_orders': {'depends_on': {'nodes': ['source.raw.orders']}},
+        'model.stg_users': {'depends_on': {'nodes': ['source.raw.users', 'source.raw.missing']}},
+        'source.raw.orders': {},
+        'source.raw.users': {}
+    }
+
+def test_build_parent_map_skips_unknown_nodes(nodes):
+    parents = build_parent_map(nodes)
+    assert parents['model.stg_users'] == ['source.raw.users']
+    assert parents['source.raw.orders'] == []
+
+def test_build_child_map(nodes):
+    children = build_child_map(nodes)
+    assert children['model.stg_orders'] == ['model.report']
+    assert children['model.report'] == []
+
+def test_topological_order_puts_parents_first(nodes):
+    order = topological_order(nodes)
+    assert sorted(order) == sorted(nodes)
+    for node_name, parents in build_parent_map(nodes).items():
+        for parent in parents:
+            assert order.index(parent) < order.index(node_name)
+
+def test_topological_order_keeps_cyclic_nodes():
+    nodes = {
+        'model.a': {'depends_on': {'nodes': ['model.b']}},
+        'model.b': {'depends_on': {'nodes': ['model.a']}},
+        'model.c': {}
+    }
+    assert topological_order(nodes) == ['model.c', 'model.a', 'model.b']
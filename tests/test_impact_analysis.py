@@ -0,0 +1,71 @@
+import pytest
+from src.impact_analysis import ImpactIndex
+from src.model_analyzer import ModelAnalyzer
+
+@pytest.fixture
+def nodes():
+    return {
+        "source.raw.orders": {"resource_type": "source", "columns": {"id": {}, "amount": {}}},
+        "source.raw.customers": {"resource_type": "source", "columns": {"id": {}, "name": {}}},
+        "model.stg_orders": {
+            "resource_type": "model",
+            "columns": {"id": {}, "order_amount": {}},
+            "raw_code": "SELECT id, amount AS order_amount FROM raw_orders",
+            "depends_on": {"nodes": ["source.raw.orders"]}
+        },
+        "model.orders": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"id": {}, "order_amount": {}},
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        },
+        "model.customers": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"id": {}, "name": {}},
+            "depends_on": {"nodes": ["source.raw.customers"]}
+        }
+    }
+
+def test_impact_lists_downstream_columns_and_materialized_models(nodes):
+    analyzer = ModelAnalyzer(nodes, source_data={})
+    impact = analyzer.analyze_impact("source.raw.orders", "amount")
+    assert impact["columns"] == [("model.orders", "order_amount"), ("model.stg_orders", "order_amount")]
+    assert impact["materialized_models"] == ["model.orders"]
+    assert analyzer.analyze_impact("source.raw.orders", "missing")["columns"] == []
+
+def test_impact_only_traces_downstream_nodes(nodes):
+    analyzer = ModelAnalyzer(nodes, source_data={})
+    impact_index = ImpactIndex(analyzer.lineage_tracer)
+    impact_index.impact("source.raw.orders", "id")
+    traced = {analyzer.index.node_name(node_id) for node_id, _ in analyzer.lineage_tracer._lineage_memo}
+    assert "model.customers" not in traced
+    assert impact_index.downstream_node_ids(analyzer.index.node_id("source.raw.customers")) == [
+        analyzer.index.node_id("source.raw.customers"), analyzer.index.node_id("model.customers")
+    ]
+
+def test_impact_matches_forward_lineage(nodes):
+    analyzer = ModelAnalyzer(nodes, source_data={})
+    impact_index = ImpactIndex(analyzer.lineage_tracer)
+    impact_index.build()
+    for source_node in ("source.raw.orders", "source.raw.customers"):
+        for column in nodes[source_node]["columns"]:
+            expected = sorted(
+                (node_name, derived_column)
+                for node_name in nodes if node_name != source_node
+                for derived_column, sources in analyzer.lineage_tracer.get_base_level_lineage(node_name).items()
+                if (source_node, column) in sources
+            )
+            assert impact_index.impact(source_node, column)["columns"] == expected
+
+def test_impact_of_unknown_node_raises(nodes):
+    with pytest.raises(KeyError):
+        ModelAnalyzer(nodes, source_data={}).analyze_impact("source.raw.missing", "id")
+
+def test_impact_of_unknown_column_does_not_grow_the_index(nodes):
+    analyzer = ModelAnalyzer(nodes, source_data={})
+    analyzer.analyze_impact("source.raw.orders", "id")
+    base_columns = len(analyzer.index.base_columns)
+    impact = analyzer.analyze_impact("source.raw.orders", "no_such_column")
+    assert impact == {"source": ("source.raw.orders", "no_such_column"), "columns": [], "materialized_models": []}
+    assert len(analyzer.index.base_columns) == base_columns
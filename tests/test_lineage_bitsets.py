@@ -0,0 +1,33 @@
+import pytest
+import src.lineage_bitsets as lineage_bitsets
+from src.lineage_bitsets import LineageBitsets
+
+STORED = [{0, 3}, {8}, set(), {3, 17}, {9, 10}]
+QUERIES = [{3}, {8, 9}, {1, 2}, set(), {17, 40}]
+EXPECTED = [[0, 3], [1, 4], [], [], [3]]
+
+def test_overlapping_with_python_ints():
+    bitsets = LineageBitsets(STORED, 18, use_numpy=False)
+    assert len(bitsets) == 5
+    assert bitsets.overlapping(QUERIES) == EXPECTED
+
+def test_overlapping_with_numpy():
+    pytest.importorskip("numpy")
+    bitsets = LineageBitsets(STORED, 18, use_numpy=True)
+    assert bitsets.overlapping(QUERIES) == EXPECTED
+
+def test_numpy_batches_queries(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(lineage_bitsets, "_BATCH_BYTES", 1)
+    bitsets = LineageBitsets(STORED, 18, use_numpy=True)
+    assert bitsets.overlapping(QUERIES) == EXPECTED
+
+def test_empty_universe():
+    bitsets = LineageBitsets([set(), set()], 0, use_numpy=False)
+    assert bitsets.overlapping([set()]) == [[]]
+
+def test_numpy_required_when_requested(monkeypatch):
+    monkeypatch.setattr(lineage_bitsets, "numpy", None)
+    assert not LineageBitsets(STORED, 18).use_numpy
+    with pytest.raises(ImportError):
+        LineageBitsets(STORED, 18, use_numpy=True)
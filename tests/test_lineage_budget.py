@@ -0,0 +1,88 @@
+import pytest
+from src.column_lineage import ColumnLineageTracer
+from src.lineage_budget import LineageBudget
+
+@pytest.fixture
+def chain_tracer():
+    nodes = {'source.raw.events': {'resource_type': 'source', 'columns': {'event_id': {}}}}
+    previous = 'source.raw.events'
+    for i in range(20):
+        name = f'model.chain_{i}'
+        nodes[name] = {'resource_type': 'model', 'columns': {'event_id': {}}, 'depends_on': {'nodes': [previous]}}
+        previous = name
+    return ColumnLineageTracer(nodes, source_data={}, manifest={})
+
+def test_unlimited_budget_matches_unbudgeted_lineage(chain_tracer):
+    budget = LineageBudget()
+    lineage = chain_tracer.get_base_level_lineage('model.chain_19', budget)
+    assert lineage == {'event_id': {('source.raw.events', 'event_id')}}
+    assert not budget.truncated
+    assert budget.stats()['pairs_expanded'] == 21
+    assert budget.stats()['max_depth_reached'] == 20
+
+def test_depth_budget_returns_truncated_lineage_without_memoizing(chain_tracer):
+    budget = LineageBudget(max_depth=5)
+    assert chain_tracer.get_base_level_lineage('model.chain_19', budget) == {}
+    stats = budget.stats()
+    assert stats['truncated'] and stats['reasons'] == ['depth']
+    assert stats['pairs_expanded'] == 6
+    assert stats['max_depth_reached'] == 5
+    assert chain_tracer._lineage_memo == {}
+
+    # A later unbudgeted query is not affected by the partial result
+    assert chain_tracer.get_base_level_lineage('model.chain_19') == {'event_id': {('source.raw.events', 'event_id')}}
+
+def test_pair_budget_stops_expansion_and_reports_busiest_nodes(chain_tracer):
+    budget = LineageBudget(max_pairs=3)
+    assert chain_tracer.get_base_level_lineage('model.chain_19', budget) == {}
+    stats = budget.stats()
+    assert stats['reasons'] == ['pairs']
+    assert stats['pairs_expanded'] == 3
+    assert stats['busiest_nodes'][0] == {'node': 'model.chain_19', 'pairs': 1}
+
+def test_budget_reuses_memoized_lineage(chain_tracer):
+    chain_tracer.get_base_level_lineage('model.chain_10')
+    budget = LineageBudget(max_depth=9)
+    lineage = chain_tracer.get_base_level_lineage('model.chain_19', budget)
+    assert lineage == {'event_id': {('source.raw.events', 'event_id')}}
+    assert not budget.truncated
+
+def test_expired_deadline_truncates_lineage(chain_tracer):
+    budget = LineageBudget(deadline=0.0)
+    budget.start()
+    assert chain_tracer.get_base_level_lineage('model.chain_19', budget) == {}
+    assert budget.stats()['reasons'] == ['deadline']
+    assert budget.renew().stats()['pairs_expanded'] == 0
+
+def test_budget_covers_materialized_models_matched_against(chain_tracer):
+    from src.model_analyzer import ModelAnalyzer
+
+    nodes = dict(chain_tracer.nodes)
+    nodes['source.raw.events'] = {'resource_type': 'source', 'columns': {'event_id': {}, 'event_type': {}}}
+    nodes['model.deep_mart'] = {
+        'resource_type': 'model',
+        'config': {'materialized': 'table'},
+        'columns': {'event_type': {}, 'event_id': {}},
+        'depends_on': {'nodes': ['source.raw.events', 'model.chain_19']}
+    }
+    nodes['model.report'] = {
+        'resource_type': 'model',
+        'columns': {'event_type': {}},
+        'depends_on': {'nodes': ['source.raw.events']}
+    }
+    analyzer = ModelAnalyzer(nodes, source_data={})
+
+    budget = LineageBudget(max_pairs=6)
+    matches = analyzer.analyze_model_matches('model.report', budget)
+    assert budget.truncated and budget.stats()['pairs_expanded'] == 6
+    assert [(match['materialized_model'], match.get('truncated')) for match in matches] == [('model.deep_mart', True)]
+    # The index built on truncated lineage is not kept, the next query traces the model again
+    assert analyzer._materialized_index is None
+
+    assert analyzer.analyze_model_matches('model.report') == [{
+        'report_model': 'model.report',
+        'materialized_model': 'model.deep_mart',
+        'match_score': '1 out of 1',
+        'matching_columns': [('event_type', 'event_type')]
+    }]
+    assert analyzer._materialized_index is not None
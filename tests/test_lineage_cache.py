@@ -0,0 +1,65 @@
+import copy
+import pytest
+from src.column_lineage import ColumnLineageTracer
+from src.lineage_cache import LineageCache, compute_cache_keys
+
+@pytest.fixture
+def sample_nodes():
+    return {
+        'source.raw.users': {
+            'resource_type': 'source',
+            'columns': {'id': {}, 'name': {}, 'email': {}}
+        },
+        'model.staging.stg_users': {
+            'resource_type': 'model',
+            'checksum': {'name': 'sha256', 'checksum': 'aaa'},
+            'columns': {'user_id': {}, 'full_name': {}, 'email_address': {}},
+            'depends_on': {'nodes': ['source.raw.users']},
+            'raw_code': "SELECT id as user_id, name as full_name, email as email_address FROM source.raw.users"
+        },
+        'model.mart.dim_users': {
+            'resource_type': 'model',
+            'checksum': {'name': 'sha256', 'checksum': 'bbb'},
+            'columns': {'user_id': {}, 'full_name': {}, 'email': {}},
+            'depends_on': {'nodes': ['model.staging.stg_users']},
+            'raw_code': "SELECT user_id, full_name, email_address as email FROM model.staging.stg_users"
+        }
+    }
+
+def test_cache_keys_change_with_ancestry(sample_nodes):
+    keys = compute_cache_keys(sample_nodes)
+    changed = copy.deepcopy(sample_nodes)
+    changed['model.staging.stg_users']['checksum']['checksum'] = 'ccc'
+    changed_keys = compute_cache_keys(changed)
+
+    assert changed_keys['source.raw.users'] == keys['source.raw.users']
+    assert changed_keys['model.staging.stg_users'] != keys['model.staging.stg_users']
+    assert changed_keys['model.mart.dim_users'] != keys['model.mart.dim_users']
+
+def test_warm_run_skips_parsing_and_tracing(sample_nodes, tmpdir):
+    cold_cache = LineageCache(str(tmpdir))
+    cold = ColumnLineageTracer(sample_nodes, source_data={}, manifest={}, cache=cold_cache)
+    expected = cold.get_base_level_lineage('model.mart.dim_users')
+    assert cold_cache.save(cold) == 3
+
+    warm_cache = LineageCache(str(tmpdir))
+    warm = ColumnLineageTracer(sample_nodes, source_data={}, manifest={}, cache=warm_cache)
+    assert warm.get_base_level_lineage('model.mart.dim_users') == expected
+    assert warm.analysis_cache.misses == 0
+    assert warm_cache.stats() == {'hits': 3, 'misses': 0}
+    assert warm_cache.save(warm) == 0
+
+def test_changed_node_is_retraced(sample_nodes, tmpdir):
+    cache = LineageCache(str(tmpdir))
+    tracer = ColumnLineageTracer(sample_nodes, source_data={}, manifest={}, cache=cache)
+    tracer.get_base_level_lineage('model.mart.dim_users')
+    cache.save(tracer)
+
+    changed = copy.deepcopy(sample_nodes)
+    changed['model.mart.dim_users']['checksum']['checksum'] = 'ddd'
+    warm = ColumnLineageTracer(changed, source_data={}, manifest={}, cache=LineageCache(str(tmpdir)))
+    warm.get_base_level_lineage('model.mart.dim_users')
+
+    # Only the edited model is parsed again, its parent comes from the cache
+    assert warm.analysis_cache.misses == 1
+    assert 'model.mart.dim_users' in warm.analysis_cache
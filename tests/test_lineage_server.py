@@ -0,0 +1,93 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from src.lineage_server import LineageService, make_server
+
+def _manifest(report_columns):
+    return {
+        "nodes": {
+            "model.report": {
+                "resource_type": "model",
+                "columns": {column: {} for column in report_columns},
+                "raw_code": f"SELECT {', '.join(report_columns)} FROM {{{{ ref('orders') }}}}",
+                "depends_on": {"nodes": ["model.orders"]}
+            },
+            "model.orders": {
+                "resource_type": "model",
+                "config": {"materialized": "table"},
+                "columns": {"a": {}, "b": {}},
+                "raw_code": "SELECT a, b FROM raw_orders",
+                "depends_on": {"nodes": ["source.raw.orders"]}
+            },
+            "source.raw.orders": {"resource_type": "source", "columns": {"a": {}, "b": {}}}
+        },
+        "sources": {}
+    }
+
+@pytest.fixture
+def project(tmpdir):
+    manifest_path = tmpdir.join("manifest.json")
+    manifest_path.write(json.dumps(_manifest(["a"])))
+    yaml_dir = tmpdir.mkdir("models")
+    return str(manifest_path), str(yaml_dir)
+
+@pytest.fixture
+def service(project):
+    manifest_path, yaml_dir = project
+    return LineageService(manifest_path, yaml_dir)
+
+def test_queries_answer_from_loaded_state(service):
+    assert service.lineage("model.report") == {
+        "model": "model.report", "lineage": {"a": [("source.raw.orders", "a")]}
+    }
+    assert service.matches("model.report")["matches"][0]["materialized_model"] == "model.orders"
+    assert list(service.materialized()) == ["model.orders"]
+    assert service.lineage("model.missing") is None
+    assert service.health()["nodes"] == 3
+
+def test_reload_swaps_state_when_manifest_changes(service, project):
+    assert not service.reload_if_changed()
+    old_state = service.state
+
+    with open(project[0], "w") as f:
+        json.dump(_manifest(["a", "b"]), f)
+    assert service.reload_if_changed()
+    assert service.reloads == 1
+    assert set(service.lineage("model.report")["lineage"]) == {"a", "b"}
+    # A request holding the previous state still completes against it
+    assert set(old_state.analyzer.lineage_tracer.get_base_level_lineage("model.report")) == {"a"}
+
+def test_unreadable_manifest_keeps_current_state(service, project):
+    old_state = service.state
+    with open(project[0], "w") as f:
+        f.write('{"nodes": {')
+    assert not service.reload_if_changed()
+    assert service.state is old_state
+
+def test_http_endpoints(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/lineage?model=model.report") as response:
+            assert json.load(response)["lineage"] == {"a": [["source.raw.orders", "a"]]}
+        with urllib.request.urlopen(f"{base}/impact?node=source.raw.orders&column=a") as response:
+            assert json.load(response) == {
+                "source": ["source.raw.orders", "a"],
+                "columns": [["model.orders", "a"], ["model.report", "a"]],
+                "materialized_models": ["model.orders"],
+            }
+        with urllib.request.urlopen(f"{base}/health") as response:
+            assert json.load(response)["reloads"] == 0
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/matches?model=model.missing")
+        assert error.value.code == 404
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/lineage")
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,97 @@
+import sqlite3
+import pytest
+from src.lineage_store import LineageStore, export_lineage_store, load_lineage_store
+from src.model_analyzer import ModelAnalyzer
+
+@pytest.fixture
+def nodes():
+    return {
+        "source.raw.orders": {"resource_type": "source", "columns": {"id": {}, "amount": {}, "status": {}}},
+        "model.stg_orders": {
+            "resource_type": "model",
+            "columns": {"id": {}, "order_amount": {}},
+            "raw_code": "SELECT id, amount AS order_amount FROM raw_orders",
+            "depends_on": {"nodes": ["source.raw.orders"]}
+        },
+        "model.orders": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"id": {}, "order_amount": {}},
+            "raw_code": "SELECT id, order_amount FROM stg_orders",
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        },
+        "model.report": {
+            "resource_type": "model",
+            "columns": {"id": {}, "order_amount": {}, "note": {}},
+            "raw_code": "SELECT id, order_amount, 'x' AS note FROM stg_orders",
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        }
+    }
+
+@pytest.fixture
+def store_path(nodes, tmp_path):
+    path = str(tmp_path / "lineage.db")
+    export_lineage_store(ModelAnalyzer(nodes, source_data={}), path)
+    return path
+
+def test_store_answers_lineage_and_match_queries(nodes, store_path):
+    analyzer = ModelAnalyzer(nodes, source_data={})
+    store = LineageStore(store_path)
+    for node_name in nodes:
+        assert store.base_lineage(node_name) == analyzer.lineage_tracer.get_base_level_lineage(node_name)
+    assert store.materialized_lineage() == analyzer.get_materialized_model_lineage()
+    assert store.matches("model.report") == analyzer.analyze_model_matches("model.report")
+    assert store.derived_columns("source.raw.orders", "amount") == [
+        ("model.orders", "order_amount"), ("model.report", "order_amount"), ("model.stg_orders", "order_amount"),
+        ("source.raw.orders", "amount")
+    ]
+    assert store.parents("model.report", "order_amount") == [("model.stg_orders", "order_amount")]
+    assert ("model.orders", "id") in store.children("model.stg_orders", "id")
+    store.close()
+
+def test_store_indexes_both_sides_of_lineage(store_path):
+    connection = sqlite3.connect(store_path)
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT node FROM base_sources WHERE source_node = 'a' AND source_column = 'b'"
+    ).fetchall()
+    assert "base_sources_by_source" in str(plan)
+    indexes = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"edges_by_target", "edges_by_source", "base_sources_by_target", "matches_by_report"} <= indexes
+    connection.close()
+
+def test_loaded_store_is_warm(nodes, store_path, monkeypatch):
+    analyzer = load_lineage_store(store_path, source_data={})
+    tracer = analyzer.lineage_tracer
+    monkeypatch.setattr(tracer, "_expand", lambda pair: pytest.fail("lineage was retraced"))
+    expected = ModelAnalyzer(nodes, source_data={})
+    assert tracer.get_base_level_lineage("model.report") == expected.lineage_tracer.get_base_level_lineage("model.report")
+    assert analyzer.analyze_model_matches("model.report") == expected.analyze_model_matches("model.report")
+    assert len(tracer.analysis_cache) == 3
+
+def test_store_with_other_options_keeps_only_parse_results(store_path):
+    analyzer = load_lineage_store(store_path, source_data={}, rename_fanout=1)
+    assert analyzer.lineage_tracer._lineage_memo == {}
+    assert "model.report" in analyzer.lineage_tracer.analysis_cache
+
+def test_missing_store_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LineageStore(str(tmp_path / "missing.db"))
+
+@pytest.mark.parametrize("manifest_args", [[], ["--manifest", "missing/manifest.json"]])
+def test_cli_loads_store_without_reading_the_manifest(nodes, store_path, tmp_path, monkeypatch, capsys, manifest_args):
+    import json
+    import analyze_models
+
+    monkeypatch.setattr(analyze_models, "load_manifest_streaming", lambda *args, **kwargs: pytest.fail("manifest was read"))
+    monkeypatch.setattr("sys.argv", [
+        "analyze_models.py", *manifest_args, "--yaml", str(tmp_path), "--load-store", store_path,
+        "--report_model", "model.report", "--format", "jsonl", "--no-cache", "--serial-startup",
+    ])
+    analyze_models.main()
+
+    captured = capsys.readouterr()
+    assert "Error loading manifest" not in captured.err
+    result = json.loads(captured.out)
+    expected = ModelAnalyzer(nodes, source_data={})
+    assert result["lineage"]["order_amount"] == [["source.raw.orders", "amount"]]
+    assert len(result["matches"]) == len(expected.analyze_model_matches("model.report"))
@@ -0,0 +1,141 @@
+import copy
+import pytest
+from src.manifest_diff import (
+    affected_nodes,
+    diff_manifests,
+    incremental_analyzer,
+    incremental_report,
+    load_lineage_state,
+    save_lineage_state,
+)
+from src.model_analyzer import ModelAnalyzer
+
+@pytest.fixture
+def old_nodes():
+    return {
+        "source.raw.orders": {"resource_type": "source", "columns": {"id": {}, "amount": {}, "status": {}}},
+        "model.stg_orders": {
+            "resource_type": "model",
+            "columns": {"id": {}, "amount": {}},
+            "raw_code": "SELECT id, amount FROM raw_orders",
+            "checksum": {"checksum": "stg-1"},
+            "depends_on": {"nodes": ["source.raw.orders"]}
+        },
+        "model.orders": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"id": {}, "amount": {}},
+            "raw_code": "SELECT id, amount FROM stg_orders",
+            "checksum": {"checksum": "orders-1"},
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        },
+        "model.report": {
+            "resource_type": "model",
+            "columns": {"id": {}, "amount": {}},
+            "raw_code": "SELECT id, amount FROM stg_orders",
+            "checksum": {"checksum": "report-1"},
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        },
+        "model.unrelated": {
+            "resource_type": "model",
+            "columns": {"status": {}},
+            "raw_code": "SELECT status FROM raw_orders",
+            "checksum": {"checksum": "unrelated-1"},
+            "depends_on": {"nodes": ["source.raw.orders"]}
+        }
+    }
+
+@pytest.fixture
+def new_nodes(old_nodes):
+    nodes = copy.deepcopy(old_nodes)
+    nodes["model.stg_orders"]["raw_code"] = "SELECT id, status || amount AS status_amount FROM raw_orders"
+    nodes["model.stg_orders"]["columns"] = {"id": {}, "status_amount": {}}
+    nodes["model.stg_orders"]["checksum"] = {"checksum": "stg-2"}
+    return nodes
+
+def test_diff_and_downstream_closure(old_nodes, new_nodes):
+    del new_nodes["model.unrelated"]
+    new_nodes["model.new"] = {"resource_type": "model", "columns": {}, "depends_on": {"nodes": ["model.report"]}}
+    diff = diff_manifests(old_nodes, new_nodes)
+    assert diff.as_dict() == {
+        "added": ["model.new"], "removed": ["model.unrelated"], "modified": ["model.stg_orders"]
+    }
+    assert affected_nodes(diff, old_nodes, new_nodes) == {
+        "model.stg_orders", "model.orders", "model.report", "model.new"
+    }
+
+def test_dependency_changes_count_as_modified(old_nodes):
+    nodes = copy.deepcopy(old_nodes)
+    nodes["model.report"]["depends_on"]["nodes"].append("model.unrelated")
+    assert diff_manifests(old_nodes, nodes).modified == ["model.report"]
+
+def test_incremental_analyzer_reuses_unaffected_work(old_nodes, new_nodes):
+    old = ModelAnalyzer(old_nodes, source_data={}, manifest={"nodes": old_nodes, "sources": {}}, precompute=True)
+    new, diff, affected = incremental_analyzer(old, new_nodes)
+    assert "model.unrelated" not in affected
+
+    tracer = new.lineage_tracer
+    index = new.index
+    assert (index.node_id("model.stg_orders"), index.column_id("id")) not in tracer._lineage_memo
+    assert "model.unrelated" in tracer.analysis_cache
+    assert "model.stg_orders" not in tracer.analysis_cache
+
+    fresh = ModelAnalyzer(new_nodes, source_data={}, manifest={"nodes": new_nodes, "sources": {}})
+    for node_name in new_nodes:
+        assert tracer.get_base_level_lineage(node_name) == fresh.lineage_tracer.get_base_level_lineage(node_name)
+
+def test_incremental_report_deltas(old_nodes, new_nodes):
+    old = ModelAnalyzer(old_nodes, source_data={}, manifest={"nodes": old_nodes, "sources": {}})
+    _, report = incremental_report(old, new_nodes, report_models=["model.report"])
+
+    lineage = {delta["node"]: delta for delta in report["lineage"]}
+    assert set(lineage) == {"model.stg_orders", "model.orders", "model.report"}
+    assert lineage["model.report"]["columns"] == {
+        "amount": {"added": [("source.raw.orders", "status")], "removed": []}
+    }
+    assert report["matches"] == []
+
+def test_saved_state_round_trip(old_nodes, new_nodes, tmpdir):
+    path = str(tmpdir.join("state.json"))
+    save_lineage_state(ModelAnalyzer(old_nodes, source_data={}), path)
+    restored = load_lineage_state(path)
+    index = restored.index
+    assert (index.node_id("model.report"), index.column_id("amount")) in restored.lineage_tracer._lineage_memo
+    assert restored.lineage_tracer.get_base_level_lineage("model.report") == {
+        "id": {("source.raw.orders", "id")}, "amount": {("source.raw.orders", "amount")}
+    }
+
+    _, report = incremental_report(restored, new_nodes)
+    assert report["affected"] == ["model.orders", "model.report", "model.stg_orders"]
+    # stg_orders' renamed column now matches orders.amount by name as well as lineage
+    assert [delta["report_model"] for delta in report["matches"]] == ["model.stg_orders"]
+
+def test_materialization_change_reaches_unaffected_reports(old_nodes):
+    old_nodes["model.status_report"] = {
+        "resource_type": "model",
+        "columns": {"status": {}},
+        "raw_code": "SELECT status FROM raw_orders",
+        "checksum": {"checksum": "status-1"},
+        "depends_on": {"nodes": ["source.raw.orders"]}
+    }
+    old_nodes["source.raw.customers"] = {"resource_type": "source", "columns": {"id": {}, "status": {}}}
+    old_nodes["model.customer_report"] = {
+        "resource_type": "model",
+        "columns": {"status": {}},
+        "raw_code": "SELECT status FROM raw_customers",
+        "checksum": {"checksum": "customers-1"},
+        "depends_on": {"nodes": ["source.raw.customers"]}
+    }
+    new_nodes = copy.deepcopy(old_nodes)
+    new_nodes["model.unrelated"]["config"] = {"materialized": "table"}
+    old = ModelAnalyzer(old_nodes, source_data={}, manifest={"nodes": old_nodes, "sources": {}})
+    new, report = incremental_report(old, new_nodes)
+
+    assert "model.status_report" not in report["affected"]
+    # Reports sharing no source with the changed materialized model are never traced
+    customer_report = new.index.node_id("model.customer_report")
+    assert not any(node_id == customer_report for node_id, _ in new.lineage_tracer._lineage_memo)
+    matches = {delta["report_model"]: delta for delta in report["matches"]}
+    assert set(matches) == {"model.status_report"}
+    assert [match["materialized_model"] for match in matches["model.status_report"]["added"]] == ["model.unrelated"]
+    assert matches["model.status_report"]["added"] == new.analyze_model_matches("model.status_report")
@@ -0,0 +1,55 @@
+import pytest
+from src.manifest_index import ManifestIndex
+
+@pytest.fixture
+def nodes():
+    return {
+        'source.raw.users': {'resource_type': 'source', 'columns': {'id': {}, 'email': {}}},
+        'model.stg_users': {
+            'resource_type': 'model',
+            'columns': {'id': {}, 'email': {}},
+            'depends_on': {'nodes': ['source.raw.users', 'source.raw.users', 'source.raw.missing']},
+            'config': {'materialized': 'view'}
+        },
+        'model.dim_users': {
+            'resource_type': 'model',
+            'columns': {'id': {}},
+            'depends_on': {'nodes': ['model.stg_users']},
+            'config': {'materialized': 'table'}
+        }
+    }
+
+def test_column_names_are_interned_once(nodes):
+    index = ManifestIndex(nodes)
+    assert index.record('model.stg_users').columns == index.record('source.raw.users').columns
+    assert index.column_names == ['id', 'email']
+    assert index.column_id('email') == 1
+    assert index.find_column_id('missing') is None
+
+def test_adjacency_is_precomputed(nodes):
+    index = ManifestIndex(nodes)
+    source_id = index.node_id('source.raw.users')
+    stg_id = index.node_id('model.stg_users')
+    dim_id = index.node_id('model.dim_users')
+
+    assert index.records[stg_id].parents == (source_id,)
+    assert index.records[source_id].children == (stg_id,)
+    assert index.records[dim_id].parents == (stg_id,)
+    assert index.materialized_model_ids() == [dim_id]
+
+def test_base_columns_round_trip(nodes):
+    index = ManifestIndex(nodes)
+    first = index.base_column_id('source.raw.users', 'id')
+    assert index.base_column_id('source.raw.users', 'id') == first
+    assert index.base_column_names([first]) == {('source.raw.users', 'id')}
+
+def test_token_index_maps_name_parts_to_positions():
+    index = ManifestIndex({
+        'model.wide': {'columns': {'user_id': {}, 'User_Name': {}, 'order_id': {}}}
+    })
+    node_id = index.node_id('model.wide')
+    assert index.column_tokens(index.column_id('User_Name')) == {'user', 'name'}
+    token_index = index.token_index(node_id)
+    assert token_index['user'] == (0, 1)
+    assert token_index['id'] == (0, 2)
+    assert index.token_index(node_id) is token_index
@@ -0,0 +1,83 @@
+import io
+import json
+import pytest
+from src.manifest_loader import (
+    ManifestLoadStats,
+    load_manifest,
+    load_manifest_streaming,
+    stream_manifest,
+)
+
+@pytest.fixture
+def manifest():
+    return {
+        'metadata': {'dbt_version': '1.8.0', 'generated_at': '2024-01-01T00:00:00Z'},
+        'nodes': {
+            'model.shop.orders': {
+                'resource_type': 'model',
+                'raw_code': "SELECT id AS order_id, amount FROM {{ ref('stg_orders') }}",
+                'compiled_code': 'SELECT id AS order_id, amount FROM stg_orders',
+                'columns': {'order_id': {'name': 'order_id', 'description': 'Order key'}, 'amount': {}},
+                'depends_on': {'nodes': ['model.shop.stg_orders'], 'macros': ['macro.dbt.ref']},
+                'config': {'materialized': 'table', 'tags': ['daily']},
+                'checksum': {'name': 'sha256', 'checksum': 'abc123'},
+                'description': 'x' * 5000
+            },
+            'test.shop.not_null_orders_order_id': {
+                'resource_type': 'test',
+                'raw_code': '{{ test_not_null(**_dbt_generic_test_kwargs) }}'
+            }
+        },
+        'sources': {
+            'source.shop.raw.orders': {'resource_type': 'source', 'columns': {'id': {}}, 'loader': 'fivetran'}
+        },
+        'macros': {'macro.dbt.ref': {'macro_sql': '{% macro ref() %}{% endmacro %}'}},
+        'docs': {'doc.shop.__overview__': {'block_contents': 'y' * 5000}},
+        'child_map': {'model.shop.orders': []}
+    }
+
+def test_stream_manifest_projects_analyzer_fields(manifest):
+    stats = ManifestLoadStats()
+    # A tiny chunk size forces values and keys to straddle buffer boundaries
+    loaded = stream_manifest(io.StringIO(json.dumps(manifest, indent=2)), stats, chunk_size=16)
+
+    assert set(loaded) == {'nodes', 'sources'}
+    assert loaded['nodes'] == {
+        'model.shop.orders': {
+            'resource_type': 'model',
+            'raw_code': "SELECT id AS order_id, amount FROM {{ ref('stg_orders') }}",
+            'compiled_code': 'SELECT id AS order_id, amount FROM stg_orders',
+            'checksum': {'name': 'sha256', 'checksum': 'abc123'},
+            'columns': {'order_id': {}, 'amount': {}},
+            'depends_on': {'nodes': ['model.shop.stg_orders']},
+            'config': {'materialized': 'table'}
+        }
+    }
+    assert loaded['sources']['source.shop.raw.orders'] == {'resource_type': 'source', 'columns': {'id': {}}}
+    assert stats.nodes_kept == 1
+    assert stats.nodes_skipped == 1
+
+def test_streaming_loader_matches_full_loader_for_analyzer_fields(manifest, tmpdir):
+    path = tmpdir.join('manifest.json')
+    path.write(json.dumps(manifest))
+    stats = ManifestLoadStats()
+
+    streamed = load_manifest_streaming(str(path), stats, trace_memory=True)
+    full = load_manifest(str(path))
+
+    node = full['nodes']['model.shop.orders']
+    assert streamed['nodes']['model.shop.orders']['raw_code'] == node['raw_code']
+    assert list(streamed['nodes']['model.shop.orders']['columns']) == list(node['columns'])
+    assert stats.elapsed > 0
+    assert stats.peak_memory > 0
+
+def test_streaming_loader_reports_errors(tmpdir):
+    path = tmpdir.join('manifest.json')
+    path.write('{"nodes": {"model.a": {"resource_type": ')
+    assert load_manifest_streaming(str(path)) == {}
+
+def test_stream_manifest_skips_nodes_outside_keep(manifest):
+    stats = ManifestLoadStats()
+    streamed = stream_manifest(io.StringIO(json.dumps(manifest)), stats, keep={'source.shop.raw.orders'})
+    assert streamed == {'nodes': {}, 'sources': {'source.shop.raw.orders': {'resource_type': 'source', 'columns': {'id': {}}}}}
+    assert stats.nodes_skipped == 2
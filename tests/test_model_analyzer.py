@@ -44,3 +44,48 @@ def test_analyze_model_matches(model_analyzer):
     assert matches[0]["match_score"] == "2 out of 3"
     assert ("a", "a") in matches[0]["matching_columns"]
     assert ("b", "b") in matches[0]["matching_columns"]
+
+def test_precompute_builds_lineage_table(mock_nodes):
+    analyzer = ModelAnalyzer(mock_nodes, source_data={}, precompute=True)
+    index = analyzer.index
+    table = analyzer.lineage_tracer.lineage_table
+    assert {index.node_name(node_id) for node_id in table} == set(mock_nodes)
+
+    lineage = table[index.node_id("model.materialized_model_1")][index.column_id("a")]
+    assert index.base_column_names(lineage) == {("source_model_1", "a")}
+
+    matches = analyzer.analyze_model_matches("model.report_model_1")
+    assert matches[0]["match_score"] == "2 out of 3"
+
+def test_materialized_index_only_scores_models_sharing_lineage(mock_nodes):
+    mock_nodes["source_model_3"] = {"resource_type": "source", "columns": {"a": {}}}
+    mock_nodes["model.unrelated"] = {
+        "resource_type": "model",
+        "config": {"materialized": "table"},
+        "columns": {"a": {}},
+        "depends_on": {"nodes": ["source_model_3"]}
+    }
+    analyzer = ModelAnalyzer(mock_nodes, source_data={})
+
+    matches = analyzer.analyze_model_matches("model.report_model_1")
+    assert [match["materialized_model"] for match in matches] == ["model.materialized_model_1"]
+
+    index = analyzer.index
+    entries = analyzer._materialized_index[index.base_column_id("source_model_3", "a")]
+    assert entries == [(index.node_id("model.unrelated"), 0, index.column_id("a"))]
+
+def test_bitset_strategy_matches_index_strategy(mock_nodes):
+    mock_nodes["model.materialized_model_2"] = {
+        "resource_type": "model",
+        "config": {"materialized": "table"},
+        "columns": {"c_code": {}, "c": {}, "a": {}},
+        "depends_on": {"nodes": ["source_model_1", "source_model_2"]}
+    }
+    by_index = ModelAnalyzer(mock_nodes, source_data={}).analyze_model_matches("model.report_model_1")
+    by_bitset = ModelAnalyzer(mock_nodes, source_data={}, match_strategy="bitset").analyze_model_matches("model.report_model_1")
+    assert by_bitset == by_index
+    assert len(by_bitset) == 2
+
+def test_unknown_match_strategy(mock_nodes):
+    with pytest.raises(ValueError):
+        ModelAnalyzer(mock_nodes, source_data={}, match_strategy="quadratic")
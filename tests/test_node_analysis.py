@@ -0,0 +1,122 @@
+import pytest
+from src.column_lineage import ColumnLineageTracer
+from src.node_analysis import NodeAnalysisCache
+
+
+@pytest.fixture
+def sample_nodes():
+    return {
+        'source.raw.users': {
+            'resource_type': 'source',
+            'columns': {'id': {}, 'name': {}, 'email': {}}
+        },
+        'model.staging.stg_users': {
+            'resource_type': 'model',
+            'columns': {'user_id': {}, 'full_name': {}, 'email_address': {}},
+            'depends_on': {'nodes': ['source.raw.users']},
+            'raw_code': "SELECT id as user_id, name as full_name, email as email_address FROM source.raw.users"
+        },
+        'model.mart.dim_users': {
+            'resource_type': 'model',
+            'columns': {'user_id': {}, 'full_name': {}, 'email': {}},
+            'depends_on': {'nodes': ['model.staging.stg_users']},
+            'raw_code': "SELECT user_id, full_name, email_address as email FROM model.staging.stg_users"
+        }
+    }
+
+
+def test_cache_parses_node_once():
+    cache = NodeAnalysisCache(manifest={})
+    sql = "SELECT UPPER(name) AS upper_name FROM users WHERE id = other.user_id"
+
+    first = cache.get('model.users', sql)
+    second = cache.get('model.users', sql)
+
+    assert first is second
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['render_time'] > 0 and stats['parse_time'] > 0
+    assert 'name' in first.transformations
+    assert 'other.user_id' in first.column_lineage['id']['sources']
+
+
+def test_cache_renders_jinja_before_parsing():
+    manifest = {'nodes': {'model.users': {'compiled_name': 'compiled_users'}}, 'sources': {}}
+    cache = NodeAnalysisCache(manifest)
+
+    analysis = cache.get('model.report', "SELECT id FROM {{ ref('users') }}")
+
+    assert 'compiled_users' in analysis.rendered_sql
+
+
+def test_tracer_reuses_analysis_across_columns(sample_nodes):
+    tracer = ColumnLineageTracer(sample_nodes, source_data={}, manifest={})
+    tracer.get_base_level_lineage('model.mart.dim_users')
+
+    # Two models with SQL, each parsed exactly once regardless of how many columns were traced
+    assert tracer.analysis_cache.misses == 2
+    assert tracer.analysis_cache.hits > 0
+
+
+def test_analyze_many_matches_serial_results(sample_nodes):
+    items = [(name, node['raw_code'], None) for name, node in sample_nodes.items() if 'raw_code' in node]
+    items.append(('model.broken', 'SELECT FROM WHERE (', None))
+    parallel = NodeAnalysisCache(manifest={})
+    serial = NodeAnalysisCache(manifest={})
+
+    assert parallel.analyze_many(items, jobs=2) == 3
+    for name, raw_sql, _ in items:
+        assert parallel.get(name, raw_sql).transformations == serial.get(name, raw_sql).transformations
+        assert parallel.get(name, raw_sql).column_lineage == serial.get(name, raw_sql).column_lineage
+    # Both paths record the failure once and analyze the node as empty, without persisting it
+    assert parallel.stats()['failures'] == serial.stats()['failures'] == 1
+    assert 'model.broken' not in parallel and 'model.broken' not in serial
+
+
+def test_parse_failures_are_counted_and_traced_through_parents(sample_nodes, capsys):
+    sample_nodes['model.staging.stg_users']['raw_code'] = 'SELECT FROM WHERE ('
+    sample_nodes['model.mart.dim_users']['raw_code'] = 'SELECT user_id, full_name, email FROM WHERE ('
+    tracer = ColumnLineageTracer(sample_nodes, source_data={}, manifest={})
+
+    lineage = tracer.get_base_level_lineage('model.mart.dim_users')
+    # Without parse results columns are followed by name through the parents
+    assert lineage['email'] == {('source.raw.users', 'email')}
+    assert tracer.analysis_cache.stats()['failures'] == 2
+    assert capsys.readouterr().err.count('Error parsing SQL of') == 2
+
+
+def test_tracer_with_jobs_reads_prefetched_analysis(sample_nodes):
+    tracer = ColumnLineageTracer(sample_nodes, source_data={}, manifest={})
+    assert tracer.analyze_nodes(jobs=2) == 2
+
+    lineage = tracer.get_base_level_lineage('model.mart.dim_users')
+    assert lineage['email'] == {('source.raw.users', 'email')}
+    assert tracer.analysis_cache.misses == 2
+
+def test_compiled_code_skips_rendering():
+    cache = NodeAnalysisCache(manifest={})
+    raw_sql = "SELECT id FROM {{ ref('users') }}"
+
+    analysis = cache.get('model.report', raw_sql, "SELECT id FROM analytics.users")
+    assert analysis.rendered_sql == "SELECT id FROM analytics.users"
+    cache.get('model.other', raw_sql)
+    assert cache.renderer.renders == 1
+    stats = cache.stats()
+    assert (stats['compiled'], stats['rendered']) == (1, 1)
+
+def test_compiled_code_can_be_ignored():
+    cache = NodeAnalysisCache(manifest={}, use_compiled_code=False)
+    analysis = cache.get('model.report', "SELECT id FROM users", "SELECT id FROM analytics.users")
+    assert analysis.rendered_sql == "SELECT id FROM users"
+    assert cache.get('model.compiled_only', None, "SELECT id FROM users").rendered_sql == "SELECT id FROM users"
+    assert (cache.compiled, cache.rendered) == (1, 1)
+
+def test_tracer_uses_compiled_code_in_parallel(sample_nodes):
+    for node in sample_nodes.values():
+        if 'raw_code' in node:
+            node['compiled_code'] = node['raw_code']
+            node['raw_code'] = "{{ this_would_not_render( }}"
+    tracer = ColumnLineageTracer(sample_nodes, source_data={}, manifest={})
+    assert tracer.analyze_nodes(jobs=2) == 2
+    assert tracer.analysis_cache.compiled == 2
+    assert tracer.get_base_level_lineage('model.mart.dim_users')['email'] == {('source.raw.users', 'email')}
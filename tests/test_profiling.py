@@ -0,0 +1,76 @@
+import pytest
+from src.model_analyzer import ModelAnalyzer
+from src.profiling import Profiler, profiler
+
+@pytest.fixture
+def enabled_profiler():
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+
+@pytest.fixture
+def nodes():
+    return {
+        "model.report": {
+            "resource_type": "model",
+            "columns": {"a": {}, "b": {}},
+            "raw_code": "SELECT a, b FROM {{ ref('orders') }}",
+            "depends_on": {"nodes": ["model.orders"]}
+        },
+        "model.orders": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"a": {}, "b": {}},
+            "raw_code": "SELECT a, b FROM source_orders",
+            "depends_on": {"nodes": ["source_orders"]}
+        },
+        "source_orders": {
+            "resource_type": "source",
+            "columns": {"a": {}, "b": {}}
+        }
+    }
+
+def test_disabled_profiler_records_nothing():
+    disabled = Profiler()
+    with disabled.stage("render"):
+        disabled.count("nodes_parsed")
+        disabled.record_node("model.report", 1.0)
+    report = disabled.report(top_nodes=5)
+    assert report["stages"] == {}
+    assert report["counters"] == {}
+    assert report["slowest_nodes"] == []
+
+def test_stages_accumulate_calls_and_time():
+    enabled = Profiler()
+    enabled.enable()
+    with enabled.stage("render"):
+        pass
+    enabled.record_stage("render", 0.5)
+    enabled.record_stage("parse", 2.0)
+    report = enabled.report()
+    assert report["stages"]["render"]["calls"] == 2
+    assert report["stages"]["render"]["seconds"] >= 0.5
+    assert list(report["stages"]) == ["parse", "render"]
+    assert "slowest_nodes" not in report
+
+def test_slowest_nodes_are_ranked():
+    enabled = Profiler()
+    enabled.enable()
+    enabled.record_node("model.fast", 0.1)
+    enabled.record_node("model.slow", 0.3)
+    enabled.record_node("model.fast", 0.1)
+    slowest = enabled.report(top_nodes=1)["slowest_nodes"]
+    assert slowest == [{"node": "model.slow", "seconds": 0.3}]
+
+def test_analyzer_run_is_instrumented(enabled_profiler, nodes):
+    analyzer = ModelAnalyzer(nodes, source_data={}, manifest={"nodes": nodes, "sources": {}})
+    analyzer.analyze_model_matches("model.report")
+    analyzer.lineage_tracer.get_base_level_lineage("model.report")
+
+    report = enabled_profiler.report(top_nodes=5)
+    for stage in ("render", "parse", "lineage", "materialized_index", "match"):
+        assert stage in report["stages"]
+    assert report["counters"]["nodes_parsed"] == 2
+    assert report["counters"]["lineage_pairs_expanded"] > 0
+    assert report["counters"]["analysis_cache_hits"] > 0
+    assert {entry["node"] for entry in report["slowest_nodes"]} == {"model.report", "model.orders"}
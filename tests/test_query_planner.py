@@ -0,0 +1,56 @@
+import json
+import pytest
+from src.model_analyzer import ModelAnalyzer
+from src.query_planner import load_report_subgraph, plan_report_subgraph, upstream_closure
+
+@pytest.fixture
+def manifest():
+    def model(parents, columns, materialized=None):
+        node = {"resource_type": "model", "columns": {column: {} for column in columns}, "depends_on": {"nodes": parents}}
+        if materialized:
+            node["config"] = {"materialized": materialized}
+        return node
+
+    return {
+        "nodes": {
+            "seed.orders": {"resource_type": "seed", "columns": {"id": {}, "amount": {}}},
+            "seed.events": {"resource_type": "seed", "columns": {"event_id": {}}},
+            "model.stg_orders": model(["seed.orders", "source.shop.customers"], ["id", "amount"]),
+            "model.report": model(["model.stg_orders"], ["id", "amount"]),
+            "model.orders": model(["model.stg_orders"], ["id", "amount"], "table"),
+            "model.orders_view": model(["model.stg_orders"], ["id"], "view"),
+            "model.events": model(["seed.events"], ["event_id"], "table"),
+            "model.mixed": model(["model.orders", "model.events"], ["id", "event_id"], "table"),
+            "model.unrelated": model(["seed.events"], ["event_id"]),
+        },
+        "sources": {
+            "source.shop.customers": {"resource_type": "source", "columns": {"id": {}}},
+            "source.shop.unused": {"resource_type": "source", "columns": {"id": {}}},
+        },
+    }
+
+def test_upstream_closure(manifest):
+    assert upstream_closure(manifest["nodes"], ["model.report", "model.missing"]) == {
+        "model.report", "model.stg_orders", "seed.orders"
+    }
+
+def test_plan_keeps_materialized_models_sharing_ancestry(manifest):
+    plan = plan_report_subgraph(manifest["nodes"], ["model.report"])
+    assert plan.upstream == {"model.report", "model.stg_orders", "seed.orders"}
+    assert plan.materialized == ["model.orders", "model.mixed"]
+    # model.mixed pulls in its own ancestry, unrelated branches stay out
+    assert plan.nodes == plan.upstream | {"model.orders", "model.mixed", "model.events", "seed.events"}
+    assert plan.sources == {"source.shop.customers"}
+    assert plan.as_dict()["total_nodes"] == 9
+
+def test_subgraph_matches_equal_full_analysis(manifest, tmpdir):
+    path = tmpdir.join("manifest.json")
+    path.write(json.dumps(manifest))
+    subgraph, plan = load_report_subgraph(str(path), ["model.report"])
+    assert set(subgraph["nodes"]) == plan.nodes
+    assert set(subgraph["sources"]) == {"source.shop.customers"}
+
+    full = ModelAnalyzer(manifest["nodes"], source_data={})
+    planned = ModelAnalyzer(subgraph["nodes"], source_data={})
+    assert planned.analyze_model_matches("model.report") == full.analyze_model_matches("model.report")
+    assert planned.lineage_tracer.get_base_level_lineage("model.report") == full.lineage_tracer.get_base_level_lineage("model.report")
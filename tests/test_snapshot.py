@@ -0,0 +1,71 @@
+import json
+import os
+import pytest
+from src.model_analyzer import ModelAnalyzer
+from src.snapshot import load_snapshot, read_snapshot, save_snapshot
+
+@pytest.fixture
+def nodes():
+    return {
+        "source.raw.orders": {"resource_type": "source", "columns": {"id": {}, "amount": {}}},
+        "model.stg_orders": {
+            "resource_type": "model",
+            "columns": {"id": {}, "order_amount": {}},
+            "raw_code": "SELECT id, amount AS order_amount FROM {{ source('raw', 'orders') }}",
+            "depends_on": {"nodes": ["source.raw.orders"]}
+        },
+        "model.orders": {
+            "resource_type": "model",
+            "config": {"materialized": "table"},
+            "columns": {"id": {}, "order_amount": {}},
+            "raw_code": "SELECT id, order_amount FROM {{ ref('stg_orders') }}",
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        },
+        "model.report": {
+            "resource_type": "model",
+            "columns": {"id": {}, "order_amount": {}},
+            "raw_code": "SELECT id, order_amount FROM {{ ref('stg_orders') }}",
+            "depends_on": {"nodes": ["model.stg_orders"]}
+        }
+    }
+
+@pytest.fixture
+def manifest_path(nodes, tmpdir):
+    path = tmpdir.join("manifest.json")
+    path.write(json.dumps({"nodes": nodes, "sources": {}}))
+    return str(path)
+
+def test_snapshot_restores_lineage_without_tracing(nodes, manifest_path, tmpdir, monkeypatch):
+    analyzer = ModelAnalyzer(nodes, source_data={}, manifest={"nodes": nodes, "sources": {}}, precompute=True)
+    path = str(tmpdir.join("analysis.snapshot"))
+    assert save_snapshot(analyzer, path, manifest_path) == len(analyzer.lineage_tracer._lineage_memo)
+
+    restored = load_snapshot(path, source_data={}, manifest_path=manifest_path)
+    monkeypatch.setattr(restored.lineage_tracer, "_expand", lambda pair: pytest.fail("lineage was retraced"))
+    for node_name in nodes:
+        assert restored.lineage_tracer.get_base_level_lineage(node_name) == analyzer.lineage_tracer.get_base_level_lineage(node_name)
+    assert restored.analyze_model_matches("model.report") == analyzer.analyze_model_matches("model.report")
+    assert len(restored.lineage_tracer.analysis_cache) == 3
+
+def test_stale_or_corrupt_snapshot_is_ignored(nodes, manifest_path, tmpdir):
+    analyzer = ModelAnalyzer(nodes, source_data={})
+    path = str(tmpdir.join("analysis.snapshot"))
+    save_snapshot(analyzer, path, manifest_path)
+    assert read_snapshot(path, manifest_path) is not None
+
+    stat = os.stat(manifest_path)
+    os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_snapshot(path, manifest_path) is None
+
+    with open(path, "wb") as f:
+        f.write(b"not a snapshot")
+    assert read_snapshot(path) is None
+    assert load_snapshot(str(tmpdir.join("missing.snapshot"))) is None
+
+def test_snapshot_with_other_options_keeps_only_parse_results(nodes, tmpdir):
+    analyzer = ModelAnalyzer(nodes, source_data={}, precompute=True)
+    path = str(tmpdir.join("analysis.snapshot"))
+    save_snapshot(analyzer, path)
+    restored = load_snapshot(path, source_data={}, rename_fanout=1)
+    assert restored.lineage_tracer._lineage_memo == {}
+    assert "model.report" in restored.lineage_tracer.analysis_cache
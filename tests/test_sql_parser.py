@@ -60,3 +60,24 @@ def test_nested_functions(parser):
     assert any('UPPER' in t.get('function', '') for t in transformations['first_name'])
     assert any('LOWER' in t.get('function', '') for t in transformations['last_name'])
     assert any('DATEDIFF' in t.get('function', '') for t in transformations['birth_date'])
+
+def test_analyze_collects_everything_from_one_parse(parser, monkeypatch):
+    import sqlglot
+    parses = []
+    original_parse_one = sqlglot.parse_one
+    monkeypatch.setattr(sqlglot, 'parse_one', lambda sql: parses.append(sql) or original_parse_one(sql))
+
+    sql = "SELECT UPPER(u.name) AS upper_name FROM users u LEFT JOIN orders o ON u.id = o.user_id"
+    analysis = parser.analyze(sql)
+    assert len(parses) == 1
+    assert analysis.tables == parser.extract_table_references(sql)
+    assert analysis.joins == [('LEFT JOIN', 'orders AS o', 'u.id = o.user_id')]
+    assert analysis.transformations['u.name'][0]['function'] == 'UPPER'
+    assert analysis.column_lineage['u.id']['sources'] == ['o.user_id']
+
+def test_non_column_arguments_are_optional_diagnostics(parser, capsys):
+    sql = "SELECT COALESCE(name, 'unknown') AS name FROM users"
+    assert parser.analyze(sql).diagnostics == []
+    diagnostics = parser.analyze(sql, diagnostics=True).diagnostics
+    assert {'type': 'non_column_argument', 'function': 'COALESCE', 'argument': "'unknown'"} in diagnostics
+    assert capsys.readouterr().out == ""
@@ -1,5 +1,5 @@
 import pytest
-from src.sql_preprocessor import preprocess_sql
+from src.sql_preprocessor import SqlRenderer, get_renderer, preprocess_sql
 
 @pytest.fixture
 def manifest():
@@ -105,4 +105,24 @@ def test_complex_sql_with_variables(manifest):
     assert '"PLACEHOLDER_my_var"' in processed_sql
     assert '"PLACEHOLDER_var"' in processed_sql
     assert "compiled_my_table" in processed_sql
-    assert "compiled_my_source_my_table" in processed_sql
\ No newline at end of file
+    assert "compiled_my_source_my_table" in processed_sql
+
+def test_renderer_reuses_compiled_templates(manifest):
+    renderer = SqlRenderer(manifest)
+    sql = "SELECT * FROM {{ ref('my_table') }};"
+
+    assert renderer.render(sql) == renderer.render(sql) == "SELECT * FROM compiled_my_table;"
+    stats = renderer.stats()
+    assert stats["template_cache_misses"] == 1
+    assert stats["template_cache_hits"] == 1
+
+def test_renderer_is_shared_per_manifest(manifest):
+    assert get_renderer(manifest) is get_renderer(manifest)
+    assert get_renderer(dict(manifest)) is not get_renderer(manifest)
+
+def test_renderer_bytecode_cache(manifest, tmpdir):
+    sql = "SELECT * FROM {{ source('my_source', 'my_table') }};"
+    SqlRenderer(manifest, bytecode_cache_dir=str(tmpdir)).render(sql)
+    assert len(tmpdir.listdir()) == 1
+
+    assert SqlRenderer(manifest, bytecode_cache_dir=str(tmpdir)).render(sql) == "SELECT * FROM compiled_my_source_my_table;"
@@ -0,0 +1,51 @@
+import json
+import pytest
+from src.manifest_loader import load_manifest_streaming
+from src.profiling import profiler
+from src.startup import StartupTimings, load_startup_inputs
+
+@pytest.fixture
+def project(tmpdir):
+    manifest = {
+        "nodes": {
+            "model.orders": {"resource_type": "model", "columns": {"id": {}}, "depends_on": {"nodes": ["source.raw.orders"]}},
+            "source.raw.orders": {"resource_type": "source", "columns": {"id": {}}}
+        }
+    }
+    manifest_path = tmpdir.join("manifest.json")
+    manifest_path.write(json.dumps(manifest))
+    yaml_dir = tmpdir.mkdir("models")
+    yaml_dir.join("sources.yml").write(
+        "sources:\n  - name: raw\n    tables:\n      - name: orders\n        columns:\n          - name: id\n"
+    )
+    return str(manifest_path), str(yaml_dir)
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_startup_loads_every_input(project, concurrent):
+    manifest_path, yaml_dir = project
+    manifest, source_data, index, timings = load_startup_inputs(
+        lambda: load_manifest_streaming(manifest_path), yaml_dir, concurrent=concurrent
+    )
+    assert set(manifest["nodes"]) == {"model.orders", "source.raw.orders"}
+    assert source_data == {"orders": {"group": "raw", "columns": ["id"]}}
+    assert index.node_id("model.orders") is not None
+    assert timings.wall > 0
+    if not concurrent:
+        assert timings.saved == 0
+
+def test_startup_reports_yaml_counters_from_worker(project):
+    manifest_path, yaml_dir = project
+    profiler.enable()
+    try:
+        load_startup_inputs(lambda: load_manifest_streaming(manifest_path), yaml_dir, build_index=False, concurrent=True)
+        report = profiler.report()
+    finally:
+        profiler.disable()
+    assert report["counters"]["yaml_files"] == 1
+    assert {"startup", "startup_manifest", "yaml_discovery"} <= set(report["stages"])
+
+def test_startup_timings_saved_is_overlap():
+    timings = StartupTimings()
+    timings.manifest, timings.yaml, timings.index, timings.wall = 2.0, 1.5, 0.5, 2.5
+    assert timings.as_dict()["sequential"] == 4.0
+    assert timings.saved == 1.5
@@ -1,4 +1,6 @@
+import os
 import pytest
+from src import yml_processor
 from src.yml_processor import process_yaml_sources
 
 @pytest.fixture
@@ -35,3 +37,31 @@ def test_process_yaml_sources(mock_yaml_dir):
     assert sources['source_table_2']['group'] == 'group_2'
     assert 'column_a' in sources['source_table_2']['columns']
     assert 'column_b' in sources['source_table_2']['columns']
+
+def test_process_yaml_sources_in_parallel(mock_yaml_dir, tmpdir):
+    tmpdir.join("other.yml").write("sources:\n  - name: group_3\n    tables:\n      - name: source_table_3\n")
+    tmpdir.join("broken.yml").write("sources: [unclosed\n")
+
+    assert process_yaml_sources(mock_yaml_dir, jobs=2) == process_yaml_sources(mock_yaml_dir)
+    assert process_yaml_sources(mock_yaml_dir, jobs=2)['source_table_3'] == {'group': 'group_3', 'columns': []}
+
+def test_process_yaml_sources_skips_unchanged_files(mock_yaml_dir, tmpdir, monkeypatch):
+    cache_path = str(tmpdir.join("cache", "yaml_sources.json"))
+    cold = process_yaml_sources(mock_yaml_dir, cache_path=cache_path)
+
+    def fail_parse(full_path):
+        raise AssertionError(f"{full_path} should have been read from the cache")
+
+    monkeypatch.setattr(yml_processor, "_parse_source_file", fail_parse)
+    assert process_yaml_sources(mock_yaml_dir, cache_path=cache_path) == cold
+
+    # A touched file with the same content is recognised by its hash
+    os.utime(str(tmpdir.join("source.yml")), ns=(0, 0))
+    assert process_yaml_sources(mock_yaml_dir, cache_path=cache_path) == cold
+
+def test_process_yaml_sources_reparses_changed_files(mock_yaml_dir, tmpdir):
+    cache_path = str(tmpdir.join("yaml_sources.json"))
+    process_yaml_sources(mock_yaml_dir, cache_path=cache_path)
+
+    tmpdir.join("source.yml").write("sources:\n  - name: group_9\n    tables:\n      - name: source_table_9\n")
+    assert list(process_yaml_sources(mock_yaml_dir, cache_path=cache_path)) == ['source_table_9']